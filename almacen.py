@@ -0,0 +1,1029 @@
+# Almacen de datos de la sesion: mantiene productos, stock y umbrales en memoria
+
+import os
+from array import array
+from itertools import compress
+from operator import le
+from buscador import IndiceProductos
+from persistencia import BackendArchivos, aplicar_registro
+from registros import Carga, Producto, Venta
+from reportes import resumir_ventas
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él las columnas se comparan con map y compress
+    np = None
+
+# Campo de la carga que copia cada campo del producto
+CAMPOS_PRODUCTO_EN_CARGA = {"nombre": "tipo", "capacidad": "capacidad", "categoria": "categoria"}
+
+# Umbral de la columna para los productos sin umbral: el menor valor de un array "q",
+# ningun total de unidades queda por debajo
+SIN_UMBRAL = -2 ** 63
+
+
+class StockInsuficiente(Exception):
+    """
+    Algún producto de un ticket no tiene las unidades pedidas (otra caja pudo haberlas vendido).
+    `id_producto` es el primer producto que no alcanza.
+    """
+
+    def __init__(self, id_producto: int) -> None:
+
+        super().__init__(f"no hay stock suficiente del producto {id_producto}")
+        self.id_producto = id_producto
+
+
+def crear_backend():
+    """
+    Crea el almacenamiento elegido con la variable de entorno STOCK_BACKEND.
+
+    Precondiciones:
+    - STOCK_BACKEND puede ser "archivos" (por defecto) o "sqlite"
+    - Para "sqlite", la base se toma de STOCK_DB (por defecto stock.db)
+
+    Postcondiciones:
+    - Retorna un BackendArchivos o un BackendSQLite
+    - El módulo sqlite solo se importa si se lo elige
+    """
+
+    if os.environ.get("STOCK_BACKEND", "archivos").lower() == "sqlite":
+
+        from persistencia_sqlite import BackendSQLite
+
+        return BackendSQLite(os.environ.get("STOCK_DB", "stock.db"))
+
+    return BackendArchivos()
+
+
+class Almacen:
+    """
+    Datos del sistema en memoria para toda la sesión.
+    main() crea una sola instancia y la pasa a cada acción del menú.
+
+    Precondiciones:
+    - `backend` es el almacenamiento a usar (opcional, por defecto el de crear_backend())
+    - Los archivos productos.csv y stock_data.json deben existir (opcional)
+
+    Postcondiciones:
+    - Los datos se leen una sola vez y se vuelven a leer únicamente si cambiaron en disco
+      (por ejemplo, si otro programa editó los archivos); cada backend define esa firma
+    - Las listas y diccionarios devueltos son los mismos objetos en toda la sesión,
+      por lo que las modificaciones hechas por las acciones se conservan en memoria
+    - Los productos, cargas y ventas son registros tipados (registros.py): los ids, cantidades
+      y precios se convierten una sola vez al leerlos y los índices usan sus atributos
+    - Al guardar se actualiza la firma del archivo, así no se relee lo que se acaba de escribir
+    - Los productos quedan indexados por id y por (nombre, capacidad); los índices se arman
+      al leer productos.csv y se mantienen al agregar, modificar o eliminar productos
+    - Los mismos cambios mantienen el índice de búsqueda (ver indice_busqueda)
+    - Cada cambio del stock se guarda por separado (en el diario o en la base SQLite)
+      en lugar de reescribir stock_data.json; el diario se compacta al superar LIMITE_DIARIO
+    - Cada carga apunta a su producto por id_producto; un índice secundario id_producto -> cargas
+      permite eliminar, renombrar o consultar las cargas de un producto sin recorrer el stock
+    - Las cargas de versiones anteriores (solo con tipo y capacidad) se asocian a su producto
+      una sola vez al leerlas, y ese cambio queda guardado (ver _migrar_cargas)
+    - Las cargas con unidades quedan en una cola por producto ordenada por id,
+      que se mantiene con cada cambio del stock y se usa para vender en orden FIFO
+    - Los umbrales son por producto (id_producto -> valor); los de versiones anteriores, por nombre,
+      se pasan a los productos de ese nombre una sola vez al leerlos (ver _migrar_umbrales)
+    - Las unidades totales y el umbral de cada producto se guardan en columnas (arrays paralelos,
+      una posición por producto) que cada cambio actualiza solo en los productos que toca;
+      el stock bajo se obtiene comparando las dos columnas en una sola pasada (ver ids_stock_bajo)
+    """
+
+    def __init__(self, backend=None) -> None:
+
+        self.backend = backend if backend is not None else crear_backend()
+
+        self._productos = []
+        self._stock_data = {"stock": [], "umbrales": {}}
+
+        # Indices del catalogo: id -> producto y (nombre, capacidad) -> producto
+        self._por_id = {}
+        self._por_nombre_capacidad = {}
+
+        # Indice invertido para buscar productos por nombre, capacidad, categoria y precio
+        self._busqueda = IndiceProductos()
+
+        # Indice del stock: id de carga -> carga
+        self._cargas = {}
+
+        # Indice secundario del stock: id de producto -> {id de carga: carga}, todas sus cargas
+        self._cargas_por_producto = {}
+
+        # Colas FIFO: id de producto -> {id de carga: carga}, solo cargas con unidades, en orden de id
+        self._colas = {}
+
+        # Columnas por producto: id de producto -> posicion, y en esa posicion su id,
+        # sus unidades sumando todas sus cargas y su umbral (SIN_UMBRAL si no tiene)
+        self._posiciones = {}
+        self._columna_ids = array("q")
+        self._columna_unidades = array("q")
+        self._columna_umbrales = array("q")
+
+        # Productos modificados o eliminados desde el ultimo guardado
+        self._productos_cambiados = {}
+        self._productos_eliminados = set()
+
+        # Firma de los datos la ultima vez que se leyeron o escribieron
+        # El valor inicial no coincide con ninguna firma y obliga a leer en el primer acceso
+        self._firmas = {"productos": object(), "stock": object()}
+
+    def _cambio(self, datos: str) -> bool:
+        """
+        Indica si los datos ("productos" o "stock") cambiaron en disco desde la última lectura o escritura
+        """
+
+        return self.backend.firma(datos) != self._firmas[datos]
+
+    def productos(self) -> list[Producto]:
+        """
+        Devuelve la lista de productos del catálogo.
+        Solo relee productos.csv si el archivo cambió en disco; los cambios todavía
+        no guardados de esta sesión se vuelven a aplicar sobre lo leído.
+        """
+
+        if self._cambio("productos"):
+
+            self._firmas["productos"] = self.backend.firma("productos")
+            self._productos = self.backend.cargar_productos()
+
+            if self._productos_cambiados or self._productos_eliminados:
+                self._productos = self._con_cambios_pendientes(self._productos)
+
+            self._por_id = {}
+            self._por_nombre_capacidad = {}
+
+            for producto in self._productos:
+                self._por_id.setdefault(producto.id, producto)
+                self._por_nombre_capacidad.setdefault((producto.nombre, producto.capacidad), producto)
+
+            # Con ids repetidos solo se indexa el primero, igual que en _indexar
+            self._busqueda = IndiceProductos.construir(self._por_id.values())
+
+        return self._productos
+
+    def _con_cambios_pendientes(self, productos: list[Producto]) -> list[Producto]:
+        """
+        Devuelve `productos` (recién leídos) con los productos agregados, modificados
+        o eliminados en esta sesión desde el último guardado
+
+        Postcondiciones:
+        - Un producto modificado reemplaza al leído con su id; los agregados quedan al final
+        - Los cambios de otra caja en los demás productos se conservan
+        """
+
+        pendientes = dict(self._productos_cambiados)
+        resultado = [pendientes.pop(producto.id, producto) for producto in productos
+                     if producto.id not in self._productos_eliminados]
+        resultado.extend(pendientes.values())
+
+        return resultado
+
+    def _indexar(self, producto: Producto) -> None:
+        """
+        Agrega un producto a los índices del catálogo.
+        Si hay claves repetidas se conserva el primer producto, igual que una búsqueda lineal.
+        """
+
+        if self._por_id.setdefault(producto.id, producto) is producto:
+            self._busqueda.agregar(producto.id, producto)
+
+        clave = (producto.nombre, producto.capacidad)
+        self._por_nombre_capacidad.setdefault(clave, producto)
+
+    def _desindexar(self, producto: Producto) -> None:
+        """
+        Quita un producto de los índices del catálogo
+        """
+
+        if self._por_id.get(producto.id) is producto:
+            del self._por_id[producto.id]
+            self._busqueda.quitar(producto.id, producto)
+
+        clave = (producto.nombre, producto.capacidad)
+
+        if self._por_nombre_capacidad.get(clave) is producto:
+            del self._por_nombre_capacidad[clave]
+
+    def producto_por_id(self, id_producto: int) -> Producto | None:
+        """
+        Devuelve el producto con ese id en tiempo constante, o None si no existe
+        """
+
+        self.productos()
+
+        return self._por_id.get(id_producto)
+
+    def producto_por_nombre(self, nombre: str, capacidad: str) -> Producto | None:
+        """
+        Devuelve el producto con ese nombre y capacidad en tiempo constante, o None si no existe
+        """
+
+        self.productos()
+
+        return self._por_nombre_capacidad.get((nombre, capacidad))
+
+    def indice_busqueda(self) -> IndiceProductos:
+        """
+        Devuelve el índice invertido del catálogo, al día con productos.csv y los cambios en memoria.
+        Las búsquedas devuelven IDs de producto (ver producto_por_id).
+        """
+
+        self.productos()
+
+        return self._busqueda
+
+    def nuevo_id_producto(self) -> int:
+        """
+        Reserva el ID para un producto nuevo (secuencia "producto"), sin recorrer el catálogo
+        """
+
+        with self.backend.bloqueo:
+
+            self.productos()
+
+            return self.backend.siguiente_id("producto", lambda: max(self._por_id, default=0))
+
+    def agregar_producto(self, producto: Producto) -> None:
+        """
+        Agrega un producto al catálogo en memoria y a los índices
+
+        Postcondiciones:
+        - El producto queda al final de la lista (no se guarda en disco)
+        """
+
+        with self.backend.bloqueo:
+
+            self.productos().append(producto)
+            self._indexar(producto)
+            self._productos_cambiados[producto.id] = producto
+
+    def modificar_producto(self, producto: Producto, campo: str, valor) -> None:
+        """
+        Cambia un campo de un producto del catálogo manteniendo los índices actualizados
+
+        Precondiciones:
+        - `producto` debe pertenecer al catálogo en memoria
+        - `campo` debe ser un campo del producto (nombre, capacidad, categoria o precio)
+        - `valor` viene como texto, como se ingresa (el precio en pesos, no en centavos)
+
+        Postcondiciones:
+        - El producto queda modificado en memoria (no se guarda en disco)
+        - El valor se convierte al tipo del campo (ValueError si no es válido)
+        - Si otra caja cambió el catálogo, se modifica el producto releído con ese id (y también
+          `producto`); si otra caja lo eliminó, solo se modifica `producto`
+        - Si cambia el nombre, la capacidad o la categoría, se copia en las cargas de ese producto
+          (solo en esas, con el índice secundario) y ese cambio del stock sí se guarda
+        """
+
+        # Se convierte antes de desindexar: si el valor no es valido el producto queda como estaba
+        valor = producto.convertir(campo, valor)
+
+        with self.backend.bloqueo:
+
+            actual = self.producto_por_id(producto.id)
+
+            if actual is not producto:
+                setattr(producto, campo, valor)
+
+            if actual is None:
+                return
+
+            self._desindexar(actual)
+            setattr(actual, campo, valor)
+            self._indexar(actual)
+            self._productos_cambiados[actual.id] = actual
+
+            if campo in CAMPOS_PRODUCTO_EN_CARGA:
+                self.modificar_cargas_de_producto(actual.id, {CAMPOS_PRODUCTO_EN_CARGA[campo]: valor})
+
+    def eliminar_producto(self, producto: Producto) -> None:
+        """
+        Quita un producto del catálogo en memoria y de los índices
+
+        Postcondiciones:
+        - El producto con ese id se elimina de la lista (no se guarda en disco),
+          aunque el catálogo se haya releído porque otra caja lo cambió
+        """
+
+        with self.backend.bloqueo:
+
+            actual = self.producto_por_id(producto.id)
+
+            if actual is not None:
+                self._desindexar(actual)
+                self._productos.remove(actual)
+
+            self._productos_cambiados.pop(producto.id, None)
+            self._productos_eliminados.add(producto.id)
+
+    def datos_stock(self) -> dict[str]:
+        """
+        Devuelve el diccionario completo del stock ({"stock": [...], "umbrales": {...}, "version": n}).
+        Solo relee stock_data.json y el diario si alguno cambió en disco.
+        """
+
+        if self._cambio("stock"):
+
+            self._firmas["stock"] = self.backend.firma("stock")
+            self._stock_data = self.backend.cargar_stock()
+            self._cargas = {carga.id: carga for carga in self._stock_data["stock"]}
+
+            self._cargas_por_producto = {}
+            self._colas = {}
+            for id_carga in sorted(self._cargas):
+                carga = self._cargas[id_carga]
+                self._cargas_por_producto.setdefault(carga.id_producto, {})[id_carga] = carga
+                self._encolar(carga)
+
+            self._posiciones = {}
+            self._columna_ids = array("q")
+            self._columna_unidades = array("q")
+            self._columna_umbrales = array("q")
+
+            for carga in self._stock_data["stock"]:
+                self._sumar_unidades(carga, 1)
+
+            for id_producto in self._stock_data["umbrales"]:
+                if isinstance(id_producto, int):
+                    self._actualizar_umbral(id_producto)
+
+            if 0 in self._cargas_por_producto:
+                self._migrar_cargas()
+
+            if any(isinstance(clave, str) for clave in self._stock_data["umbrales"]):
+                self._migrar_umbrales()
+
+        return self._stock_data
+
+    def _migrar_cargas(self) -> None:
+        """
+        Asocia a su producto las cargas guardadas por versiones anteriores, que solo tenían tipo y capacidad
+
+        Postcondiciones:
+        - Cada carga sin producto (id_producto 0) toma el id del producto con su mismo nombre y capacidad
+        - Todas se guardan como un solo cambio del stock (diario o base), así la migración se hace una vez
+        - Las cargas cuyo producto ya no está en el catálogo quedan sin producto
+        """
+
+        with self.backend.bloqueo:
+
+            # Otra caja cambio el stock (o ya lo migro): se relee con el bloqueo tomado
+            if self._cambio("stock"):
+                self.datos_stock()
+                return
+
+            asociadas = []
+
+            for carga in self._cargas_por_producto.get(0, {}).values():
+
+                producto = self.producto_por_nombre(carga.tipo, carga.capacidad)
+
+                if producto is not None:
+                    asociadas.append({"op": "modificar_carga", "id": carga.id, "campos": {"id_producto": producto.id}})
+
+            if asociadas:
+                self._registrar({"op": "varios", "registros": asociadas})
+
+    def _migrar_umbrales(self) -> None:
+        """
+        Pasa a cada producto los umbrales por tipo (nombre) guardados por versiones anteriores
+
+        Postcondiciones:
+        - El umbral de un nombre se copia a los productos de ese nombre que tienen cargas (a todos
+          los de ese nombre si ninguno tiene), salvo a los que ya tienen un umbral propio
+        - Los umbrales por nombre se quitan; todo se guarda como un solo cambio del stock
+        """
+
+        with self.backend.bloqueo:
+
+            # Otra caja cambio el stock (o ya lo migro): se relee con el bloqueo tomado
+            if self._cambio("stock"):
+                self.datos_stock()
+                return
+
+            umbrales = self._stock_data["umbrales"]
+
+            por_nombre = {}
+            for producto in self.productos():
+                por_nombre.setdefault(producto.nombre, []).append(producto.id)
+
+            registros = []
+
+            for tipo in [clave for clave in umbrales if isinstance(clave, str)]:
+
+                ids = por_nombre.get(tipo, [])
+                con_cargas = [id_producto for id_producto in ids if id_producto in self._cargas_por_producto]
+
+                # Un umbral en None era un tipo sin umbral
+                if umbrales[tipo] is not None:
+                    registros.extend({"op": "fijar_umbral", "id_producto": id_producto, "valor": int(umbrales[tipo])}
+                                     for id_producto in con_cargas or ids if id_producto not in umbrales)
+
+                registros.append({"op": "eliminar_umbral", "tipo": tipo})
+
+            self._registrar({"op": "varios", "registros": registros})
+
+    def stock(self) -> list[Carga]:
+        """
+        Devuelve la lista de cargas de stock
+        """
+
+        return self.datos_stock()["stock"]
+
+    def umbrales(self) -> dict[int, int]:
+        """
+        Devuelve el diccionario de umbrales mínimos por producto ({id de producto: umbral})
+        """
+
+        return self.datos_stock()["umbrales"]
+
+    def carga_por_id(self, id_carga: int) -> Carga | None:
+        """
+        Devuelve la carga de stock con ese id en tiempo constante, o None si no existe
+        """
+
+        self.datos_stock()
+
+        return self._cargas.get(id_carga)
+
+    def cargas_de_producto(self, id_producto: int) -> list[Carga]:
+        """
+        Devuelve todas las cargas de un producto (con o sin unidades) con el índice secundario, sin recorrer el stock
+        """
+
+        self.datos_stock()
+
+        return list(self._cargas_por_producto.get(id_producto, {}).values())
+
+    def _encolar(self, carga: Carga) -> None:
+        """
+        Agrega una carga a la cola de su producto si tiene unidades, manteniendo el orden por id
+        """
+
+        if carga.cantidad <= 0:
+            return
+
+        cola = self._colas.setdefault(carga.id_producto, {})
+        ultimo = next(reversed(cola), None)
+        cola[carga.id] = carga
+
+        # Carga mas vieja que la ultima de la cola (por ejemplo, si cambio de producto): se reordena
+        if ultimo is not None and ultimo > carga.id:
+            ordenada = dict(sorted(cola.items()))
+            cola.clear()
+            cola.update(ordenada)
+
+    def _cola_actual(self, id_carga: int) -> int | None:
+        """
+        Devuelve la clave (id de producto) de la cola en la que corresponde que esté la carga,
+        o None si no tiene unidades
+        """
+
+        carga = self._cargas.get(id_carga)
+
+        if carga is None or carga.cantidad <= 0:
+            return None
+
+        return carga.id_producto
+
+    def _desencolar(self, id_carga: int, clave: int) -> None:
+        """
+        Quita una carga de la cola `clave`
+        """
+
+        cola = self._colas.get(clave)
+
+        if cola is not None and cola.pop(id_carga, None) is not None and not cola:
+            del self._colas[clave]
+
+    def _reubicar(self, id_carga: int, id_producto_anterior: int | None) -> None:
+        """
+        Mueve una carga en el índice secundario si cambió de producto, se agregó o se eliminó
+        """
+
+        carga = self._cargas.get(id_carga)
+        id_producto = carga.id_producto if carga is not None else None
+
+        if id_producto == id_producto_anterior:
+            return
+
+        if id_producto_anterior is not None:
+
+            cargas = self._cargas_por_producto[id_producto_anterior]
+            del cargas[id_carga]
+
+            if not cargas:
+                del self._cargas_por_producto[id_producto_anterior]
+
+        if carga is not None:
+            self._cargas_por_producto.setdefault(id_producto, {})[id_carga] = carga
+
+    def _cargas_afectadas(self, registro: dict) -> list[int]:
+        """
+        Devuelve los ids de las cargas que modifica un registro del stock
+        """
+
+        match registro["op"]:
+
+            case "agregar_carga":
+                return [registro["carga"].id]
+
+            case "modificar_carga" | "eliminar_carga":
+                return [registro["id"]]
+
+            case "varios":
+                return [id_carga for cambio in registro["registros"] for id_carga in self._cargas_afectadas(cambio)]
+
+        return []
+
+    def _umbrales_afectados(self, registro: dict) -> list[int]:
+        """
+        Devuelve los productos cuyo umbral modifica un registro del stock
+        (los registros por tipo de versiones anteriores no están en las columnas)
+        """
+
+        match registro["op"]:
+
+            case "fijar_umbral" | "eliminar_umbral" if "id_producto" in registro:
+                return [registro["id_producto"]]
+
+            case "varios":
+                return [id_producto for cambio in registro["registros"]
+                        for id_producto in self._umbrales_afectados(cambio)]
+
+        return []
+
+    def _posicion(self, id_producto: int) -> int:
+        """
+        Devuelve la posición de un producto en las columnas, agregándolo si todavía no está
+        """
+
+        posicion = self._posiciones.get(id_producto)
+
+        if posicion is None:
+
+            posicion = self._posiciones[id_producto] = len(self._columna_ids)
+            self._columna_ids.append(id_producto)
+            self._columna_unidades.append(0)
+            self._columna_umbrales.append(SIN_UMBRAL)
+
+        return posicion
+
+    def _sumar_unidades(self, carga: Carga, signo: int) -> None:
+        """
+        Suma (signo 1) o resta (signo -1) las unidades de una carga al total de su producto
+        """
+
+        self._columna_unidades[self._posicion(carga.id_producto)] += signo * carga.cantidad
+
+    def _actualizar_umbral(self, id_producto: int) -> None:
+        """
+        Copia a la columna de umbrales el umbral actual de un producto
+        """
+
+        umbral = self._stock_data["umbrales"].get(id_producto)
+        self._columna_umbrales[self._posicion(id_producto)] = SIN_UMBRAL if umbral is None else umbral
+
+    def ids_stock_bajo(self) -> list[int]:
+        """
+        Devuelve los ids de los productos cuyo total de unidades no supera su umbral
+
+        Postcondiciones:
+        - Se comparan las columnas de unidades y de umbrales en una sola pasada, sin recorrer el stock:
+          con NumPy es una comparación vectorizada sobre los mismos arrays (sin copiarlos); sin NumPy,
+          map y compress recorren los arrays sin ejecutar código Python por producto
+        - Los productos sin umbral nunca están en stock bajo
+        """
+
+        self.datos_stock()
+
+        if np is not None:
+
+            ids = np.frombuffer(self._columna_ids, dtype=np.int64)
+            bajo = np.frombuffer(self._columna_unidades, dtype=np.int64) <= np.frombuffer(self._columna_umbrales,
+                                                                                          dtype=np.int64)
+
+            return ids[bajo].tolist()
+
+        return list(compress(self._columna_ids, map(le, self._columna_unidades, self._columna_umbrales)))
+
+    def stock_bajo(self) -> list[dict]:
+        """
+        Devuelve los productos del catálogo con stock bajo, ordenados por nombre y, dentro de un nombre, por id
+
+        Postcondiciones:
+        - Cada elemento es {"id_producto", "producto", "capacidad", "cantidad" (total de todas sus cargas), "umbral"}
+        """
+
+        umbrales = self.umbrales()
+        productos = [producto for producto in map(self.producto_por_id, self.ids_stock_bajo()) if producto is not None]
+        productos.sort(key=lambda producto: (producto.nombre, producto.id))
+
+        return [{"id_producto": producto.id, "producto": producto.nombre, "capacidad": producto.capacidad,
+                 "cantidad": self._columna_unidades[self._posiciones[producto.id]], "umbral": umbrales[producto.id]}
+                for producto in productos]
+
+    def cola_de_producto(self, producto: Producto) -> dict[int, Carga]:
+        """
+        Devuelve las cargas con unidades de un producto en orden FIFO ({id de carga: carga}), sin recorrer el stock
+        """
+
+        self.datos_stock()
+
+        return self._colas.get(producto.id, {})
+
+    def stock_de_producto(self, producto: Producto) -> int:
+        """
+        Devuelve las unidades disponibles de un producto (sumando todas sus cargas) desde su columna
+        """
+
+        self.datos_stock()
+        posicion = self._posiciones.get(producto.id)
+
+        return self._columna_unidades[posicion] if posicion is not None else 0
+
+    def _asignar_fifo(self, producto: Producto, cantidad: int, tomadas: dict[int, int]) -> list[tuple[int, int]] | None:
+        """
+        Reparte `cantidad` unidades de un producto entre sus cargas, de la más vieja a la más nueva
+
+        Precondiciones:
+        - `tomadas` tiene las unidades de cada carga ya asignadas a otras líneas del mismo ticket
+
+        Postcondiciones:
+        - Retorna [(id de carga, unidades), ...] y suma esas unidades a `tomadas`
+        - Retorna None si entre todas las cargas del producto no alcanza
+        - Solo recorre las cargas con unidades de ese producto
+        """
+
+        restante = cantidad
+        asignacion = []
+
+        for id_carga, carga in self.cola_de_producto(producto).items():
+
+            libres = carga.cantidad - tomadas.get(id_carga, 0)
+
+            if libres <= 0:
+                continue
+
+            unidades = min(libres, restante)
+            asignacion.append((id_carga, unidades))
+            tomadas[id_carga] = tomadas.get(id_carga, 0) + unidades
+            restante -= unidades
+
+            if restante == 0:
+                return asignacion
+
+        return None
+
+    def guardar_productos(self) -> bool:
+        """
+        Guarda los productos que están en memoria
+
+        Postcondiciones:
+        - Con archivos se sobrescribe productos.csv; con SQLite solo se escriben
+          los productos agregados, modificados o eliminados desde el último guardado
+        - Se guarda con el bloqueo tomado: si otra caja cambió el catálogo, antes se relee
+          y se le aplican los cambios pendientes, así no se pisan los cambios de la otra caja
+        - Retorna True si se guardó; solo entonces se olvidan los cambios pendientes
+          y se actualiza la firma de los productos
+        - Si falló, los cambios quedan pendientes para el próximo guardado
+        """
+
+        with self.backend.bloqueo:
+
+            productos = self.productos()
+
+            if not self.backend.guardar_productos(productos, list(self._productos_cambiados.values()),
+                                                  list(self._productos_eliminados)):
+                return False
+
+            self._productos_cambiados = {}
+            self._productos_eliminados = set()
+            self._firmas["productos"] = self.backend.firma("productos")
+
+        return True
+
+    def _registrar(self, registro: dict, ventas: list[Venta] | None = None) -> bool:
+        """
+        Guarda un cambio del stock (diario o base) y recién después lo aplica en memoria.
+
+        Precondiciones:
+        - Debe llamarse con el bloqueo del backend tomado y con los datos recién releídos
+        - `registro` debe tener la clave "op" y los datos de esa operación (ver aplicar_registro)
+        - `ventas`, si se indica, son las ventas completas de un ticket que se guardan junto con el cambio
+
+        Postcondiciones:
+        - Se le asigna al registro la versión siguiente a la actual
+        - Si no se pudo guardar, los datos en memoria no se modifican y retorna False
+        - Si el backend lo pide (diario mayor a LIMITE_DIARIO), se compacta el stock
+        - Retorna True si el cambio quedó guardado
+        """
+
+        datos = self.datos_stock()
+        registro["version"] = datos["version"] + 1
+
+        if ventas is None:
+            guardado = self.backend.registrar_cambio(registro)
+        else:
+            guardado = self.backend.registrar_ticket(registro, ventas)
+
+        if not guardado:
+            return False
+
+        # Colas de las cargas afectadas antes del cambio: solo se mueven las que cambian de cola
+        # (se agotan, vuelven a tener unidades, cambian de producto, se agregan o se eliminan)
+        anteriores = {id_carga: self._cola_actual(id_carga) for id_carga in self._cargas_afectadas(registro)}
+        productos_anteriores = {id_carga: self._cargas[id_carga].id_producto if id_carga in self._cargas else None
+                                for id_carga in anteriores}
+
+        # Los totales se corrigen restando las cargas afectadas antes del cambio y sumandolas despues
+        for id_carga in anteriores:
+            if id_carga in self._cargas:
+                self._sumar_unidades(self._cargas[id_carga], -1)
+
+        aplicar_registro(datos, registro, self._cargas)
+
+        for id_carga in anteriores:
+            if id_carga in self._cargas:
+                self._sumar_unidades(self._cargas[id_carga], 1)
+
+        for id_producto in self._umbrales_afectados(registro):
+            self._actualizar_umbral(id_producto)
+
+        for id_carga, id_producto in productos_anteriores.items():
+            self._reubicar(id_carga, id_producto)
+
+        for id_carga, clave in anteriores.items():
+
+            if self._cola_actual(id_carga) == clave:
+                continue
+
+            if clave is not None:
+                self._desencolar(id_carga, clave)
+
+            if id_carga in self._cargas:
+                self._encolar(self._cargas[id_carga])
+
+        self._firmas["stock"] = self.backend.firma("stock")
+
+        if self.backend.necesita_compactar():
+            self.compactar_stock()
+
+        return True
+
+    def agregar_carga(self, carga: Carga) -> bool:
+        """
+        Agrega una carga al stock
+
+        Postcondiciones:
+        - Con el bloqueo tomado se le asigna a la carga el próximo id de la secuencia "carga",
+          así dos cajas que agregan a la vez no repiten id
+        """
+
+        with self.backend.bloqueo:
+
+            self.datos_stock()
+            carga.id = self.backend.siguiente_id("carga", lambda: max(self._cargas, default=0))
+
+            return self._registrar({"op": "agregar_carga", "carga": carga})
+
+    def modificar_carga(self, carga: Carga, campos: dict, anteriores: dict | None = None) -> bool:
+        """
+        Cambia los campos indicados de una carga del stock (tipo, capacidad, cantidad, ...)
+
+        Precondiciones:
+        - `anteriores` (opcional) son los valores de esos campos que vio el usuario antes de editarlos
+
+        Postcondiciones:
+        - Con el bloqueo tomado se releen los datos si otra caja los cambió (la versión avanzó)
+        - Si la carga ya no existe o otra caja cambió alguno de `anteriores`, no se modifica
+          nada y retorna False para que la acción vuelva a intentarlo con los datos nuevos
+        - Retorna True si el cambio quedó guardado
+        """
+
+        with self.backend.bloqueo:
+
+            actual = self.carga_por_id(carga.id)
+
+            if actual is None:
+                return False
+
+            if anteriores and any(actual.get(campo) != valor for campo, valor in anteriores.items()):
+                return False
+
+            return self._registrar({"op": "modificar_carga", "id": carga.id, "campos": campos})
+
+    def modificar_cargas_de_producto(self, id_producto: int, campos: dict) -> bool:
+        """
+        Cambia los mismos campos en todas las cargas de un producto, como un solo cambio del stock
+
+        Postcondiciones:
+        - Solo se tocan las cargas del producto (índice secundario); si no tiene, no se guarda nada
+        - Retorna True si el cambio quedó guardado (o no había cargas)
+        """
+
+        with self.backend.bloqueo:
+
+            registros = [{"op": "modificar_carga", "id": carga.id, "campos": campos}
+                         for carga in self.cargas_de_producto(id_producto)]
+
+            return not registros or self._registrar({"op": "varios", "registros": registros})
+
+    def eliminar_cargas_de_producto(self, id_producto: int) -> bool:
+        """
+        Quita del stock todas las cargas de un producto (por ejemplo, al eliminarlo del catálogo)
+
+        Postcondiciones:
+        - Solo se recorren las cargas de ese producto, no todo el stock; las de otros productos
+          con el mismo nombre (otra capacidad) no se tocan
+        - Se guardan como un solo cambio del stock; retorna True si quedó guardado (o no había cargas)
+        """
+
+        with self.backend.bloqueo:
+
+            registros = [{"op": "eliminar_carga", "id": carga.id} for carga in self.cargas_de_producto(id_producto)]
+
+            return not registros or self._registrar({"op": "varios", "registros": registros})
+
+    def eliminar_carga(self, carga: Carga) -> bool:
+        """
+        Quita una carga del stock (si otra caja ya la quitó, no hace nada)
+        """
+
+        with self.backend.bloqueo:
+
+            if self.carga_por_id(carga.id) is None:
+                return True
+
+            return self._registrar({"op": "eliminar_carga", "id": carga.id})
+
+    def fijar_umbral(self, id_producto: int, valor: int) -> bool:
+        """
+        Guarda el umbral mínimo de stock de un producto
+        """
+
+        with self.backend.bloqueo:
+
+            return self._registrar({"op": "fijar_umbral", "id_producto": id_producto, "valor": valor})
+
+    def fijar_umbrales(self, umbrales: dict[int, int]) -> bool:
+        """
+        Guarda los umbrales de varios productos a la vez ({id de producto: umbral}), por ejemplo
+        los de toda una categoría
+
+        Postcondiciones:
+        - Se guardan como un solo cambio del stock (una línea del diario o una transacción)
+        - Retorna True si quedaron guardados (o no había umbrales)
+        """
+
+        with self.backend.bloqueo:
+
+            registros = [{"op": "fijar_umbral", "id_producto": id_producto, "valor": valor}
+                         for id_producto, valor in umbrales.items()]
+
+            return not registros or self._registrar({"op": "varios", "registros": registros})
+
+    def eliminar_umbral(self, id_producto: int) -> bool:
+        """
+        Quita el umbral mínimo de stock de un producto
+        """
+
+        with self.backend.bloqueo:
+
+            return self._registrar({"op": "eliminar_umbral", "id_producto": id_producto})
+
+    def compactar_stock(self) -> bool:
+        """
+        Vuelca el stock a stock_data.json y vacía el diario
+
+        Postcondiciones:
+        - Con el bloqueo tomado se releen los cambios de otras cajas antes de escribir
+        - Se sobrescribe stock_data.json con todos los cambios y se actualizan las firmas
+        - Retorna True si se guardó correctamente y False en caso de error
+        """
+
+        with self.backend.bloqueo:
+
+            guardado = self.backend.compactar(self.datos_stock())
+            self._firmas["stock"] = self.backend.firma("stock")
+
+        return guardado
+
+    def ventas(self) -> list[Venta]:
+        """
+        Devuelve todas las ventas registradas (no se guardan en memoria)
+        """
+
+        return self.backend.cargar_ventas()
+
+    def resumen_ventas(self) -> dict:
+        """
+        Calcula los totales de ventas por día, semana, mes, categoría, producto y método de pago
+
+        Postcondiciones:
+        - Recorre las ventas una sola vez sin cargarlas en memoria (ver reportes.resumir_ventas)
+        """
+
+        return resumir_ventas(self.backend.agregados_ventas())
+
+    def pagina_ventas(self, numero: int, tamano: int, desde: str | None = None,
+                      hasta: str | None = None) -> tuple[list[Venta], int]:
+        """
+        Devuelve una página de ventas, las más recientes primero, y el total de ventas del filtro
+
+        Precondiciones:
+        - `numero` es la página empezando en 0
+        - `desde` y `hasta` son fechas AAAA-MM-DD (inclusive) o None para no filtrar
+
+        Postcondiciones:
+        - Solo se leen las ventas de la página pedida
+        """
+
+        return self.backend.pagina_ventas(numero, tamano, desde, hasta)
+
+    def acumulado_del_dia(self, dia: str) -> dict | None:
+        """
+        Devuelve los totales ya acumulados de un día, sin recorrer las ventas
+
+        Precondiciones:
+        - `dia` es una fecha AAAA-MM-DD
+
+        Postcondiciones:
+        - Retorna {"total": [ventas, unidades, ingresos], "categoria": {...}, "metodo_pago": {...}}
+          o None si ese día no hubo ventas
+        """
+
+        return self.backend.acumulado_del_dia(dia)
+
+    def reconstruir_acumulado(self) -> None:
+        """
+        Vuelve a calcular desde cero los acumulados por día a partir de todas las ventas
+        """
+
+        with self.backend.bloqueo:
+
+            self.backend.reconstruir_acumulado()
+
+    def registrar_ticket(self, lineas: list[tuple[int, int, Venta]]) -> int | None:
+        """
+        Registra un ticket con una o más ventas: descuenta el stock de todas y guarda todas las ventas juntas
+
+        Precondiciones:
+        - Cada línea es (id_producto, cantidad, venta); el almacén completa id_venta, id_ticket y cargas
+        - Un mismo producto puede aparecer en varias líneas
+
+        Postcondiciones:
+        - Con el bloqueo tomado se relee el stock y las unidades de cada línea se reparten entre
+          las cargas del producto en orden FIFO (de la carga más vieja a la más nueva)
+        - Cada venta registra en "cargas" de qué cargas salió ("id:unidades;id:unidades")
+        - Todos los descuentos se guardan como un solo cambio del stock y todas las ventas en una
+          sola escritura, con IDs de venta seguidos y el mismo id_ticket: se guarda todo o nada
+        - Las ventas también se suman a los acumulados de su día (ver acumulado_del_dia)
+        - Retorna el id_ticket, o None si no se pudo guardar (el backend muestra el error)
+        - Si algún producto no tiene stock suficiente lanza StockInsuficiente, sin guardar nada
+        """
+
+        with self.backend.bloqueo:
+
+            tomadas = {}
+            asignaciones = []
+
+            for id_producto, cantidad, _ in lineas:
+
+                producto = self.producto_por_id(id_producto)
+                asignacion = self._asignar_fifo(producto, cantidad, tomadas) if producto is not None else None
+
+                if asignacion is None:
+                    raise StockInsuficiente(id_producto)
+
+                asignaciones.append(asignacion)
+
+            descuentos = [{"op": "modificar_carga", "id": id_carga,
+                           "campos": {"cantidad": self._cargas[id_carga].cantidad - unidades}}
+                          for id_carga, unidades in tomadas.items()]
+
+            id_ticket = self.backend.siguiente_id("ticket", self.backend.ultimo_id_venta)
+            primer_id = self.backend.siguiente_id("venta", self.backend.ultimo_id_venta, len(lineas))
+
+            ventas = [venta for _, _, venta in lineas]
+
+            for numero, (venta, asignacion) in enumerate(zip(ventas, asignaciones)):
+                venta.id_venta = primer_id + numero
+                venta.id_ticket = id_ticket
+                venta.cargas = ";".join(f"{id_carga}:{unidades}" for id_carga, unidades in asignacion)
+
+            if not self._registrar({"op": "varios", "registros": descuentos}, ventas):
+                return None
+
+        return id_ticket
+
+    def cerrar(self) -> None:
+        """
+        Cierra la sesión: compacta los cambios pendientes del stock y libera el almacenamiento
+        """
+
+        with self.backend.bloqueo:
+
+            self.backend.cerrar(self.datos_stock())
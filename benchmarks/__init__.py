@@ -0,0 +1 @@
+# Benchmarks del sistema de stock (ver ejecutar.py)
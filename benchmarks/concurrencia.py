@@ -0,0 +1,204 @@
+# Prueba de concurrencia: varias cajas (procesos) venden y agregan cargas a la vez sobre los mismos datos
+#
+# Uso (desde la carpeta del proyecto):
+#   python -m benchmarks.concurrencia
+#   python -m benchmarks.concurrencia --backend sqlite --procesos 16 --tickets 100
+#
+# Termina con codigo 1 si alguna comprobacion falla (o si una caja termina con un error) y con 0 si no
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from datetime import datetime
+import persistencia
+from almacen import Almacen, StockInsuficiente, crear_backend
+from registros import Carga, Venta
+from benchmarks.ejecutar import SalidaContada
+from benchmarks.generador import generar
+
+# Producto que venden todas las cajas (id 1 siempre tiene cargas, ver generador.generar_cargas)
+PRODUCTO_VENDIDO = 1
+
+# Producto al que las cajas le agregan cargas de una unidad
+PRODUCTO_CARGADO = 2
+
+# Cada caja agrega una carga cada CADA_CARGA tickets
+CADA_CARGA = 10
+
+# Limite del diario mas chico que el del programa, asi las cajas tambien compactan a la vez
+LIMITE_DIARIO = 2000
+
+
+def caja(directorio: str, numero: int, tickets: int) -> tuple[int, int, int]:
+    """
+    Una caja: registra `tickets` tickets de dos unidades del producto vendido (una por línea)
+    y cada CADA_CARGA tickets agrega una carga de una unidad
+
+    Postcondiciones:
+    - Retorna (unidades vendidas, cargas agregadas, tickets rechazados por falta de stock)
+      según lo que informó el almacén
+    """
+
+    os.chdir(directorio)
+    persistencia.LIMITE_DIARIO = LIMITE_DIARIO
+
+    almacen = Almacen(crear_backend())
+    vendido = almacen.producto_por_id(PRODUCTO_VENDIDO)
+    cargado = almacen.producto_por_id(PRODUCTO_CARGADO)
+    vendidas = agregadas = rechazados = 0
+
+    for numero_ticket in range(tickets):
+
+        fecha = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        lineas = [(vendido.id, 1, Venta(0, fecha, vendido.id, vendido.nombre, vendido.categoria, 1,
+                                        vendido.precio, vendido.precio, "Efectivo", 0, ""))
+                  for _ in range(2)]
+
+        try:
+
+            if almacen.registrar_ticket(lineas) is not None:
+                vendidas += 2
+
+        except StockInsuficiente:
+
+            rechazados += 1
+
+        if numero_ticket % CADA_CARGA == 0:
+
+            carga = Carga(0, cargado.id, cargado.nombre, cargado.capacidad, 1, f"Caja {numero}")
+
+            if almacen.agregar_carga(carga):
+                agregadas += 1
+
+    almacen.cerrar()
+
+    return vendidas, agregadas, rechazados
+
+
+def unidades(almacen: Almacen, id_producto: int) -> int:
+
+    return sum(carga.cantidad for carga in almacen.cargas_de_producto(id_producto))
+
+
+def probar(backend: str, procesos: int, tickets: int) -> list[str]:
+    """
+    Genera datos en un directorio temporal, corre las cajas en paralelo y verifica el resultado
+
+    Postcondiciones:
+    - El producto vendido tiene unidades para la mitad de lo que piden las cajas,
+      así también hay tickets rechazados por falta de stock
+    - Retorna la lista de fallas (vacía si todo coincide)
+    """
+
+    anterior = os.getcwd()
+
+    with tempfile.TemporaryDirectory(prefix=f"concurrencia-{backend}-") as directorio:
+
+        generar(directorio, 20, 20, 0)
+        os.chdir(directorio)
+
+        try:
+
+            if backend == "sqlite":
+
+                from persistencia_sqlite import migrar_desde_archivos
+
+                with redirect_stdout(SalidaContada()):
+                    migrar_desde_archivos()
+
+            almacen = Almacen(crear_backend())
+            producto = almacen.producto_por_id(PRODUCTO_VENDIDO)
+            almacen.agregar_carga(Carga(0, producto.id, producto.nombre, producto.capacidad,
+                                        procesos * tickets, producto.categoria))
+
+            inicial = unidades(almacen, PRODUCTO_VENDIDO)
+            cargas_iniciales = len(almacen.stock())
+            almacen.cerrar()
+
+            with multiprocessing.Pool(procesos) as pool:
+                resultados = pool.starmap(caja, [(directorio, numero, tickets) for numero in range(procesos)])
+
+            vendidas, agregadas, rechazados = map(sum, zip(*resultados))
+
+            almacen = Almacen(crear_backend())
+            ventas = almacen.ventas()
+            ids_ventas = [venta.id_venta for venta in ventas]
+            ids_tickets = {venta.id_ticket for venta in ventas}
+            ids_cargas = [carga.id for carga in almacen.stock()]
+            final = unidades(almacen, PRODUCTO_VENDIDO)
+            almacen.cerrar()
+
+        finally:
+
+            os.chdir(anterior)
+
+    print(f"{backend}: {procesos} cajas, {vendidas} unidades vendidas, {rechazados} tickets sin stock, "
+          f"{agregadas} cargas agregadas")
+
+    comprobaciones = [
+        (final == inicial - vendidas, f"stock final {final}, esperado {inicial - vendidas}"),
+        (vendidas // 2 + rechazados == procesos * tickets,
+         f"{vendidas // 2} tickets guardados y {rechazados} rechazados por stock, de {procesos * tickets}"),
+        (rechazados > 0, "ningún ticket se rechazó por falta de stock"),
+        (len(ids_ventas) == vendidas, f"{len(ids_ventas)} ventas guardadas, esperadas {vendidas}"),
+        (len(set(ids_ventas)) == len(ids_ventas), "hay IDs de venta repetidos"),
+        (len(ids_tickets) == vendidas // 2, f"{len(ids_tickets)} tickets, esperados {vendidas // 2}"),
+        (len(ids_cargas) == cargas_iniciales + agregadas,
+         f"{len(ids_cargas)} cargas, esperadas {cargas_iniciales + agregadas}"),
+        (len(set(ids_cargas)) == len(ids_cargas), "hay IDs de carga repetidos"),
+    ]
+
+    return [f"{backend}: {mensaje}" for correcto, mensaje in comprobaciones if not correcto]
+
+
+def main(argv: list[str]) -> int:
+    """
+    Corre la prueba con cada backend pedido
+
+    Postcondiciones:
+    - Muestra las fallas encontradas y retorna 1 si hubo alguna, 0 si no
+    - Un error dentro de una caja o de la verificación cuenta como falla de ese backend
+      y se sigue con el siguiente
+    """
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.concurrencia",
+                                     description="Verifica ventas y cargas de varias cajas a la vez")
+    parser.add_argument("--backend", nargs="+", choices=("archivos", "sqlite"), default=["archivos", "sqlite"])
+    parser.add_argument("--procesos", type=int, default=8, help="cajas que trabajan a la vez")
+    parser.add_argument("--tickets", type=int, default=40, help="tickets que registra cada caja")
+    argumentos = parser.parse_args(argv)
+
+    # Con una sola caja no hay nada concurrente que verificar
+    if argumentos.procesos < 2:
+        parser.error("--procesos debe ser al menos 2")
+
+    fallas = []
+
+    for backend in argumentos.backend:
+
+        # El backend se elige como en el programa (ver almacen.crear_backend); las cajas lo heredan
+        os.environ["STOCK_BACKEND"] = backend
+        os.environ["STOCK_DB"] = "stock.db"
+
+        try:
+
+            fallas += probar(backend, argumentos.procesos, argumentos.tickets)
+
+        except Exception as e:
+
+            fallas.append(f"{backend}: {type(e).__name__}: {e}")
+
+    for falla in fallas:
+        print(f"FALLA {falla}")
+
+    if not fallas:
+        print("Sin fallas")
+
+    return 1 if fallas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,333 @@
+# Benchmarks de las operaciones del programa sobre datos generados: tiempo, memoria y bytes leidos/escritos
+#
+# Uso (desde la carpeta del proyecto):
+#   python -m benchmarks.ejecutar --tamanos 1k 100k
+#   python -m benchmarks.ejecutar --backend sqlite --comparar benchmarks/resultados/anterior.json
+
+import argparse
+import builtins
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+import historial
+import reportes
+from almacen import Almacen, crear_backend
+from metricas import contadores_io
+from funciones_crud import buscar_producto, exportar_stock_csv, mostrar_stock_bajo, registrar_venta, reporte_ventas
+from tablas import escribir_tabla
+from benchmarks.generador import SEMILLA, generar
+
+# Filas de cada archivo generado (productos, cargas y ventas) para cada tamaño
+TAMANOS = {"1k": 1_000, "100k": 100_000, "1M": 1_000_000}
+
+DIRECTORIO_RESULTADOS = os.path.join(os.path.dirname(__file__), "resultados")
+
+# Busqueda: por nombre, otro filtro por categoria (Pintura) sobre esos resultados y volver al menu
+GUION_BUSCAR = ["2", "latex interior", "1", "5", "1", "2", "1"]
+
+
+class SalidaContada(io.TextIOBase):
+    """
+    Reemplazo de sys.stdout que descarta lo que se escribe y cuenta los caracteres
+
+    Postcondiciones:
+    - Lo que muestran las pantallas no llega a la terminal ni se cuenta como bytes escritos
+      del proceso, pero el costo de armarlo (tablas, formatos) sí se mide
+    - No es una terminal: pantalla.limpiar() no escribe nada
+    """
+
+    def __init__(self) -> None:
+
+        super().__init__()
+        self.caracteres = 0
+
+    def write(self, texto: str) -> int:
+
+        self.caracteres += len(texto)
+
+        return len(texto)
+
+
+@contextmanager
+def entradas_guionadas(guion: list[str]):
+    """
+    Reemplaza input() por uno que responde con las entradas de `guion`, en orden
+
+    Postcondiciones:
+    - Si la operación pide más entradas que las del guion, o deja entradas sin usar, se lanza
+      RuntimeError: el guion ya no coincide con las pantallas y la medición no sería comparable
+    """
+
+    pendientes = list(reversed(guion))
+    original = builtins.input
+
+    def responder(mensaje: str = "") -> str:
+
+        if not pendientes:
+            raise RuntimeError(f"el guion se terminó y la operación pidió: {mensaje.strip()!r}")
+
+        return pendientes.pop()
+
+    builtins.input = responder
+
+    try:
+
+        yield
+
+    finally:
+
+        builtins.input = original
+
+    if pendientes:
+        raise RuntimeError(f"quedaron {len(pendientes)} entradas del guion sin usar")
+
+
+def _ejecutar(operacion, guion: list[str], salida: SalidaContada) -> None:
+
+    with entradas_guionadas(guion), redirect_stdout(salida):
+        operacion()
+
+
+def medir(operacion, guion: list[str] | None = None) -> dict:
+    """
+    Ejecuta una operación dos veces y devuelve sus mediciones
+
+    Precondiciones:
+    - `operacion` es una función sin parámetros; si pide datos por teclado, `guion` tiene las respuestas
+
+    Postcondiciones:
+    - La primera ejecución mide el tiempo, los bytes leídos y escritos y los caracteres mostrados
+    - La segunda mide el pico de memoria con tracemalloc, que hace todo más lento: por eso
+      no se mide en la misma ejecución que el tiempo
+    """
+
+    guion = guion or []
+    salida = SalidaContada()
+
+    antes = contadores_io()
+    inicio = time.perf_counter()
+
+    _ejecutar(operacion, guion, salida)
+
+    tiempo = time.perf_counter() - inicio
+    despues = contadores_io()
+
+    tracemalloc.start()
+
+    try:
+
+        _ejecutar(operacion, guion, SalidaContada())
+        _, pico = tracemalloc.get_traced_memory()
+
+    finally:
+
+        tracemalloc.stop()
+
+    return {"tiempo_s": round(tiempo, 6),
+            "memoria_pico_bytes": pico,
+            "bytes_leidos": despues[0] - antes[0] if antes else None,
+            "bytes_escritos": despues[1] - antes[1] if antes else None,
+            "caracteres_mostrados": salida.caracteres}
+
+
+def guion_venta(con_stock: list[int]) -> list[str]:
+    """
+    Entradas de registrar_venta para un ticket de una unidad de cada uno de los primeros
+    productos con stock, pagado en efectivo, y volver al menú
+    """
+
+    guion = []
+
+    for id_producto in dict.fromkeys(con_stock[:3]):
+        guion += [str(id_producto), "1"]
+
+    return guion + ["", "Efectivo", "1"]
+
+
+def operaciones(almacen: Almacen, resumen: dict) -> list[tuple]:
+    """
+    Devuelve las operaciones a medir, en orden: (nombre, función, guion de entradas)
+
+    Postcondiciones:
+    - Las lecturas se hacen con el backend, sin el caché del almacén
+    - Las acciones del menú se ejecutan igual que desde main(), con las respuestas del guion
+    """
+
+    backend = almacen.backend
+
+    def abrir_almacen():
+        nuevo = Almacen(backend)
+        nuevo.productos()
+        nuevo.datos_stock()
+
+    return [
+        ("cargar_productos", backend.cargar_productos, None),
+        ("cargar_stock", backend.cargar_stock, None),
+        ("cargar_ventas", backend.cargar_ventas, None),
+        ("abrir_almacen", abrir_almacen, None),
+        ("buscar_producto", lambda: buscar_producto(almacen), GUION_BUSCAR),
+        ("reconstruir_acumulado", backend.reconstruir_acumulado, None),
+        ("registrar_venta", lambda: registrar_venta(almacen), guion_venta(resumen["con_stock"])),
+        ("mostrar_stock_bajo", lambda: mostrar_stock_bajo(almacen), ["1"]),
+        ("exportar_stock_csv", lambda: exportar_stock_csv(almacen), ["1"]),
+        ("reporte_ventas", lambda: reporte_ventas(almacen), ["0"]),
+    ]
+
+
+def ejecutar_tamano(nombre: str, filas: int, backend: str, semilla: int) -> dict:
+    """
+    Genera los datos de un tamaño en un directorio temporal y mide todas las operaciones ahí
+
+    Postcondiciones:
+    - Se trabaja dentro del directorio temporal (los archivos del proyecto no se tocan)
+      y el historial de acciones se escribe ahí mismo; al terminar se borra todo
+    - Con backend "sqlite" los archivos generados se migran primero a una base
+    """
+
+    anterior = os.getcwd()
+    escritor_anterior = historial.escritor
+
+    with tempfile.TemporaryDirectory(prefix=f"benchmark-{nombre}-") as directorio:
+
+        inicio = time.perf_counter()
+        resumen = generar(directorio, filas, filas, filas, semilla)
+        preparacion = {"generar_s": round(time.perf_counter() - inicio, 6)}
+
+        os.chdir(directorio)
+        historial.escritor = historial.EscritorHistorial(os.path.join(directorio, "historial"))
+
+        try:
+
+            if backend == "sqlite":
+
+                from persistencia_sqlite import migrar_desde_archivos
+
+                inicio = time.perf_counter()
+                with redirect_stdout(SalidaContada()):
+                    migrar_desde_archivos()
+                preparacion["migrar_s"] = round(time.perf_counter() - inicio, 6)
+
+            # Las acciones del menu se miden con el catalogo y el stock ya en memoria, como en una sesion
+            almacen = Almacen(crear_backend())
+            almacen.productos()
+            almacen.datos_stock()
+            resultados = {}
+
+            try:
+
+                for operacion, funcion, guion in operaciones(almacen, resumen):
+
+                    print(f"  {nombre}: {operacion}...", file=sys.stderr)
+                    resultados[operacion] = medir(funcion, guion)
+
+            finally:
+
+                almacen.cerrar()
+                historial.escritor.cerrar()
+
+        finally:
+
+            historial.escritor = escritor_anterior
+            os.chdir(anterior)
+
+    return {"tamano": nombre, "filas": filas, "preparacion": preparacion, "operaciones": resultados}
+
+
+def comparar(anterior: dict, actual: dict) -> None:
+    """
+    Muestra, por tamaño y operación, el tiempo y la memoria de `actual` relativos a `anterior`
+    (más de 1 es más lento o usa más memoria)
+    """
+
+    previos = {(resultado["tamano"], operacion): medicion
+               for resultado in anterior["resultados"]
+               for operacion, medicion in resultado["operaciones"].items()}
+
+    filas = []
+
+    for resultado in actual["resultados"]:
+        for operacion, medicion in resultado["operaciones"].items():
+
+            previo = previos.get((resultado["tamano"], operacion))
+
+            if previo is None:
+                continue
+
+            filas.append([resultado["tamano"], operacion, previo["tiempo_s"], medicion["tiempo_s"],
+                          f"{medicion['tiempo_s'] / previo['tiempo_s']:.2f}" if previo["tiempo_s"] else "-",
+                          f"{medicion['memoria_pico_bytes'] / previo['memoria_pico_bytes']:.2f}"
+                          if previo["memoria_pico_bytes"] else "-"])
+
+    escribir_tabla(filas, headers=["Tamaño", "Operación", "Antes (s)", "Ahora (s)", "Tiempo", "Memoria"])
+
+
+def crear_parser() -> argparse.ArgumentParser:
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.ejecutar",
+                                     description="Mide las operaciones del programa sobre datos generados")
+    parser.add_argument("--tamanos", nargs="+", choices=TAMANOS, default=list(TAMANOS),
+                        help="tamaños a medir (filas de productos, cargas y ventas)")
+    parser.add_argument("--backend", choices=("archivos", "sqlite"), default="archivos")
+    parser.add_argument("--semilla", type=int, default=SEMILLA, help="semilla de los datos generados")
+    parser.add_argument("--salida", help="archivo JSON de resultados (por defecto en benchmarks/resultados)")
+    parser.add_argument("--comparar", metavar="JSON", help="resultados anteriores para comparar")
+
+    return parser
+
+
+def main(argv: list[str]) -> int:
+    """
+    Mide los tamaños pedidos, guarda los resultados en JSON y opcionalmente los compara con otros
+
+    Postcondiciones:
+    - El JSON incluye la fecha, la versión de Python, el backend, si se usó NumPy y la semilla,
+      así dos corridas solo se comparan si son equivalentes
+    """
+
+    argumentos = crear_parser().parse_args(argv)
+
+    # El backend se elige como en el programa (ver almacen.crear_backend)
+    os.environ["STOCK_BACKEND"] = argumentos.backend
+    os.environ["STOCK_DB"] = "stock.db"
+
+    actual = {"fecha": datetime.now().isoformat(timespec="seconds"),
+              "python": platform.python_version(),
+              "backend": argumentos.backend,
+              "numpy": reportes.np is not None,
+              "semilla": argumentos.semilla,
+              "resultados": [ejecutar_tamano(nombre, TAMANOS[nombre], argumentos.backend, argumentos.semilla)
+                             for nombre in argumentos.tamanos]}
+
+    salida = argumentos.salida
+    if salida is None:
+        os.makedirs(DIRECTORIO_RESULTADOS, exist_ok=True)
+        salida = os.path.join(DIRECTORIO_RESULTADOS, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+
+    with open(salida, "w", encoding="utf-8") as archivo:
+        json.dump(actual, archivo, ensure_ascii=False, indent=4)
+
+    print(f"Resultados guardados en {salida}")
+
+    escribir_tabla([[resultado["tamano"], operacion, medicion["tiempo_s"], medicion["memoria_pico_bytes"],
+                     medicion["bytes_leidos"], medicion["bytes_escritos"]]
+                    for resultado in actual["resultados"]
+                    for operacion, medicion in resultado["operaciones"].items()],
+                   headers=["Tamaño", "Operación", "Tiempo (s)", "Memoria pico", "Leídos", "Escritos"])
+
+    if argumentos.comparar:
+
+        with open(argumentos.comparar, "r", encoding="utf-8") as archivo:
+            comparar(json.load(archivo), actual)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,197 @@
+# Generador determinista de datos de prueba: catalogo, cargas del stock, umbrales e historial de ventas
+
+import os
+import random
+from datetime import datetime, timedelta
+import persistencia
+from registros import Carga, Producto, Venta
+
+# Tipos de producto: (nombre, categoria, capacidades posibles)
+TIPOS_PRODUCTO = (
+    ("Látex Interior", "Pintura", ("1L", "4L", "10L", "20L")),
+    ("Látex Exterior", "Pintura", ("1L", "4L", "10L", "20L")),
+    ("Esmalte Sintético Brillante", "Pintura", ("1L", "4L")),
+    ("Esmalte Sintético Satinado", "Pintura", ("1L", "4L")),
+    ("Barniz Marino", "Protector", ("1L", "4L")),
+    ("Protector de Madera", "Protector", ("1L", "4L", "10L")),
+    ("Convertidor de Óxido", "Preparación", ("1L", "4L")),
+    ("Enduido Plástico Interior", "Preparación", ("1kg", "5kg", "10kg")),
+    ("Fijador Sellador", "Preparación", ("1L", "4L", "10L")),
+    ("Antihumedad", "Preparación", ("1L", "4L")),
+    ("Impermeabilizante para Techos", "Impermeabilizante", ("5kg", "10L", "20L")),
+    ("Membrana Líquida", "Impermeabilizante", ("5kg", "10kg", "20kg")),
+)
+
+# Lineas (marcas) que se combinan con cada tipo para armar los nombres
+LINEAS = ("Premium", "Clásico", "Profesional", "Económico", "Plus", "Max", "Eco", "Ultra", "Rápido", "Mate",
+          "Satinado", "Extra", "Obra", "Hogar", "Duo", "Flex", "Forte", "Total", "Color", "Térmico")
+
+METODOS_PAGO = ("Efectivo", "Tarjeta", "Transferencia", "No especificado")
+
+# Las ventas se reparten entre esta fecha y DIAS_VENTAS dias despues
+INICIO_VENTAS = datetime(2024, 1, 1, 9, 0, 0)
+DIAS_VENTAS = 730
+
+SEMILLA = 2025
+
+# Ventas que se arman en memoria antes de escribirlas en ventas.csv
+LOTE_VENTAS = 50_000
+
+
+def _combinaciones() -> list[tuple[str, str, str]]:
+    """
+    Devuelve todas las combinaciones (nombre, categoria, capacidad) de tipo, línea y capacidad
+    """
+
+    return [(f"{tipo} {linea}", categoria, capacidad)
+            for tipo, categoria, capacidades in TIPOS_PRODUCTO
+            for linea in LINEAS
+            for capacidad in capacidades]
+
+
+def generar_productos(cantidad: int, azar: random.Random) -> list[Producto]:
+    """
+    Genera `cantidad` productos con ids 1..cantidad
+
+    Postcondiciones:
+    - Cada (nombre, capacidad) es único: cuando se acaban las combinaciones de tipo, línea
+      y capacidad, el nombre lleva un número de serie ("Látex Interior Premium 2")
+    - Los precios están en centavos, en pesos enteros o con 50 centavos
+    """
+
+    combinaciones = _combinaciones()
+    productos = []
+
+    for indice in range(cantidad):
+
+        serie, posicion = divmod(indice, len(combinaciones))
+        nombre, categoria, capacidad = combinaciones[posicion]
+
+        if serie:
+            nombre = f"{nombre} {serie + 1}"
+
+        productos.append(Producto(indice + 1, nombre, capacidad, categoria, azar.randrange(150_000, 9_000_000, 50)))
+
+    return productos
+
+
+def generar_cargas(cantidad: int, productos: list[Producto], azar: random.Random) -> list[Carga]:
+    """
+    Genera `cantidad` cargas con ids 1..cantidad de productos elegidos al azar
+
+    Postcondiciones:
+    - Las primeras cargas (hasta 10) son de los primeros productos, una cada uno, así siempre hay
+      productos conocidos con unidades para vender
+    - Algunas cargas quedan sin unidades, como las que ya se vendieron
+    """
+
+    cargas = []
+    conocidos = min(10, len(productos))
+
+    for indice in range(cantidad):
+
+        producto = productos[indice] if indice < conocidos else azar.choice(productos)
+        unidades = azar.randint(20, 60) if indice < conocidos else azar.choice((0, azar.randint(1, 60)))
+
+        cargas.append(Carga(indice + 1, producto.id, producto.nombre, producto.capacidad, unidades, producto.categoria))
+
+    return cargas
+
+
+def generar_umbrales(cargas: list[Carga], azar: random.Random) -> dict[int, int]:
+    """
+    Genera umbrales mínimos para la mitad de los productos que tienen cargas ({id_producto: umbral})
+    """
+
+    return {id_producto: azar.randint(2, 15)
+            for id_producto in sorted({carga.id_producto for carga in cargas})
+            if azar.random() < 0.5}
+
+
+def generar_ventas(cantidad: int, productos: list[Producto], cargas: list[Carga], azar: random.Random):
+    """
+    Genera `cantidad` ventas en orden de fecha, agrupadas en tickets de 1 a 3 productos
+
+    Postcondiciones:
+    - Es un generador de Venta (no arma todo el historial en memoria)
+    - Las ventas se reparten en DIAS_VENTAS días a partir de INICIO_VENTAS
+    - Cada venta indica de qué carga de su producto salió, si el producto tiene cargas
+    """
+
+    carga_de = {}
+    for carga in cargas:
+        carga_de.setdefault(carga.id_producto, carga.id)
+
+    paso = DIAS_VENTAS * 86400 / max(cantidad, 1)
+    id_ticket = 0
+    restantes = 0
+
+    for indice in range(cantidad):
+
+        if restantes == 0:
+            id_ticket += 1
+            restantes = azar.randint(1, 3)
+            metodo = azar.choice(METODOS_PAGO)
+            fecha = (INICIO_VENTAS + timedelta(seconds=int(indice * paso))).strftime("%Y-%m-%d %H:%M:%S")
+
+        restantes -= 1
+
+        producto = azar.choice(productos)
+        unidades = azar.randint(1, 5)
+        carga = carga_de.get(producto.id)
+
+        yield Venta(indice + 1, fecha, producto.id, producto.nombre, producto.categoria, unidades,
+                    producto.precio, producto.precio * unidades, metodo, id_ticket,
+                    f"{carga}:{unidades}" if carga is not None else "")
+
+
+def generar(directorio: str, productos: int, cargas: int, ventas: int, semilla: int = SEMILLA) -> dict:
+    """
+    Escribe un juego de datos completo en `directorio`, con los mismos formatos que usa el programa
+
+    Precondiciones:
+    - `directorio` existe; sus productos.csv, stock_data.json y ventas.csv se sobrescriben
+    - `productos` es mayor que cero
+
+    Postcondiciones:
+    - La misma semilla y los mismos tamaños generan siempre los mismos archivos
+    - productos.csv y stock_data.json se escriben con las funciones de persistencia
+    - Retorna un resumen: cantidades generadas y los ids de productos con unidades, para
+      armar ventas en los benchmarks
+    """
+
+    azar = random.Random(semilla)
+    anterior = os.getcwd()
+
+    lista_productos = generar_productos(productos, azar)
+    lista_cargas = generar_cargas(cargas, lista_productos, azar)
+    umbrales = generar_umbrales(lista_cargas, azar)
+
+    os.chdir(directorio)
+
+    try:
+
+        persistencia.guardar_productos(lista_productos)
+        persistencia.guardar_stock({"stock": lista_cargas, "umbrales": umbrales, "version": 0})
+
+        with open(persistencia.ARCHIVO_VENTAS, "w", encoding="utf-8") as archivo:
+
+            archivo.write(persistencia.ENCABEZADO_VENTAS + "\n")
+            lote = []
+
+            for venta in generar_ventas(ventas, lista_productos, lista_cargas, azar):
+
+                lote.append(venta.a_csv() + "\n")
+
+                if len(lote) == LOTE_VENTAS:
+                    archivo.write("".join(lote))
+                    lote.clear()
+
+            archivo.write("".join(lote))
+
+    finally:
+
+        os.chdir(anterior)
+
+    return {"productos": productos, "cargas": cargas, "umbrales": len(umbrales), "ventas": ventas,
+            "con_stock": [carga.id_producto for carga in lista_cargas[:min(10, productos)]]}
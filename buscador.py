@@ -0,0 +1,361 @@
+# Indice invertido del catalogo para buscar productos sin recorrer productos.csv
+
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right, insort
+from operator import itemgetter
+from registros import Producto
+
+
+# Campos del producto con lista de IDs por valor exacto
+CAMPOS_INDICE = ("categoria", "capacidad")
+
+# Puntaje de cada palabra buscada segun como coincide (menor es mejor); a los errores
+# de tipeo se les suma la distancia de edicion
+PUNTAJE_EXACTO = 0
+PUNTAJE_PREFIJO = 1
+PUNTAJE_APROXIMADO = 2
+
+# Largo minimo de una palabra buscada para aceptar errores de tipeo
+LARGO_MINIMO_APROXIMADO = 4
+
+
+def normalizar(texto: str) -> str:
+    """
+    Pasa un texto a minúsculas y sin acentos ("Látex" -> "latex")
+    """
+
+    descompuesto = unicodedata.normalize("NFKD", texto)
+
+    return "".join(letra for letra in descompuesto if not unicodedata.combining(letra)).casefold()
+
+
+def tokens_nombre(nombre: str) -> set[str]:
+    """
+    Devuelve las palabras de un nombre normalizadas ("Látex Interior" -> {"latex", "interior"})
+    """
+
+    return set(re.findall(r"\w+", normalizar(nombre)))
+
+
+def trigramas(palabra: str) -> set[str]:
+    """
+    Devuelve los grupos de tres letras de una palabra, marcando el inicio y el fin ("^la", "lat", ..., "ex$")
+    """
+
+    marcada = f"^{palabra}$"
+
+    return {marcada[i:i + 3] for i in range(len(marcada) - 2)}
+
+
+def distancia_edicion(a: str, b: str, limite: int) -> int:
+    """
+    Calcula la distancia de Levenshtein entre dos palabras
+
+    Postcondiciones:
+    - Si la distancia supera `limite`, se corta apenas se sabe y se retorna limite + 1
+    """
+
+    if abs(len(a) - len(b)) > limite:
+        return limite + 1
+
+    anterior = list(range(len(b) + 1))
+
+    for i, letra_a in enumerate(a, 1):
+
+        actual = [i]
+
+        for j, letra_b in enumerate(b, 1):
+            actual.append(min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + (letra_a != letra_b)))
+
+        if min(actual) > limite:
+            return limite + 1
+
+        anterior = actual
+
+    return min(anterior[-1], limite + 1)
+
+
+class IndiceProductos:
+    """
+    Índice invertido del catálogo: para cada valor de un campo guarda el conjunto de IDs
+    de los productos que lo tienen (lista de apariciones), y un índice ordenado por precio.
+
+    Precondiciones:
+    - Cada producto se agrega con su id numérico (el mismo que usa Almacen.producto_por_id)
+
+    Postcondiciones:
+    - Cada búsqueda devuelve un conjunto de IDs sin recorrer el catálogo
+    - Los nombres se indexan por palabra sin acentos ni mayúsculas; cada palabra buscada
+      coincide exacta, como prefijo (bisección sobre las palabras ordenadas) o con errores
+      de tipeo (candidatas por trigramas compartidos y distancia de edición acotada)
+    - Los filtros se combinan intersecando conjuntos, así agregar un filtro solo achica
+      los resultados que ya se tienen
+    - Los rangos de precio se buscan por bisección sobre la lista ordenada
+    """
+
+    def __init__(self) -> None:
+
+        self._campos = {campo: {} for campo in CAMPOS_INDICE}
+        self._palabras = {}
+        self._precios = []
+
+        # Palabras de los nombres ordenadas (para prefijos) y trigrama -> palabras (para errores de tipeo)
+        self._ordenadas = []
+        self._trigramas = {}
+
+    @classmethod
+    def construir(cls, productos) -> "IndiceProductos":
+        """
+        Arma el índice de todo un catálogo de una vez
+
+        Precondiciones:
+        - `productos` no repite ids
+
+        Postcondiciones:
+        - Es igual a agregar los productos uno por uno, pero las listas de precios y de palabras
+          se ordenan una sola vez al final (insertar ordenado cada uno es cuadrático)
+        """
+
+        indice = cls()
+
+        for producto in productos:
+
+            for apariciones, clave in indice._apariciones(producto):
+                apariciones.setdefault(clave, set()).add(producto.id)
+
+            indice._precios.append((producto.precio, producto.id))
+
+        indice._precios.sort()
+        indice._ordenadas = sorted(indice._palabras)
+
+        for palabra in indice._ordenadas:
+            for trigrama in trigramas(palabra):
+                indice._trigramas.setdefault(trigrama, set()).add(palabra)
+
+        return indice
+
+    def _apariciones(self, producto: Producto):
+        """
+        Genera (índice, clave) para cada lista de apariciones donde va el producto
+        """
+
+        for campo in CAMPOS_INDICE:
+            yield self._campos[campo], getattr(producto, campo)
+
+        for palabra in tokens_nombre(producto.nombre):
+            yield self._palabras, palabra
+
+    def agregar(self, id_producto: int, producto: Producto) -> None:
+        """
+        Agrega un producto a todas las listas de apariciones y al índice de precios
+        (para un catálogo entero, ver construir)
+        """
+
+        for indice, clave in self._apariciones(producto):
+
+            if indice is self._palabras and clave not in indice:
+                self._agregar_palabra(clave)
+
+            indice.setdefault(clave, set()).add(id_producto)
+
+        insort(self._precios, (producto.precio, id_producto))
+
+    def quitar(self, id_producto: int, producto: Producto) -> None:
+        """
+        Quita un producto del índice
+
+        Precondiciones:
+        - `producto` tiene los mismos valores con los que se agregó
+        """
+
+        for indice, clave in self._apariciones(producto):
+
+            ids = indice.get(clave)
+
+            if ids is not None:
+
+                ids.discard(id_producto)
+
+                if not ids:
+
+                    del indice[clave]
+
+                    if indice is self._palabras:
+                        self._quitar_palabra(clave)
+
+        posicion = bisect_left(self._precios, (producto.precio, id_producto))
+
+        if posicion < len(self._precios) and self._precios[posicion] == (producto.precio, id_producto):
+            del self._precios[posicion]
+
+    def _agregar_palabra(self, palabra: str) -> None:
+        """
+        Agrega una palabra nueva de los nombres a la lista ordenada y al índice de trigramas
+        """
+
+        insort(self._ordenadas, palabra)
+
+        for trigrama in trigramas(palabra):
+            self._trigramas.setdefault(trigrama, set()).add(palabra)
+
+    def _quitar_palabra(self, palabra: str) -> None:
+        """
+        Quita una palabra que ya no aparece en ningún nombre
+        """
+
+        del self._ordenadas[bisect_left(self._ordenadas, palabra)]
+
+        for trigrama in trigramas(palabra):
+
+            palabras = self._trigramas[trigrama]
+            palabras.discard(palabra)
+
+            if not palabras:
+                del self._trigramas[trigrama]
+
+    def _con_prefijo(self, prefijo: str) -> list[str]:
+        """
+        Devuelve las palabras indexadas que empiezan con `prefijo`, por bisección
+        """
+
+        inicio = bisect_left(self._ordenadas, prefijo)
+        fin = bisect_left(self._ordenadas, prefijo + "\U0010ffff", lo=inicio)
+
+        return self._ordenadas[inicio:fin]
+
+    def _aproximadas(self, palabra: str) -> dict[str, int]:
+        """
+        Devuelve las palabras indexadas a distancia de edición acotada de `palabra` ({palabra: distancia})
+
+        Postcondiciones:
+        - Se acepta 1 error en palabras de hasta 5 letras y 2 en las más largas
+        - Solo se mide la distancia de las candidatas que comparten suficientes trigramas con `palabra`
+        """
+
+        if len(palabra) < LARGO_MINIMO_APROXIMADO:
+            return {}
+
+        limite = 1 if len(palabra) <= 5 else 2
+        propios = trigramas(palabra)
+
+        # Cada error cambia como mucho 3 trigramas
+        minimo = max(1, len(propios) - 3 * limite)
+
+        compartidos = {}
+        for trigrama in propios:
+            for candidata in self._trigramas.get(trigrama, ()):
+                compartidos[candidata] = compartidos.get(candidata, 0) + 1
+
+        aproximadas = {}
+        for candidata, cantidad in compartidos.items():
+
+            if cantidad < minimo:
+                continue
+
+            distancia = distancia_edicion(palabra, candidata, limite)
+
+            if distancia <= limite:
+                aproximadas[candidata] = distancia
+
+        return aproximadas
+
+    def _puntajes_palabra(self, palabra: str) -> dict[int, int]:
+        """
+        Devuelve el mejor puntaje de cada producto para una palabra buscada ({id: puntaje})
+        """
+
+        coincidencias = {candidata: PUNTAJE_APROXIMADO + distancia
+                         for candidata, distancia in self._aproximadas(palabra).items()}
+
+        for candidata in self._con_prefijo(palabra):
+            coincidencias[candidata] = PUNTAJE_EXACTO if candidata == palabra else PUNTAJE_PREFIJO
+
+        puntajes = {}
+        for candidata, puntaje in coincidencias.items():
+            for id_producto in self._palabras[candidata]:
+                if puntaje < puntajes.get(id_producto, puntaje + 1):
+                    puntajes[id_producto] = puntaje
+
+        return puntajes
+
+    def puntajes_nombre(self, texto: str) -> dict[int, int]:
+        """
+        Busca productos por nombre sin distinguir acentos ni mayúsculas ("latex", "esmalte sint", "latx")
+
+        Postcondiciones:
+        - Un producto coincide si cada palabra de `texto` coincide con alguna palabra de su nombre:
+          exacta, como prefijo o con errores de tipeo
+        - Retorna {id: puntaje}, donde un puntaje menor es una mejor coincidencia
+        """
+
+        palabras = tokens_nombre(texto)
+
+        if not palabras:
+            return {}
+
+        por_palabra = [self._puntajes_palabra(palabra) for palabra in palabras]
+
+        return {id_producto: sum(puntajes[id_producto] for puntajes in por_palabra)
+                for id_producto in intersecar([puntajes.keys() for puntajes in por_palabra])}
+
+    def buscar_nombre(self, texto: str, limite: int | None = None) -> list[int]:
+        """
+        Devuelve los IDs de los productos que coinciden con `texto` (ver puntajes_nombre),
+        de la mejor coincidencia a la peor; a igual puntaje, por id
+        """
+
+        puntajes = self.puntajes_nombre(texto)
+
+        return sorted(puntajes, key=lambda id_producto: (puntajes[id_producto], id_producto))[:limite]
+
+    def por_campo(self, campo: str, valor: str) -> set[int]:
+        """
+        Devuelve los IDs de los productos con ese valor exacto en el campo (categoria o capacidad)
+        """
+
+        return self._campos[campo].get(valor, set())
+
+    def valores(self, campo: str) -> list[str]:
+        """
+        Devuelve los valores distintos de un campo (categoria o capacidad) en el catálogo, ordenados
+        """
+
+        return sorted(self._campos[campo])
+
+    def por_nombre(self, texto: str) -> set[int]:
+        """
+        Devuelve los IDs de los productos que coinciden con `texto` (ver puntajes_nombre)
+        """
+
+        return set(self.puntajes_nombre(texto))
+
+    def por_precio(self, minimo: int | None = None, maximo: int | None = None) -> set[int]:
+        """
+        Devuelve los IDs de los productos con precio entre `minimo` y `maximo` (inclusive, en centavos).
+        Un límite en None no filtra.
+        """
+
+        inicio = 0 if minimo is None else bisect_left(self._precios, minimo, key=itemgetter(0))
+        fin = len(self._precios) if maximo is None else bisect_right(self._precios, maximo, key=itemgetter(0))
+
+        return {id_producto for _, id_producto in self._precios[inicio:fin]}
+
+
+def intersecar(conjuntos: list) -> set[int]:
+    """
+    Interseca conjuntos de IDs empezando por el más chico, así el costo depende del resultado
+    y no del tamaño del catálogo
+    """
+
+    conjuntos = sorted(conjuntos, key=len)
+    resultado = set(conjuntos[0])
+
+    for conjunto in conjuntos[1:]:
+
+        if not resultado:
+            break
+
+        resultado = {id_producto for id_producto in resultado if id_producto in conjunto}
+
+    return resultado
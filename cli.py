@@ -0,0 +1,343 @@
+# Interfaz de linea de comandos: las mismas operaciones del menu, sin preguntas ni pantallas
+
+import argparse
+import csv
+import json
+import os
+import sys
+import metricas
+from almacen import Almacen, StockInsuficiente
+from buscador import intersecar
+from dinero import centavos, pesos
+from registros import Carga, Registro
+from tablas import escribir_tabla
+from funciones_crud import ARCHIVO_EXPORTADO, METODOS_PAGO, exportar_stock, lineas_de_ticket, registrar_accion
+
+# Codigos de salida (argparse usa 2 para los errores de uso)
+EXITO = 0
+ERROR = 1
+
+FORMATOS = ("json", "csv", "tabla")
+
+
+def imprimir(filas: list[dict], formato: str) -> None:
+    """
+    Escribe filas (diccionarios o registros con los mismos campos) en la salida estándar
+
+    Postcondiciones:
+    - "json" escribe una lista JSON, "csv" un CSV con encabezado y "tabla" una tabla legible
+    - Los importes de los registros se escriben en pesos ("4000.50"), no en centavos
+    """
+
+    filas = [fila.para_mostrar() if isinstance(fila, Registro) else fila for fila in filas]
+
+    if formato == "json":
+        json.dump(filas, sys.stdout, ensure_ascii=False)
+        print()
+
+    elif formato == "csv":
+        if filas:
+            escritor = csv.DictWriter(sys.stdout, fieldnames=list(filas[0]), lineterminator="\n")
+            escritor.writeheader()
+            escritor.writerows(filas)
+
+    else:
+        escribir_tabla(filas, headers="keys", tablefmt="grid")
+
+
+def error(mensaje: str) -> int:
+    """
+    Informa un error en la salida de errores y retorna el código de salida ERROR
+    """
+
+    print(f"Error: {mensaje}", file=sys.stderr)
+
+    return ERROR
+
+
+def item_de_venta(texto: str) -> tuple[int, int]:
+    """
+    Convierte "ID:CANTIDAD" en (id_producto, cantidad); lo usa argparse para validar --items
+    """
+
+    try:
+
+        id_producto, cantidad = (int(valor) for valor in texto.split(":"))
+
+    except ValueError:
+
+        raise argparse.ArgumentTypeError(f"'{texto}' no es ID:CANTIDAD")
+
+    if cantidad <= 0:
+        raise argparse.ArgumentTypeError(f"la cantidad de '{texto}' debe ser mayor que cero")
+
+    return id_producto, cantidad
+
+
+def stock_listar(almacen: Almacen, argumentos: argparse.Namespace) -> int:
+
+    imprimir(almacen.stock(), argumentos.formato)
+
+    return EXITO
+
+
+def stock_agregar(almacen: Almacen, argumentos: argparse.Namespace) -> int:
+    """
+    Agrega una carga de un producto del catálogo; si se indica --umbral y el producto no tiene, lo fija
+    """
+
+    producto = almacen.producto_por_id(argumentos.producto)
+
+    if producto is None:
+        return error(f"no existe el producto {argumentos.producto}")
+
+    if argumentos.umbral is not None and producto.id not in almacen.umbrales():
+        if not almacen.fijar_umbral(producto.id, argumentos.umbral):
+            return error("no se pudo guardar el umbral, no se agregó la carga")
+
+    carga = Carga(0, producto.id, producto.nombre, producto.capacidad, argumentos.cantidad, producto.categoria)
+
+    if not almacen.agregar_carga(carga):
+        return error("no se pudo guardar la carga")
+
+    registrar_accion("agregar_stock", {"producto": argumentos.producto, "carga": carga.id},
+                     despues={"cantidad": argumentos.cantidad})
+    imprimir([carga], argumentos.formato)
+
+    return EXITO
+
+
+def stock_umbral(almacen: Almacen, argumentos: argparse.Namespace) -> int:
+    """
+    Fija el umbral mínimo de un producto o de todos los productos de una categoría (un solo cambio del stock)
+    """
+
+    if argumentos.producto is not None:
+
+        if almacen.producto_por_id(argumentos.producto) is None:
+            return error(f"no existe el producto {argumentos.producto}")
+
+        ids = [argumentos.producto]
+
+    else:
+
+        ids = sorted(almacen.indice_busqueda().por_campo("categoria", argumentos.categoria))
+
+        if not ids:
+            return error(f"no hay productos de la categoría {argumentos.categoria}")
+
+    umbrales = almacen.umbrales()
+    anteriores = {id_producto: umbrales.get(id_producto) for id_producto in ids}
+
+    if not almacen.fijar_umbrales(dict.fromkeys(ids, argumentos.valor)):
+        return error("no se pudieron guardar los umbrales")
+
+    registrar_accion("modificar_umbrales", {"producto": ids}, {"umbrales": anteriores}, {"umbral": argumentos.valor})
+    imprimir([{"id_producto": id_producto, "umbral_anterior": anterior, "umbral": argumentos.valor}
+              for id_producto, anterior in anteriores.items()], argumentos.formato)
+
+    return EXITO
+
+
+def stock_bajo(almacen: Almacen, argumentos: argparse.Namespace) -> int:
+
+    imprimir(almacen.stock_bajo(), argumentos.formato)
+
+    return EXITO
+
+
+def producto_buscar(almacen: Almacen, argumentos: argparse.Namespace) -> int:
+    """
+    Busca productos combinando los filtros indicados (sin filtros lista todo el catálogo)
+    """
+
+    indice = almacen.indice_busqueda()
+    filtros = []
+    puntajes = {}
+
+    if argumentos.id is not None:
+        filtros.append({argumentos.id} if almacen.producto_por_id(argumentos.id) is not None else set())
+
+    if argumentos.nombre is not None:
+        puntajes = indice.puntajes_nombre(argumentos.nombre)
+        filtros.append(puntajes.keys())
+
+    if argumentos.capacidad is not None:
+        filtros.append(indice.por_campo("capacidad", argumentos.capacidad))
+
+    if argumentos.categoria is not None:
+        filtros.append(indice.por_campo("categoria", argumentos.categoria))
+
+    if argumentos.precio_min is not None or argumentos.precio_max is not None:
+        filtros.append(indice.por_precio(argumentos.precio_min, argumentos.precio_max))
+
+    if filtros:
+        ids = sorted(intersecar(filtros), key=lambda id_producto: (puntajes.get(id_producto, 0), id_producto))
+        resultados = [almacen.producto_por_id(id_producto) for id_producto in ids]
+    else:
+        resultados = almacen.productos()
+
+    registrar_accion("buscar_producto")
+    imprimir(resultados, argumentos.formato)
+
+    return EXITO
+
+
+def venta_registrar(almacen: Almacen, argumentos: argparse.Namespace) -> int:
+    """
+    Registra un ticket con los productos de --items al precio del catálogo (todo o nada)
+    """
+
+    ticket = []
+
+    for id_producto, cantidad in argumentos.items:
+
+        producto = almacen.producto_por_id(id_producto)
+
+        if producto is None:
+            return error(f"no existe el producto {id_producto}")
+
+        precio_unitario = producto.precio
+
+        if precio_unitario <= 0:
+            return error(f"el producto {id_producto} no tiene precio")
+
+        ticket.append({"id_producto": id_producto, "nombre": producto.nombre,
+                       "categoria": producto.categoria, "cantidad": cantidad,
+                       "precio_unitario": precio_unitario, "total": precio_unitario * cantidad})
+
+    try:
+
+        id_ticket = almacen.registrar_ticket(lineas_de_ticket(ticket, argumentos.metodo_pago))
+
+    except StockInsuficiente as e:
+
+        return error(str(e))
+
+    if id_ticket is None:
+        return error("no se pudo guardar el ticket")
+
+    total = pesos(sum(linea["total"] for linea in ticket))
+
+    registrar_accion("registrar_venta", {"ticket": id_ticket, "producto": sorted({linea["id_producto"] for linea in ticket})},
+                     despues={"unidades": sum(linea["cantidad"] for linea in ticket), "total": total,
+                              "metodo_pago": argumentos.metodo_pago})
+    imprimir([{"id_ticket": id_ticket, "total": total}], argumentos.formato)
+
+    return EXITO
+
+
+def exportar(almacen: Almacen, argumentos: argparse.Namespace) -> int:
+
+    try:
+
+        exportados = exportar_stock(almacen, argumentos.archivo)
+
+    except OSError as e:
+
+        return error(f"no se pudo exportar el stock: {e}")
+
+    imprimir([{"archivo": argumentos.archivo, "exportados": exportados}], argumentos.formato)
+
+    return EXITO
+
+
+def crear_parser() -> argparse.ArgumentParser:
+    """
+    Arma el parser con todos los subcomandos; cada uno guarda en `accion` la función que lo ejecuta
+    """
+
+    parser = argparse.ArgumentParser(prog="main.py", description="Sistema de stock sin menú interactivo")
+    grupos = parser.add_subparsers(dest="grupo", required=True)
+
+    # Opcion comun a todos los subcomandos
+    salida = argparse.ArgumentParser(add_help=False)
+    salida.add_argument("--formato", choices=FORMATOS, default="json", help="formato de la salida (json por defecto)")
+
+    stock = grupos.add_parser("stock", help="cargas del stock").add_subparsers(dest="comando", required=True)
+
+    comando = stock.add_parser("listar", parents=[salida], help="lista todas las cargas")
+    comando.set_defaults(accion=stock_listar)
+
+    comando = stock.add_parser("agregar", parents=[salida], help="agrega una carga de un producto")
+    comando.add_argument("--producto", type=int, required=True, help="ID del producto en el catálogo")
+    comando.add_argument("--cantidad", type=int, required=True, help="unidades de la carga")
+    comando.add_argument("--umbral", type=int, help="umbral mínimo, si el producto todavía no tiene")
+    comando.set_defaults(accion=stock_agregar)
+
+    comando = stock.add_parser("umbral", parents=[salida], help="fija el umbral mínimo de un producto o una categoría")
+    destino = comando.add_mutually_exclusive_group(required=True)
+    destino.add_argument("--producto", type=int, help="ID del producto en el catálogo")
+    destino.add_argument("--categoria", help="todos los productos de la categoría")
+    comando.add_argument("--valor", type=int, required=True, help="umbral mínimo de unidades")
+    comando.set_defaults(accion=stock_umbral)
+
+    comando = stock.add_parser("bajo", parents=[salida], help="productos con stock bajo")
+    comando.set_defaults(accion=stock_bajo)
+
+    producto = grupos.add_parser("producto", help="catálogo de productos").add_subparsers(dest="comando", required=True)
+
+    comando = producto.add_parser("buscar", parents=[salida], help="busca productos combinando filtros")
+    comando.add_argument("--id", type=int)
+    comando.add_argument("--nombre", help="palabras del nombre (sin importar acentos, acepta prefijos)")
+    comando.add_argument("--capacidad", help="capacidad exacta, por ejemplo 4L")
+    comando.add_argument("--categoria")
+    comando.add_argument("--precio-min", type=centavos, help="en pesos, por ejemplo 4000 o 4000.50")
+    comando.add_argument("--precio-max", type=centavos, help="en pesos")
+    comando.set_defaults(accion=producto_buscar)
+
+    venta = grupos.add_parser("venta", help="ventas").add_subparsers(dest="comando", required=True)
+
+    comando = venta.add_parser("registrar", parents=[salida], help="registra un ticket")
+    comando.add_argument("--items", type=item_de_venta, nargs="+", required=True, metavar="ID:CANTIDAD",
+                         help="productos del ticket")
+    comando.add_argument("--metodo-pago", choices=METODOS_PAGO, default="No especificado")
+    comando.set_defaults(accion=venta_registrar)
+
+    comando = grupos.add_parser("exportar", parents=[salida], help="exporta el stock a CSV")
+    comando.add_argument("--archivo", default=ARCHIVO_EXPORTADO)
+    comando.set_defaults(accion=exportar)
+
+    return parser
+
+
+def ejecutar(argv: list[str]) -> int:
+    """
+    Ejecuta un subcomando y retorna el código de salida
+
+    Precondiciones:
+    - `argv` son los argumentos de la línea de comandos sin el nombre del programa
+
+    Postcondiciones:
+    - No se usa input() ni se limpia la pantalla: los resultados van a la salida estándar
+      y los errores a la salida de errores
+    - Retorna EXITO (0) o ERROR (1); si los argumentos no son válidos argparse termina con 2
+    - Al terminar se cierra el almacén, igual que al salir del menú
+    - Si quien lee la salida deja de leer (p. ej. con "| head") el resto de la salida se descarta
+      sin error: lo que hizo el subcomando ya quedó guardado
+    - Con la instrumentación activada (ver metricas.configurar) el subcomando se mide como una acción del menú
+    """
+
+    argumentos = crear_parser().parse_args(argv)
+    almacen = Almacen()
+    metricas.instrumentar_backend(almacen.backend)
+
+    try:
+
+        codigo = metricas.ejecutar_accion(argumentos.accion.__name__, argumentos.accion, almacen, argumentos)
+
+        # Se vacia aca para que una tuberia cerrada se note dentro del try y no al salir de Python
+        sys.stdout.flush()
+
+        return codigo
+
+    except BrokenPipeError:
+
+        # Lo que quede en el buffer va a /dev/null, asi Python no vuelve a fallar al cerrar stdout
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
+        return EXITO
+
+    finally:
+
+        almacen.cerrar()
@@ -0,0 +1,56 @@
+# Importes de dinero como enteros de centavos: se convierten desde o hacia texto solo en los bordes
+# (archivos, teclado, linea de comandos) y adentro se suman y multiplican sin redondeos
+
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+CENTAVOS_POR_PESO = 100
+
+
+def centavos(importe) -> int:
+    """
+    Convierte un importe en pesos a centavos sin pasar por float
+
+    Precondiciones:
+    - `importe` es texto ("4000", "4000.5", "4000.50"), un entero o un número con decimales, en pesos
+
+    Postcondiciones:
+    - Retorna el importe en centavos (int); con más de dos decimales se redondea al centavo
+      (las mitades hacia arriba)
+    - Lanza ValueError si no es un importe válido
+    """
+
+    if isinstance(importe, str):
+
+        # Caso comun (los archivos se escriben con dos decimales): sin Decimal
+        entero, punto, decimales = importe.strip().partition(".")
+
+        if entero.isdecimal() and (not punto or decimales.isdecimal() and len(decimales) <= 2):
+            return int(entero) * CENTAVOS_POR_PESO + int(decimales.ljust(2, "0") if punto else 0)
+
+    elif isinstance(importe, int):
+
+        return importe * CENTAVOS_POR_PESO
+
+    try:
+
+        # Un float se toma por su texto más corto (4000.1 -> "4000.1"), no por su valor binario
+        valor = Decimal(str(importe).strip())
+
+    except InvalidOperation:
+
+        raise ValueError(f"importe inválido: {importe!r}") from None
+
+    if not valor.is_finite():
+        raise ValueError(f"importe inválido: {importe!r}")
+
+    return int((valor * CENTAVOS_POR_PESO).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def pesos(importe: int) -> str:
+    """
+    Devuelve un importe en centavos como texto en pesos con dos decimales ("4000.50"), el formato de ventas.csv
+    """
+
+    entero, resto = divmod(abs(importe), CENTAVOS_POR_PESO)
+
+    return f"{'-' if importe < 0 else ''}{entero}.{resto:02d}"
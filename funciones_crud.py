@@ -1,9 +1,22 @@
 # Funciones principales del sistema (Create, Read, Update, Delete)
 
-import os
 from datetime import datetime
-from tabulate import tabulate 
-import json
+from tablas import escribir_tabla, tabla
+from almacen import Almacen, StockInsuficiente
+from registros import Carga, Producto, Venta
+from dinero import centavos, pesos
+from reportes import top_productos
+from buscador import intersecar
+from pantalla import limpiar
+import historial
+import metricas
+
+TAMANO_PAGINA_VENTAS = 10
+LIMITE_PERIODOS_REPORTE = 31
+TOP_PRODUCTOS_REPORTE = 10
+TAMANO_PAGINA_HISTORIAL = 10
+ARCHIVO_EXPORTADO = "stock_exportado.csv"
+METODOS_PAGO = ("Efectivo", "Tarjeta", "Transferencia")
 
 # Funciones genericas 
 
@@ -12,265 +25,76 @@ def clear() -> None:
     Limpia la pantalla de la terminal.
     
     Precondiciones:
-    - El sistema operativo debe ser Windows (nt) o Unix/Linux/Mac
-    - El comando 'cls' (Windows) o 'clear' (Unix) debe estar disponible en el sistema
+    - La terminal debe admitir secuencias ANSI (en Windows se activan al iniciar la pantalla)
     
     Postcondiciones:
     - La pantalla de la terminal queda limpia
     - El cursor se posiciona en la parte superior izquierda de la terminal
+    - No se ejecuta ningún comando externo: la secuencia queda en el buffer de la salida
+      y se escribe junto con el resto de la pantalla
+    - Si la salida no es una terminal, no hace nada
     """
-    os.system("cls" if os.name == "nt" else "clear")
+    limpiar()
 
-def cargar_ventas() -> list[dict[str]]:
-    """
-    Lee ventas.csv y devuelve una lista de diccionarios
-    
-    Precondiciones:
-    - El archivo ventas.csv debe existir en el directorio actual (opcional)
-    - El archivo debe tener encoding UTF-8
-    - La primera línea debe contener los encabezados separados por comas
-    - Cada línea subsiguiente debe representar una venta con los mismos campos que el encabezado
-    
-    Postcondiciones:
-    - Retorna una lista de diccionarios donde cada diccionario representa una venta
-    - Las claves de los diccionarios corresponden a los encabezados del CSV
-    - Si el archivo no existe, retorna una lista vacía
-    - Si ocurre un error durante la lectura, se muestra un mensaje y retorna lista vacía
-    - Las líneas mal formateadas o vacías son omitidas
-    """
-    
-    ventas = []
-    
-    try:
-        with open("ventas.csv", "r", encoding="utf-8") as archivo:
-            lineas = archivo.readlines()
-            
-            if lineas:
-                encabezado = lineas[0].strip().split(",")
-                
-                for linea in lineas[1:]:
-
-                    if linea.strip():
-
-                        valores = linea.strip().split(",")
-
-                        if len(valores) == len(encabezado):
-
-                            venta = dict(zip(encabezado, valores))
-                            ventas.append(venta)
-    
-    except FileNotFoundError:
-
-        print("Archivo no encontrado.")
-
-        return ventas
-
-    except Exception as e:
-
-        print(f"Error al cargar ventas.csv: {e}")
-    
-    return ventas
-   
-
-def cargar_productos() -> list[dict[str]]:
-
-    """
-    Lee productos.csv y devuelve una lista de diccionarios
-    
-    Precondiciones:
-    - El archivo productos.csv debe existir en el directorio actual (opcional)
-    - El archivo debe tener encoding UTF-8
-    - La primera línea debe contener los encabezados separados por comas
-    - Cada línea subsiguiente debe representar un producto con los mismos campos que el encabezado
-    
-    Postcondiciones:
-    - Retorna una lista de diccionarios donde cada diccionario representa un producto
-    - Las claves de los diccionarios corresponden a los encabezados del CSV
-    - Si el archivo no existe, muestra un mensaje y retorna una lista vacía
-    - Si el archivo existe pero está vacío, retorna una lista vacía
-    - No se realiza validación de los tipos de datos en los valores
-    """
-
-    productos = []
-
-    try:
-
-        with open("productos.csv", "r", encoding="utf-8") as archivo:
-
-            lineas = archivo.readlines()
-
-            encabezado = lineas[0].strip().split(",")
-
-
-            for linea in lineas[1:]:
-
-                valores = linea.strip().split(",")
-
-                producto = dict(zip(encabezado, valores))
-                productos.append(producto)
-
-    except FileNotFoundError:
-
-        print("Archivo csv no encontrado. Se creara al guardar.")
-
-    return productos
-
-def guardar_productos(productos: list[dict[str]]) -> None:
-    """
-    Escribe la lista de productos en productos.csv
-    
-    Precondiciones:
-    - `productos` debe ser una lista de diccionarios
-    - Todos los diccionarios en la lista deben tener las mismas claves
-    - Los valores de los diccionarios deben ser convertibles a string
-    
-    Postcondiciones:
-    - Se crea o sobrescribe el archivo productos.csv en el directorio actual
-    - Si la lista está vacía, se crea un archivo con solo el encabezado por defecto
-    - La primera línea del archivo contiene los encabezados (claves del primer diccionario)
-    - Cada línea subsiguiente representa un producto con sus valores separados por comas
-    - El encoding del archivo es UTF-8
-    """
-
-    with open("productos.csv", "w", encoding="utf-8") as archivo:
-
-        if not productos:
-
-            archivo.write("id_producto,tipo,capacidad,precio_unidad\n")
-
-            return
-
-        encabezado = ",".join(productos[0].keys())
-        archivo.write(encabezado + "\n")
-        
-        for producto in productos:
-
-            fila = ",".join(map(str, producto.values()))
-            archivo.write(fila + "\n")
-
-
-def cargar_stock() -> dict[str]:
-    """
-    Carga los datos del stock desde un archivo JSON.
-    
-    Precondiciones:
-    - El archivo stock_data.json debe existir en el directorio actual (opcional)
-    - El archivo debe tener formato JSON válido
-    - El archivo debe tener encoding UTF-8
-    - La estructura esperada es un diccionario con claves "stock" y "umbrales"
-    
-    Postcondiciones:
-    - Si el archivo existe y es válido, retorna el diccionario completo del JSON
-    - Si el archivo no existe o tiene formato inválido, retorna una estructura por defecto
-    - La estructura por defecto contiene: {"stock": [], "umbrales": {}}
-    - En caso de error, se muestra un mensaje informativo
-    """
-
-    try:
-
-        with open("stock_data.json", "r", encoding="utf-8") as stockdata_json:
-
-            return json.load(stockdata_json)
-
-    except (FileNotFoundError, json.JSONDecodeError):
-
-        print("Archivo no encontrado")
-
-        return  {
-        "stock": [],
-        "umbrales": {}
-    }
-
-def guardar_stock(datos: dict[str]) -> None:
-    """
-    Guarda los datos del stock en un archivo JSON.
-    
-    Precondiciones:
-    - `datos` debe ser un diccionario serializable a JSON
-    - La estructura esperada es un diccionario con claves "stock" y "umbrales"
-    - Debe tener permisos de escritura en el directorio actual
-    
-    Postcondiciones:
-    - Se crea o sobrescribe el archivo stock_data.json en el directorio actual
-    - El archivo se guarda con encoding UTF-8
-    - Se preservan caracteres especiales y tildes (ensure_ascii=False)
-    - El formato incluye indentación de 4 espacios para mejor legibilidad
-    - En caso de error de escritura, se muestra un mensaje informativo
-    """
-
-    try: 
-
-        with open("stock_data.json", "w", encoding="utf-8") as f:
-
-            json.dump(datos, f, ensure_ascii=False, indent=4)
-            # ensure_ascii=False: Permite el uso de tildes
-            # indent=4: Agrega sangrias
-    
-    except OSError:
-
-        print("El archivo no pudo ser guardado.")
 
 # Funciones propias del sistema
-def registrar_accion(nombre_funcion: str) -> str:
+def registrar_accion(nombre_funcion: str, entidades: dict | None = None,
+                     antes: dict | None = None, despues: dict | None = None) -> dict:
     """
-    Registra una acción realizada en el sistema en un archivo de historial.
+    Registra una acción realizada en el sistema en el historial.
     
     Precondiciones:
     - `nombre_funcion` debe ser un string que identifique la acción
-    - Debe existir el módulo datetime importado
-    - Debe existir el módulo os importado
-    - Debe tener permisos de lectura/escritura en el directorio del script
+    - `entidades` (opcional) son los ids afectados, por ejemplo {"producto": 12, "carga": 7}
+      (un tipo puede tener una lista de ids)
+    - `antes` y `despues` (opcionales) son los valores de los campos que cambiaron
     
     Postcondiciones:
-    - Crea o actualiza el archivo "historial.txt" en el mismo directorio del script
-    - Si el archivo no existe, lo crea con un encabezado
-    - Agrega una nueva línea con timestamp y descripción de la acción
-    - Retorna un string con la línea registrada
-    - En caso de error, muestra mensaje informativo pero no interrumpe ejecución
+    - Se arma un evento con fecha y hora, acción, descripción, usuario, entidades y valores
+      y se encola en el escritor del historial (historial.py), que lo agrega desde otro hilo
+      al archivo JSONL del día en la carpeta "historial": quien registra la acción no espera al disco
+    - Retorna el evento registrado
+    - En caso de error al escribir, se muestra mensaje informativo pero no interrumpe ejecución
     - Las acciones conocidas tienen descripciones predefinidas, las desconocidas usan nombre genérico
     """
 
-    fecha_hora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
     acciones = {
 
-        "agregar_producto": "Agregó un nuevo producto al stock",
+        "agregar_producto": "Agregó un nuevo producto al catálogo",
+        "agregar_stock": "Agregó una carga al stock",
         "eliminar_carga_producto": "Eliminó una carga de producto",
+        "eliminar_producto": "Eliminó un producto del catálogo",
         "modificar_producto": "Modificó un producto existente",
+        "modificar_stock": "Modificó una carga del stock",
         "buscar_producto": "Buscó un producto en el stock",
-        "modificar_umbrales": "Se modifico el umbral de un producto"
+        "modificar_umbrales": "Se modifico el umbral de un producto",
+        "registrar_venta": "Registró una venta"
     }
 
     descripcion = acciones.get(nombre_funcion, f"Ejecutó {nombre_funcion}")
 
-    linea_horario = f"[{fecha_hora}] {descripcion}\n"
-
-    ruta_archivo = os.path.join(os.path.dirname(__file__), "historial.txt")
-
-    try:
-        # Si no existe,el archivo, lo crea
-        if not os.path.exists(ruta_archivo):
+    # Los ids en None (por ejemplo, una carga sin producto en el catalogo) no se guardan
+    entidades = {tipo: valor for tipo, valor in (entidades or {}).items() if valor is not None}
 
-            with open(ruta_archivo, "w", encoding="utf-8") as archivo:
-                # Esto seria el encabezado
-                archivo.write("===== HISTORIAL DE ACCIONES =====\n\n") 
+    evento = historial.nuevo_evento(nombre_funcion, descripcion, entidades, antes, despues)
 
-        # Si existe, simplemetne lo escribe
-        with open(ruta_archivo, "a", encoding="utf-8") as archivo:
+    historial.escritor.escribir(evento)
 
-            archivo.write(linea_horario)
+    return evento
 
-    except FileNotFoundError:
 
-        print("No se encontro o no se pudo crear el archivo.")
+def cambios(antes: dict, despues: dict) -> tuple[dict, dict]:
+    """
+    Devuelve solo los campos que cambiaron entre dos versiones de un registro: (antes, después)
+    """
 
-    except OSError as e:
+    claves = [clave for clave in despues if antes.get(clave) != despues[clave]]
 
-        print(f"Error del sistema al registrar el historial: {e}")
+    return {clave: antes.get(clave) for clave in claves}, {clave: despues[clave] for clave in claves}
 
 
 # Funciones stock
-def agregar_stock(producto: [int] = None) -> None: # Producto puede ser opcional
+def agregar_stock(almacen: Almacen, producto: [int] = None) -> None: # Producto puede ser opcional
     """
     Agrega o actualiza productos en el stock.
     Muestra los productos disponibles desde productos.csv,
@@ -279,22 +103,22 @@ def agregar_stock(producto: [int] = None) -> None: # Producto puede ser opcional
     Precondiciones:
     - Los archivos stock_data.json y productos.csv deben existir (opcional)
     - Si se proporciona `producto`, debe ser un ID válido existente en productos.csv
-    - Los módulos necesarios (clear, cargar_stock, cargar_productos, etc.) deben estar disponibles
+    - `almacen` debe ser el Almacen de la sesión, con el stock y los productos en memoria
     
     Postcondiciones:
-    - Se actualiza el stock_data.json con la nueva carga de producto
-    - Si no existe umbral para el producto, se solicita y guarda uno nuevo
+    - Se registra la nueva carga de producto en el diario del stock
+    - Si no existe umbral para el producto (para esa capacidad), se solicita y guarda uno nuevo
     - Se genera un nuevo ID único para la carga en el stock
     - Se registra la acción en el historial del sistema
+    - Si el umbral o la carga no se pudieron guardar, se informa y retorna al menú sin registrar la acción
     - El usuario puede elegir volver al menú o agregar más stock
     - En caso de productos no cargados, se informa y retorna al menú
     """
     print("=========== AGREGAR STOCK ===========")
 
-    stock_data = cargar_stock()  # Carga todo el JSON (stock y umbrales)
-    stock = stock_data.get("stock", [])  # Variable para acceder al stock
-    umbrales = stock_data.get("umbrales", {})  # Variable para acceder a los umbrales de cada producto
-    productos = cargar_productos()  # Variable para acceder a los prouctos
+    stock_data = almacen.datos_stock()  # Carga todo el JSON (stock y umbrales)
+    umbrales = stock_data.get("umbrales", {})  # Variable para acceder a los umbrales de cada producto (por ID)
+    productos = almacen.productos()  # Variable para acceder a los prouctos
 
     if not productos:
         print("No hay productos cargados.")
@@ -302,7 +126,7 @@ def agregar_stock(producto: [int] = None) -> None: # Producto puede ser opcional
         clear()
         return
 
-    listar_productos()
+    listar_productos(almacen)
 
     # Producto
     while True:
@@ -317,13 +141,7 @@ def agregar_stock(producto: [int] = None) -> None: # Producto puede ser opcional
 
                 id_producto=producto
 
-            producto_seleccionado = None
-
-            for x in productos:
-
-                if int(x["id"]) == id_producto:
-                    producto_seleccionado = x
-                    break
+            producto_seleccionado = almacen.producto_por_id(id_producto)
 
             if producto_seleccionado is not None:
 
@@ -336,14 +154,14 @@ def agregar_stock(producto: [int] = None) -> None: # Producto puede ser opcional
             else:
                 clear()
                 print("=========== AGREGAR STOCK ===========")
-                listar_productos()
+                listar_productos(almacen)
 
                 print("\nID invalido, intente nuevamente.")
 
         except ValueError:
             clear()
             print("=========== AGREGAR STOCK ===========")
-            listar_productos()
+            listar_productos(almacen)
 
             print("\nValor invalido, solo se aceptan numeros.")
 
@@ -370,7 +188,7 @@ def agregar_stock(producto: [int] = None) -> None: # Producto puede ser opcional
     clear()
 
     # Umbral
-    if umbrales.get(tipo_producto) is None:  # Si no existe el umbral..
+    if umbrales.get(id_producto) is None:  # Si no existe el umbral..
 
         while True:
 
@@ -378,11 +196,16 @@ def agregar_stock(producto: [int] = None) -> None: # Producto puede ser opcional
 
                 print("=========== AGREGAR STOCK ===========")
 
-                valor = int(input(f"Ingrese el umbral minimo para {tipo_producto}: "))
+                valor = int(input(f"Ingrese el umbral minimo para {tipo_producto} ({capacidad}): "))
 
                 if valor > 0:
 
-                    umbrales[tipo_producto] = valor
+                    if not almacen.fijar_umbral(id_producto, valor):
+                        print("No se pudo guardar el umbral, no se agregó la carga.")
+                        input("\nENTER para volver al menú")
+                        clear()
+                        return
+
                     break
 
                 else:
@@ -393,25 +216,20 @@ def agregar_stock(producto: [int] = None) -> None: # Producto puede ser opcional
                 clear()
                 print("Valor invalido, solo se aceptan numeros enteros.")
 
-    # Crear nueva carga
-    nuevo_id_carga = max([x["id"] for x in stock], default=0) + 1
+    # Crear nueva carga (el almacen le asigna el id al guardarla)
+    nueva_carga = Carga(0, id_producto, tipo_producto, capacidad, cantidad_unidades, categoria)
 
-    nueva_carga = {
-        "id": nuevo_id_carga,
-        "tipo": tipo_producto,
-        "capacidad": capacidad,
-        "cantidad": cantidad_unidades,
-        "categoria": categoria
-    }
+    # Guarda la carga en el diario del stock
+    if not almacen.agregar_carga(nueva_carga):
+        print("No se pudo guardar la carga, el stock no se modificó.")
+        input("\nENTER para volver al menú")
+        clear()
+        return
 
-    stock.append(nueva_carga)
     print(f"Producto '{tipo_producto}' ({capacidad}), {cantidad_unidades} cantidad de unidades agregadas al stock.")
 
-    # Guardar todo
-    stock_data["stock"] = stock
-    stock_data["umbrales"] = umbrales
-    guardar_stock(stock_data)
-    registrar_accion("agregar_producto")
+    registrar_accion("agregar_stock", {"producto": id_producto, "carga": nueva_carga.id},
+                     despues={"cantidad": cantidad_unidades})
     clear()
 
     print("===== PRODUCTO AGREGADO CORRECTAMENTE =====")
@@ -429,13 +247,13 @@ def agregar_stock(producto: [int] = None) -> None: # Producto puede ser opcional
             return
         elif opcion == "2":
             clear()
-            return agregar_stock()
+            return agregar_stock(almacen)
         else:
             clear()
             print("===== OPCIÓN INCORRECTA =====")
 
 
-def modificar_stock() -> None:
+def modificar_stock(almacen: Almacen) -> None:
     """
     Permite modificar una carga en el stock.
     El usuario puede cambiar el producto de la carga o la cantidad de unidades.
@@ -447,7 +265,7 @@ def modificar_stock() -> None:
     - Los IDs de producto en productos.csv deben ser válidos
     
     Postcondiciones:
-    - Se actualiza el stock_data.json con los cambios realizados
+    - Se registran los cambios realizados en el diario del stock
     - El usuario puede modificar el producto o la cantidad de una carga existente
     - Se registra la acción en el historial del sistema
     - Se mantiene la integridad de los datos (IDs únicos, referencias válidas)
@@ -457,9 +275,8 @@ def modificar_stock() -> None:
 
     print("=========== MODIFICAR STOCK ===========")
 
-    stock_data = cargar_stock()  # Carga todo el JSON (stock y umbrales)
+    stock_data = almacen.datos_stock()  # Carga todo el JSON (stock y umbrales)
     stock = stock_data.get("stock", [])  # Variable para acceder al stock
-    productos = cargar_productos()  # Variable para acceder a los productos
 
     if not stock:
         print("===== No hay productos en stock =====")
@@ -468,7 +285,7 @@ def modificar_stock() -> None:
         return
 
 
-    listar_stock()
+    listar_stock(almacen)
 
 
     # Seleccionar que stock cargado a modificar
@@ -480,13 +297,7 @@ def modificar_stock() -> None:
             id_stock = int(input("\nIngrese el ID de la carga a modificar: "))
 
 
-            carga = None
-
-            for x in stock:
-
-                if x["id"] == id_stock:
-                    carga = x
-                    break
+            carga = almacen.carga_por_id(id_stock)
 
             if carga:
 
@@ -495,19 +306,22 @@ def modificar_stock() -> None:
             else:
                 clear()
                 print("=========== MODIFICAR STOCK ===========")
-                listar_stock()
+                listar_stock(almacen)
 
                 print("\nID de la carga no encontrado.")
 
         except ValueError:
             clear()
             print("=========== MODIFICAR STOCK ===========")
-            listar_stock()
+            listar_stock(almacen)
 
             print("\nValor invalido, solo se aceptan numeros.")
 
     clear()
 
+    # Valores de la carga antes de modificarla, para el historial
+    carga_anterior = dict(carga)
+
     while True:
         print("=========== MODIFICAR STOCK ===========")
         print("Selecciona lo que queres modificar...")
@@ -525,21 +339,18 @@ def modificar_stock() -> None:
 
                 try:
                     print("=========== MODIFICAR STOCK ===========")
-                    listar_productos()
+                    listar_productos(almacen)
 
                     id_producto = int(input("\nIngrese el ID del nuevo producto: "))
-                    producto_nuevo = None
-
-                    for x in productos:
-
-                        if int(x["id"]) == id_producto:
-                            producto_nuevo = x
-                            break
+                    producto_nuevo = almacen.producto_por_id(id_producto)
 
                     if producto_nuevo:
 
-                        carga["tipo"] = producto_nuevo["nombre"]
-                        carga["capacidad"] = producto_nuevo["capacidad"]
+                        guardado = almacen.modificar_carga(carga, {"id_producto": producto_nuevo.id,
+                                                                   "tipo": producto_nuevo.nombre,
+                                                                   "capacidad": producto_nuevo.capacidad,
+                                                                   "categoria": producto_nuevo.categoria},
+                                                           {"id_producto": carga.id_producto})
                         break
 
                     else:
@@ -563,7 +374,8 @@ def modificar_stock() -> None:
 
                     if cantidad >= 0:
 
-                        carga["cantidad"] = cantidad
+                        guardado = almacen.modificar_carga(carga, {"cantidad": cantidad},
+                                                           {"cantidad": carga.cantidad})
                         break
 
                     else:
@@ -580,14 +392,21 @@ def modificar_stock() -> None:
             clear()
             print("Opcion invalida, ingrese 1 o 2.")
 
-    # Guardar todo
-    stock_data["stock"] = stock
-    guardar_stock(stock_data)
-    registrar_accion("modificar_stock")
+    # Si otra caja cambio la carga mientras se editaba, se vuelve a empezar con los datos nuevos
+    if not guardado:
+        print("La carga fue modificada o eliminada desde otra caja. Vuelva a intentarlo.")
+        input("\nENTER para continuar")
+        clear()
+        return modificar_stock(almacen)
+
+    carga = almacen.carga_por_id(carga.id)
+
+    registrar_accion("modificar_stock", {"carga": carga.id, "producto": carga.id_producto or None},
+                     *cambios(carga_anterior, carga))
     clear()
 
     print("===== CARGA MODIFICADA CORRECTAMENTE =====")
-    print(f"ID: {carga['id']} | Producto: {carga['tipo']} ({carga['capacidad']}) | Cantidad: {carga['cantidad']}\n")
+    print(f"ID: {carga.id} | Producto: {carga.tipo} ({carga.capacidad}) | Cantidad: {carga.cantidad}\n")
 
     while True:
         print("1. Volver al menú")
@@ -599,14 +418,14 @@ def modificar_stock() -> None:
             return
         elif opcion == "2":
             clear()
-            return modificar_stock()
+            return modificar_stock(almacen)
         else:
             clear()
             print("===== OPCIÓN INCORRECTA =====")
 
 
 
-def eliminar_stock() -> None:
+def eliminar_stock(almacen: Almacen) -> None:
     """
     Elimina un producto del stock
     Se le solicita al usuario el ID del producto a eliminar
@@ -619,7 +438,7 @@ def eliminar_stock() -> None:
     
     Postcondiciones:
     - Se elimina permanentemente la carga seleccionada del stock
-    - Se actualiza el archivo stock_data.json sin la carga eliminada
+    - Se registra la eliminación de la carga en el diario del stock
     - Se registra la acción en el historial del sistema
     - Se solicita confirmación antes de proceder con la eliminación
     - El usuario puede elegir volver al menú o eliminar otra carga
@@ -627,7 +446,7 @@ def eliminar_stock() -> None:
     - Si el ID no existe, se informa y retorna al menú
     """
 
-    stock_data = cargar_stock()  # Carga todo el json (productos y umbrales)
+    stock_data = almacen.datos_stock()  # Carga todo el json (productos y umbrales)
     stock = stock_data.get("stock", [])  # Variable para acceder a los productos
 
     if not stock:
@@ -642,7 +461,7 @@ def eliminar_stock() -> None:
 
         try:
             print("=========== ELIMINAR CARGA STOCK ===========")
-            listar_stock()
+            listar_stock(almacen)
             id_stock = int(input("\nIngrese el ID de carga del producto a eliminar: "))
             break
 
@@ -651,14 +470,7 @@ def eliminar_stock() -> None:
             print("Solo se aceptan numeros.")
             continue  # Si hubo error, lo vuelve a pedir el id
 
-    carga = None
-
-    for x in stock:
-
-        if x["id"] == id_stock:
-            carga = x
-
-            break
+    carga = almacen.carga_por_id(id_stock)
 
     if carga is None:
         print("El ID de la carga no coincide con ningun producto.")
@@ -673,15 +485,18 @@ def eliminar_stock() -> None:
         clear()
         print("=========== ELIMINAR CARGA STOCK ===========")
         confirmacion = input(
-            f"La carga del producto que desea eliminar es '{carga['tipo']}', ID: '{id_stock}', con '{carga["cantidad"]}' unidades, es esto correcto? (1: Si | 2: No): ").strip()
+            f"La carga del producto que desea eliminar es '{carga.tipo}', ID: '{id_stock}', con '{carga.cantidad}' unidades, es esto correcto? (1: Si | 2: No): ").strip()
 
     match confirmacion:
 
         case "1":
 
-            # Elimina el producto y solo actualiza la parte del stock en el json
-            stock.remove(carga)
-            stock_data["stock"] = stock
+            # Elimina la carga y lo registra en el diario del stock
+            if not almacen.eliminar_carga(carga):
+                print("No se pudo eliminar la carga, el stock no se modificó.")
+                input("\nENTER para volver al menú")
+                clear()
+                return
 
         case "2":
 
@@ -690,9 +505,9 @@ def eliminar_stock() -> None:
             clear()
             return
 
-    # Guarda todo y historial
-    guardar_stock(stock_data)
-    registrar_accion("eliminar_carga_producto")
+    # Historial
+    registrar_accion("eliminar_carga_producto", {"carga": carga.id, "producto": carga.id_producto or None},
+                     antes={"cantidad": carga.cantidad})
     clear()
 
     print("===== PRODUCTO ELIMINADO CORRECTAMENTE =====")
@@ -708,21 +523,20 @@ def eliminar_stock() -> None:
             return
         elif opcion == "2":
             clear()
-            return eliminar_stock()
+            return eliminar_stock(almacen)
         else:
             clear()
             print("===== OPCIÓN INCORRECTA =====")
 
 
 
-def listar_stock() -> None:
+def listar_stock(almacen: Almacen) -> None:
     """
     Muestra el stock cargado en forma de tabla.
     Cada fila muestra: ID de carga, Producto, Capacidad, Cantidad.
     
     Precondiciones:
     - El archivo stock_data.json debe existir (opcional)
-    - El módulo tabulate debe estar instalado y disponible
     - La estructura del stock debe ser una lista de diccionarios con claves consistentes
     
     Postcondiciones:
@@ -730,10 +544,10 @@ def listar_stock() -> None:
     - Los encabezados de la tabla corresponden a las claves de los diccionarios
     - Si no hay productos en stock, muestra un mensaje informativo
     - No modifica ningún dato, solo realiza una operación de lectura
-    - La tabla se muestra sin índices y con formato grid
+    - La tabla se muestra sin índices y con formato grid, escrita fila por fila (ver tablas.escribir_tabla)
     """
     
-    stock_data = cargar_stock() # Carga todo el json
+    stock_data = almacen.datos_stock() # Carga todo el json
     stock = stock_data.get("stock", []) # Varibale para acceder al stock
 
     if not stock:
@@ -741,109 +555,167 @@ def listar_stock() -> None:
         print("===== No hay productos en stock =====")
 
 
-    print(tabulate(stock, headers="keys", tablefmt="grid", showindex=False)) # Muestra el dic como una tabla
+    escribir_tabla(stock, headers="keys", tablefmt="grid") # Muestra el dic como una tabla, fila por fila
+
+def listar_umbrales(almacen: Almacen) -> None:
+    """
+    Muestra los productos del catálogo con su umbral mínimo actual ("-" si no tiene)
+    """
+
+    umbrales = almacen.umbrales()
+
+    escribir_tabla(([producto.id, producto.nombre, producto.capacidad, producto.categoria,
+                     umbrales.get(producto.id, "-")] for producto in almacen.productos()),
+                   headers=["ID", "Producto", "Capacidad", "Categoría", "Umbral"], tablefmt="grid")
+
+def pedir_umbral(mensaje: str) -> int:
+    """
+    Pide un umbral mínimo hasta que se ingrese un número entero mayor que 0
+    """
+
+    while True:
+
+        try:
+
+            valor = int(input(mensaje))
+
+            if valor > 0:
+                return valor
+
+            print("Debe ingresar un número mayor que 0")
+
+        except ValueError:
+
+            print("Debe ingresar un número")
 
-def modificar_umbrales() -> None:
+def modificar_umbrales(almacen: Almacen) -> None:
     """
-    Permite al usuario modificar los valores minimos de los umbrales de los productos cargados en el stock
+    Permite al usuario modificar el umbral mínimo de stock de un producto o de todos los productos de una categoría
 
     Precondiciones:
-    - Deben funcionar las funciones clear(), cargar_stock(), guardar_stock()
-    - El archivo json debe tener un diccionario con una clave "umbrales" que contenga otro diccionario
-    - Los valores de los umbrales deben ser enteros o convertibles a enteros
+    - Deben funcionar las funciones clear(), almacen.fijar_umbral() y almacen.fijar_umbrales()
+    - Los umbrales son por producto: cada capacidad de un mismo nombre tiene el suyo
 
     Postcondiciones:
-    - Si no existen umbrales cargados informa por pantalla y unicamente permite volver al menú
-    - Cuando se ingresa el nombre de un producto y un nuevo umbral se modifica en stock_data.json y se informa por pantalla
-    que se modifico correctamente
+    - Si no hay productos cargados informa por pantalla y unicamente permite volver al menú
+    - Con la opción 1 se elige un producto por ID y se guarda su nuevo umbral
+    - Con la opción 2 se elige una categoría y se guarda el mismo umbral para todos sus productos,
+      como un solo cambio en el diario del stock (una sola escritura para toda la categoría)
+    - Se registra la acción en el historial y se informa por pantalla que se modificó correctamente
     - Al final el usuario puede volver al menú o realizar otra modificación
     """
 
-    stock_data = cargar_stock()
-    umbrales = stock_data.get("umbrales", {})
-
-    if not umbrales:
+    if not almacen.productos():
         print("============= MODIFICAR UMBRALES DE STOCK =============")
-        print("No hay umbrales para modificar")
+        print("No hay productos cargados")
         input("ENTER para volver al menú")
         clear()
         return
 
+    while True:
+        print("============= MODIFICAR UMBRALES DE STOCK =============")
+        print("1: Un producto | 2: Toda una categoría\n")
 
-    nombres=[]
+        opcion = input("Seleccione una opcion (1 o 2, ENTER para salir): ").strip()
+        clear()
 
-    indice=1
+        if not opcion:
+            return
 
-    print("============= MODIFICAR UMBRALES DE STOCK =============")
-    print("Umbrales actuales:")
-    print("=======================================================")
-    for nombre, valor in umbrales.items():
-        print(f"{indice}. {nombre}: {valor}")
-        nombres.append(nombre)
-        indice+=1
-    print("=======================================================\n")
+        if opcion in ("1", "2"):
+            break
 
-    while True:
+        print("Opcion invalida, ingrese 1 o 2.")
 
-        tipo_modificar = input("Ingrese el número del tipo de pintura a modificar su umbral (ENTER para salir): ").strip()
+    umbrales = almacen.umbrales()
 
-        try:
+    # Un producto
+    if opcion == "1":
 
-            if not tipo_modificar:
-                clear()
-                return
-            else:
-                tipo_modificar = nombres[int(tipo_modificar) - 1]
-                break
+        while True:
 
-        except ValueError:
-            clear()
-            indice=1
             print("============= MODIFICAR UMBRALES DE STOCK =============")
-            print("Umbrales actuales:")
-            print("=======================================================")
-            for nombre, valor in umbrales.items():
-                print(f"{indice}. {nombre}: {valor}")
-                indice += 1
-            print("=======================================================")
-            print("Debe ingresar un número\n")
+            listar_umbrales(almacen)
 
+            try:
 
+                producto = almacen.producto_por_id(int(input("\nIngrese el ID del producto: ")))
 
-    clear()
+                if producto is not None:
+                    break
 
+                clear()
+                print("ID invalido, intente nuevamente.")
 
-    print("============= MODIFICAR UMBRALES DE STOCK =============")
-    while True:
-        try:
+            except ValueError:
+                clear()
+                print("Valor invalido, solo se aceptan numeros.")
 
-            nuevo_valor = int(input(f"Ingrese el nuevo umbral mínimo para '{tipo_modificar}': "))
+        clear()
+        print("============= MODIFICAR UMBRALES DE STOCK =============")
 
-            while nuevo_valor <= 0:
-                print("Debe ingresar un número mayor que 0")
-                nuevo_valor = int(input(f"Ingrese el nuevo umbral mínimo para '{tipo_modificar}': "))
-            break
+        nuevo_valor = pedir_umbral(f"Ingrese el nuevo umbral mínimo para '{producto.nombre}' ({producto.capacidad}): ")
+        umbral_anterior = umbrales.get(producto.id)
 
-        except ValueError:
+        if not almacen.fijar_umbral(producto.id, nuevo_valor):
+            print("No se pudo guardar el umbral, quedó el anterior.")
+            input("\nENTER para volver al menú")
             clear()
+            return
+
+        registrar_accion("modificar_umbrales", {"producto": producto.id}, {"umbral": umbral_anterior}, {"umbral": nuevo_valor})
+
+        clear()
+        print("=========== UMBRAL MODIFICADO CORRECTAMENTE ===========")
+        print(f"{producto.nombre} ({producto.capacidad}): Nuevo umbral → {nuevo_valor}")
+
+    # Toda una categoria
+    else:
+
+        indice = almacen.indice_busqueda()
+        categorias = indice.valores("categoria")
+
+        while True:
+
             print("============= MODIFICAR UMBRALES DE STOCK =============")
-            print("Debe ingresar un número")
+            for i, categoria in enumerate(categorias):
+                print(f"{i + 1}: {categoria} ({len(indice.por_campo('categoria', categoria))} productos)")
 
+            opcion = input("\nQue categoría es: ").strip()
 
-    umbrales[tipo_modificar] = nuevo_valor
-    stock_data["umbrales"] = umbrales
-    guardar_stock(stock_data)
+            # Se valida el rango antes de indexar: 0 o un negativo elegirian una categoria desde el final
+            if opcion.isdigit() and 1 <= int(opcion) <= len(categorias):
+                categoria = categorias[int(opcion) - 1]
+                break
 
-    registrar_accion("modificar_umbrales")
+            clear()
+            print("Opción incorrecta\n")
 
-    clear()
-    print("=========== UMBRAL MODIFICADO CORRECTAMENTE ===========")
-    print(f"{tipo_modificar}: Nuevo umbral → {nuevo_valor}")
+        clear()
+        print("============= MODIFICAR UMBRALES DE STOCK =============")
+
+        ids = sorted(indice.por_campo("categoria", categoria))
+        nuevo_valor = pedir_umbral(f"Ingrese el nuevo umbral mínimo para los {len(ids)} productos de '{categoria}': ")
+        anteriores = {id_producto: umbrales.get(id_producto) for id_producto in ids}
+
+        # Todos los productos de la categoria se guardan como un solo cambio del stock
+        if not almacen.fijar_umbrales(dict.fromkeys(ids, nuevo_valor)):
+            print("No se pudieron guardar los umbrales, quedaron los anteriores.")
+            input("\nENTER para volver al menú")
+            clear()
+            return
+
+        registrar_accion("modificar_umbrales", {"producto": ids}, {"umbrales": anteriores},
+                         {"categoria": categoria, "umbral": nuevo_valor})
+
+        clear()
+        print("=========== UMBRALES MODIFICADOS CORRECTAMENTE ===========")
+        print(f"{categoria}: Nuevo umbral → {nuevo_valor} ({len(ids)} productos)")
 
     print("============= MODIFICAR UMBRALES DE STOCK =============")
     while True:
         print("1. Volver al menú")
-        print("2. Modificar otro producto")
+        print("2. Modificar otro umbral")
         print("=======================================================")
         opcion = input("Seleccione una opción: ")
 
@@ -852,27 +724,28 @@ def modificar_umbrales() -> None:
             return
         elif opcion == "2":
             clear()
-            return modificar_umbrales()
+            return modificar_umbrales(almacen)
         else:
             clear()
             print("=========== OPCIÓN INCORRECTA ===========")
 
+
 # Funciones productos
 
-def listar_productos() -> None:
+def listar_productos(almacen: Almacen) -> None:
     """
     Muestra por pantalla todos los productos del stock en forma de tabla
     Cada producto debe mostrar: ID, tipo de pintura, capacidad (lts), cantidad, precio de la unidad
     """
 
-    productos = cargar_productos()  # Variable para acceder a los productos
+    productos = almacen.productos()  # Variable para acceder a los productos
 
     if not productos:
         print("===== No hay productos cargados =====")
 
-    print(tabulate(productos, headers="keys", tablefmt="grid", showindex=False))  # Muestra el csv como una tabla
+    escribir_tabla((producto.para_mostrar() for producto in productos), headers="keys", tablefmt="grid")  # Muestra el csv como una tabla, fila por fila
 
-def agregar_producto() -> None:
+def agregar_producto(almacen: Almacen) -> None:
     """
     Permite al usuario agregar un producto nuevo al archivo productos.csv
     Se solicita: nombre, capacidad, categoria y precio.
@@ -896,16 +769,8 @@ def agregar_producto() -> None:
     """
     print("=========== AGREGAR PRODUCTO ===========")
 
-    productos = cargar_productos()
-
     categorias= ["Pintura","Protector","Preparación","Impermeabilizante"]
 
-    # ID incremental
-    if productos:
-        nuevo_id = max(int(x["id"]) for x in productos) + 1
-    else:
-        nuevo_id = 1
-
     # Nombre 
     while True:
         
@@ -961,7 +826,7 @@ def agregar_producto() -> None:
     # Precio 
     while True:
         try:
-            precio = int(input("Ingrese el precio del producto: "))
+            precio = centavos(input("Ingrese el precio del producto: "))
             if precio > 0:
                 break
             else:
@@ -971,25 +836,26 @@ def agregar_producto() -> None:
         except ValueError:
             clear()
             print("=========== AGREGAR PRODUCTO ===========")
-            print("Valor invalido, solo se aceptan números enteros.")
+            print("Valor invalido, ingrese un importe (por ejemplo 4000 o 4000.50).")
+
+    # ID incremental (secuencia de productos)
+    nuevo_id = almacen.nuevo_id_producto()
 
     # Estructura del producto
-    nuevo_producto = {
-        "id": int(nuevo_id),
-        "nombre": nombre,
-        "capacidad": capacidad,
-        "categoria": categoria,
-        "precio": int(precio)
-    }
+    nuevo_producto = Producto(nuevo_id, nombre, capacidad, categoria, precio)
 
     # Guardar todo
-    productos.append(nuevo_producto)
-    guardar_productos(productos)
-    registrar_accion("agregar_producto")
+    almacen.agregar_producto(nuevo_producto)
+    if not almacen.guardar_productos():
+        print("\nLos cambios quedan pendientes y se guardarán con el próximo cambio del catálogo.")
+        input("\nENTER para volver al menú")
+        clear()
+        return
+    registrar_accion("agregar_producto", {"producto": nuevo_producto.id}, despues=nuevo_producto.para_mostrar())
     clear()
 
     print(f"===== PRODUCTO AGREGADO =====")
-    print(f"ID: {nuevo_id}, Nombre: {nombre}, Capacidad: {capacidad}, Categoria: {categoria}, Precio por unidad: ${precio}\n")
+    print(f"ID: {nuevo_id}, Nombre: {nombre}, Capacidad: {capacidad}, Categoria: {categoria}, Precio por unidad: ${pesos(precio)}\n")
 
     opcion = input("¿Desea agregar stock inicial a este producto? (1: Si | 2: No): ").lower()
     while opcion not in ("1","2"):
@@ -999,7 +865,7 @@ def agregar_producto() -> None:
 
     if opcion=="1":
         clear()
-        agregar_stock(nuevo_id)
+        agregar_stock(almacen, nuevo_id)
         return
 
     # Opciones post-agregar
@@ -1013,12 +879,12 @@ def agregar_producto() -> None:
             return
         elif opcion == "2":
             clear()
-            return agregar_producto()
+            return agregar_producto(almacen)
         else:
             clear()
             print("===== OPCIÓN INCORRECTA =====")
 
-def eliminar_producto() -> None:
+def eliminar_producto(almacen: Almacen) -> None:
     """
     Elimina un producto del catálogo de productos.
     El usuario selecciona el ID del producto a eliminar.
@@ -1031,17 +897,19 @@ def eliminar_producto() -> None:
 
     Postcondiciones:
     - Se elimina el producto del archivo productos.csv
-    - Se eliminan todas las cargas del producto del stock
-    - Se elimina el umbral asociado al producto si existe
+    - Se eliminan todas las cargas del producto del stock (las de otras capacidades con el mismo nombre se conservan)
+    - Se elimina el umbral del producto si existe
     - Se registra la acción en el historial del sistema
-    - Se actualizan tanto productos.csv como stock_data.json
+    - Se actualiza productos.csv y se registran los cambios del stock en su diario
+    - El stock y el umbral se eliminan solo después de guardar productos.csv: si no se pudo guardar
+      no se tocan; si falla alguno de ellos se informa qué quedó eliminado y se retorna
     - Se muestra confirmación de lo que fue eliminado
     - El usuario puede eliminar múltiples productos en una misma sesión
     - En caso de no encontrar productos o ID inválido, se informa y retorna
     """
 
 
-    productos = cargar_productos()
+    productos = almacen.productos()
 
     if not productos:
         print("===== No hay productos cargados =====")
@@ -1053,7 +921,7 @@ def eliminar_producto() -> None:
     while True:
         # Elegir producto
         print("=========== ELIMINAR PRODUCTO ===========")
-        listar_stock()
+        listar_stock(almacen)
         try:
             id_eliminar = int(input("\nIngrese el ID del producto a eliminar: "))
             break
@@ -1061,12 +929,7 @@ def eliminar_producto() -> None:
             clear()
             print("Valor invalido, solo se aceptan numeros.")
 
-    producto = None
-
-    for x in productos:
-        if int(x["id"]) == id_eliminar:
-            producto = x
-            break
+    producto = almacen.producto_por_id(id_eliminar)
 
     if not producto:
         print(f"No se encontro ningún producto con el ID {id_eliminar}")
@@ -1084,22 +947,37 @@ def eliminar_producto() -> None:
     match confirmacion:
         case "1":
 
-            # Eliminar producto del csv
-            productos.remove(producto)
+            # Eliminar producto del csv; el stock se toca solo si el catalogo se guardo
+            almacen.eliminar_producto(producto)
+
+            if not almacen.guardar_productos():
+                print("\nLos cambios quedan pendientes y se guardarán con el próximo cambio del catálogo.")
+                print("El stock y los umbrales del producto no se modificaron.")
+                input("\nENTER para volver al menú")
+                clear()
+                return
 
             # Elimina del stock y su umbral
-            stock_data = cargar_stock()
-            stock = stock_data.get("stock", [])
-            umbrales = stock_data.get("umbrales", {})
+            umbrales = almacen.umbrales()
+
+            # Eliminar sus cargas al stock (solo las de este producto, no las de otras capacidades)
+            cargas_eliminadas = [carga.id for carga in almacen.cargas_de_producto(producto.id)]
 
-            # Eliminar sus cargas al stock
-            stock_actualizado = [p for p in stock if p.get("tipo") != producto['nombre']]
-            stock_data["stock"] = stock_actualizado
+            if not almacen.eliminar_cargas_de_producto(producto.id):
+                registrar_accion("eliminar_producto", {"producto": producto.id}, antes=producto.para_mostrar())
+                print("El producto se eliminó del catálogo, pero no se pudieron eliminar sus cargas ni su umbral.")
+                input("\nENTER para volver al menú")
+                clear()
+                return
 
-            # Eliminar al umbral (si existe)
-            if producto['nombre'] in umbrales:
-                del umbrales[producto['nombre']]
-                stock_data["umbrales"] = umbrales
+            # Eliminar su umbral (si existe); las otras capacidades conservan el suyo
+            if producto.id in umbrales and not almacen.eliminar_umbral(producto.id):
+                registrar_accion("eliminar_producto", {"producto": producto.id, "carga": cargas_eliminadas or None},
+                                 antes=producto.para_mostrar())
+                print("El producto y sus cargas se eliminaron, pero no se pudo eliminar su umbral.")
+                input("\nENTER para volver al menú")
+                clear()
+                return
 
         case "2":
             print("==== Eliminacion cancelada ====")
@@ -1107,10 +985,8 @@ def eliminar_producto() -> None:
             clear()
             return
 
-    # Guarda todo
-    guardar_stock(stock_data)
-    guardar_productos(productos)
-    registrar_accion("eliminar_producto")
+    registrar_accion("eliminar_producto", {"producto": producto.id, "carga": cargas_eliminadas or None},
+                     antes=producto.para_mostrar())
 
     print(f"===== Producto '{producto['nombre']}' eliminado correctamente =====\n")
     print("Eliminado del catálogo de productos")
@@ -1129,13 +1005,13 @@ def eliminar_producto() -> None:
                 return
             case "2":
                 clear()
-                return eliminar_producto()
+                return eliminar_producto(almacen)
             case _:
                 clear()
                 print("===== OPCIÓN INCORRECTA =====")
 
 
-def modificar_producto() -> None:
+def modificar_producto(almacen: Almacen) -> None:
     """
     Modifica un producto existente del catálogo.
     El usuario puede cambiar: nombre, capacidad, categoría o precio.
@@ -1157,7 +1033,7 @@ def modificar_producto() -> None:
     """
     print("=========== MODIFICAR PRODUCTO ===========")
 
-    productos = cargar_productos()  # Variable para acceder a los productos
+    productos = almacen.productos()  # Variable para acceder a los productos
 
     categorias = ["Pintura", "Protector", "Preparación", "Impermeabilizante"]
 
@@ -1167,7 +1043,7 @@ def modificar_producto() -> None:
         clear()
         return
 
-    listar_productos()
+    listar_productos(almacen)
 
     while True:
 
@@ -1179,16 +1055,10 @@ def modificar_producto() -> None:
         except ValueError:
             clear()
             print("=========== MODIFICAR PRODUCTO ===========")
-            listar_productos()
+            listar_productos(almacen)
             print("Valor invalido, solo se aceptan numeros.")
 
-    producto = None
-
-    for x in productos:
-
-        if int(x["id"]) == id_producto:
-            producto = x
-            break
+    producto = almacen.producto_por_id(id_producto)
 
     if not producto:
         print(f"No se encontro ningun producto con ID {id_producto}")
@@ -1212,12 +1082,15 @@ def modificar_producto() -> None:
             clear()
             print("Valor invalido, ingrese una opción de 1 a 4")
 
+    # Valores del producto antes de modificarlo, para el historial
+    producto_anterior = producto.para_mostrar()
+
     match opcion:
 
         case 1:
 
             nuevo_nombre = input("Ingrese el nuevo nombre: ")
-            producto["nombre"] = nuevo_nombre.strip()
+            almacen.modificar_producto(producto, "nombre", nuevo_nombre.strip())
 
         case 2:
 
@@ -1241,7 +1114,7 @@ def modificar_producto() -> None:
             elif medida == "2":
                 capacidad += "kg"
 
-            producto["capacidad"] = capacidad
+            almacen.modificar_producto(producto, "capacidad", capacidad)
 
         case 3:
 
@@ -1257,17 +1130,18 @@ def modificar_producto() -> None:
                     print("Opción incorrecta\n")
                 else:
                     categoria = categorias[int(categoria) - 1].title()
-                    producto["categoria"] = categoria
+                    almacen.modificar_producto(producto, "categoria", categoria)
                     break
 
         case 4:
             while True:
                 try:
-                    nuevo_precio = int(input("Ingrese el nuevo precio: "))
+                    nuevo_precio = input("Ingrese el nuevo precio: ").strip()
 
-                    if nuevo_precio > 0:
+                    # Se valida el importe ya convertido, pero se pasa el texto: modificar_producto lo convierte
+                    if centavos(nuevo_precio) > 0:
 
-                        producto["precio"] = nuevo_precio
+                        almacen.modificar_producto(producto, "precio", nuevo_precio)
                         break
 
                     else:
@@ -1283,8 +1157,12 @@ def modificar_producto() -> None:
             print("Opcion invalida.")
 
     # Guardar todo
-    guardar_productos(productos)
-    registrar_accion("modificar_producto")
+    if not almacen.guardar_productos():
+        print("\nLos cambios quedan pendientes y se guardarán con el próximo cambio del catálogo.")
+        input("\nENTER para volver al menú")
+        clear()
+        return
+    registrar_accion("modificar_producto", {"producto": producto.id}, *cambios(producto_anterior, producto.para_mostrar()))
 
     print(f"===== Producto ID {id_producto} modificado correctamente =====\n")
 
@@ -1300,12 +1178,12 @@ def modificar_producto() -> None:
                 return
             case "2":
                 clear()
-                return modificar_producto()
+                return modificar_producto(almacen)
             case _:
                 clear()
                 print("===== OPCIÓN INCORRECTA =====")
 
-def buscar_producto() -> None:
+def buscar_producto(almacen: Almacen) -> None:
     """
     Permite buscar productos en el stock por: tipo de pintura y/o capacidad
     Muestra los productos que coincidan con la busqueda
@@ -1317,11 +1195,19 @@ def buscar_producto() -> None:
 
     -capacidad tiene que terminar con L o kg
 
-    -Deben funcionar las funciones clear(), cargar_productos() y registrar_accion()
+    -Deben funcionar las funciones clear(), almacen.productos() y registrar_accion()
 
-    -Debe importarse la función tabulate de la librería tabulate
+    -Debe importarse la función tabla del módulo tablas
 
     PostCondiciones:
+    -Cada filtro se resuelve con el índice de búsqueda del almacén (sin recorrer el catálogo) y se
+     interseca con los resultados anteriores
+
+    -El nombre se busca por palabras sin distinguir acentos ni mayúsculas, aceptando el comienzo de
+     una palabra ("esmalte sint") o errores de tipeo; los resultados se ordenan por cuánto se parecen
+
+    -El precio se busca por rango (mínimo y máximo)
+
     -Se imprimen en pantalla los productos que cumplen con los criterios de búsqueda en formato de tabla
 
     -Si no hay resultados, se muestra que no se encontraron resultados
@@ -1332,7 +1218,7 @@ def buscar_producto() -> None:
 
     """
     # Carga los datos desde el archivo JSON de stock
-    stock = cargar_productos()
+    stock = almacen.productos()
 
 
     # Si no hay productos cargados, sale de la función
@@ -1352,8 +1238,14 @@ def buscar_producto() -> None:
     # Guarda los filtros que ya se aplicaron
     criterios_usados=[]
 
-    # Copia inicial de todos los productos
-    resultados = stock[:]
+    # Indice invertido del catalogo: cada filtro devuelve un conjunto de IDs
+    indice = almacen.indice_busqueda()
+
+    # IDs que cumplen los filtros aplicados (None: todavia no se filtro, es todo el catalogo)
+    ids_resultado = None
+
+    # Puntaje de cada producto en la busqueda por nombre (menor es mejor), para ordenar los resultados
+    puntajes = {}
 
     # Diccionario para mostrar los nombres en palabras de los filtros
     nombres_filtros = {
@@ -1411,11 +1303,11 @@ def buscar_producto() -> None:
             while True:
                 try:
 
-                    listar_productos()
+                    listar_productos(almacen)
 
                     #Pide el id de carga y hace una lista con el resultado que encuentre
                     id_buscar = int(input("Ingrese el ID del producto: "))
-                    resultados = [p for p in resultados if int(p["id"]) == id_buscar]
+                    encontrados = {id_buscar} if almacen.producto_por_id(id_buscar) is not None else set()
                     break
                 except ValueError:
                     clear()
@@ -1425,8 +1317,9 @@ def buscar_producto() -> None:
 
         # Si elige 2, Busca por nombre
         elif criterio == "2":
-            nombre = input("\nIngrese el nombre de la pintura: ").strip().title()
-            resultados = [p for p in resultados if p["nombre"] == nombre]
+            nombre = input("\nIngrese el nombre de la pintura: ").strip()
+            puntajes = indice.puntajes_nombre(nombre)
+            encontrados = puntajes.keys()
 
 
         # Si elige 3, Busca por capacidad
@@ -1439,16 +1332,17 @@ def buscar_producto() -> None:
                 print("Opción incorrecta")
                 capacidad_buscar = input("Ingrese la capacidad (1|5|10|20): ").strip()
 
-            # Hace una lista con los valores que coincidan
-            resultados = [p for p in resultados if p["capacidad"] == f"{capacidad_buscar}L" or p["capacidad"] == f"{capacidad_buscar}kg"]
+            # Une los productos en litros y en kilos de esa capacidad
+            encontrados = indice.por_campo("capacidad", f"{capacidad_buscar}L") | indice.por_campo("capacidad", f"{capacidad_buscar}kg")
 
         #Si elige 4, Busca por precio
         elif criterio == "4":
             while True:
                 try:
-                    #Pide el precio y hace una lista con los valores que coincidan
-                    precio_buscar = int(input("Ingrese el precio: "))
-                    resultados = [p for p in resultados if int(p["precio"]) == precio_buscar]
+                    #Pide el rango de precios (ENTER deja el límite abierto); para un precio exacto, el mismo en ambos
+                    minimo = input("Ingrese el precio mínimo (ENTER sin mínimo): ").strip()
+                    maximo = input("Ingrese el precio máximo (ENTER sin máximo): ").strip()
+                    encontrados = indice.por_precio(centavos(minimo) if minimo else None, centavos(maximo) if maximo else None)
                     break
                 except ValueError:
                     clear()
@@ -1469,9 +1363,14 @@ def buscar_producto() -> None:
                     print("Opción incorrecta\n")
                 else:
                     categoria = categorias[int(categoria) - 1].title()
-                    resultados = [p for p in resultados if p["categoria"] == categoria]
+                    encontrados = indice.por_campo("categoria", categoria)
                     break
 
+        # Aplica el filtro sobre los resultados anteriores
+        ids_resultado = set(encontrados) if ids_resultado is None else intersecar([ids_resultado, encontrados])
+        resultados = [almacen.producto_por_id(id_producto)
+                      for id_producto in sorted(ids_resultado, key=lambda id_producto: (puntajes.get(id_producto, 0), id_producto))]
+
 
         # Guarda el filtro usado y lo elimina de los filtros disponibles
         criterios_usados.append(criterio)
@@ -1488,7 +1387,7 @@ def buscar_producto() -> None:
             # Muestra los resultados en páginas de 5 en 5
             for i in range(0, len(resultados), mostrar):
                 pagina = resultados[i:i + mostrar]
-                print(tabulate(pagina, headers="keys", tablefmt="fancy_grid"))
+                print(tabla([producto.para_mostrar() for producto in pagina], headers="keys", tablefmt="fancy_grid"))
                 print(" " *20 + f"Mostrando {i+1}-{i+len(pagina)} de {len(resultados)} Resultados\n")
 
                 #Si hay más de un resultado, permite agregar otro filtro, avanzar al menú, o avanzar de página en caso de que exista, si no también avanza al menú
@@ -1545,135 +1444,159 @@ def buscar_producto() -> None:
         # Si elige 2, realiza otra búsqueda
         elif opcion == "2":
             clear()
-            return buscar_producto()
+            return buscar_producto(almacen)
 
         else:
             clear()
             print("=========== OPCIÓN INCORRECTA ===========")
 
 
-def registrar_venta() -> None:
+def lineas_de_ticket(ticket: list[dict], metodo_pago: str) -> list[tuple[int, int, Venta]]:
     """
-    Registra una venta, actualiza el stock y guarda en ventas.csv (sin librería csv).
-    
+    Arma las líneas que recibe almacen.registrar_ticket a partir de los productos de un ticket
+
     Precondiciones:
-    - Los archivos stock_data.json y productos.csv deben existir
-    - Debe haber al menos un producto disponible en el stock
-    - El ID del producto debe existir en el stock
-    - La cantidad vendida no debe exceder el stock disponible
-    - El precio debe ser un número positivo (se busca automáticamente o se ingresa manualmente)
-    
+    - Cada elemento de `ticket` tiene id_producto, nombre, categoria, cantidad, precio_unitario y total
+      (los importes en centavos)
+
     Postcondiciones:
-    - Se actualiza el stock restando la cantidad vendida
-    - Se genera un nuevo registro en ventas.csv con ID autoincremental
-    - Se incluye timestamp de la venta, datos del producto, cantidad, precios y método de pago
-    - Se valida el método de pago (Efectivo/Tarjeta/Transferencia)
-    - Si no se encuentra el precio en productos.csv, se solicita ingreso manual
-    - Se muestra confirmación detallada de la venta registrada
-    - El usuario puede registrar múltiples ventas en una misma sesión
-    - En caso de error al guardar, se informa y se cancela la operación
+    - Todas las líneas llevan la fecha y hora actual y el mismo método de pago
+    - id_venta, id_ticket y cargas quedan en 0/vacío: los completa almacen.registrar_ticket
+    """
+
+    fecha_y_hora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    return [
+        (linea["id_producto"], linea["cantidad"], Venta(
+            0,
+            fecha_y_hora,
+            linea["id_producto"],
+            linea["nombre"],
+            linea["categoria"],
+            linea["cantidad"],
+            linea["precio_unitario"],
+            linea["total"],
+            metodo_pago,
+            0,
+            ""
+        ))
+        for linea in ticket
+    ]
+
+
+def armar_ticket(almacen: Almacen) -> tuple[list[dict], dict[int, int], str] | None:
+    """
+    Pide por teclado los productos, cantidades y el método de pago de un ticket, sin guardar nada
+
+    Postcondiciones:
+    - Se muestran los productos con unidades y se cargan líneas hasta que se presiona ENTER sin ID
+    - La cantidad de cada línea no supera el stock del producto (descontando lo que ya está en el ticket)
+    - Si el producto no tiene precio, se solicita ingreso manual
+    - Retorna (líneas del ticket, unidades por id de producto, método de pago),
+      o None si no hay productos para vender
     """
     print("=========== REGISTRAR VENTA ===========")
 
-    # Cargar datos necesarios
-    stock_data = cargar_stock()
-    stock = stock_data.get("stock", [])
-    productos = cargar_productos()
+    # Productos del catalogo con unidades en alguna carga
+    disponibles = [(producto, almacen.stock_de_producto(producto)) for producto in almacen.productos()]
+    disponibles = [(producto, unidades) for producto, unidades in disponibles if unidades > 0]
 
-    if not stock:
+    if not disponibles:
         print("No hay productos disponibles para vender.")
         input("Presione ENTER para volver al menú...")
         clear()
-        return
-
-    #Flag para saber si al menos un producto tiene stock
-    hay_stock=False
+        return None
 
     # Mostrar productos disponibles en stock
     print("\n--- PRODUCTOS DISPONIBLES EN STOCK ---")
-    for producto in stock:
-        if producto["cantidad"]>0:
-            hay_stock=True
-            print(f"ID: {producto['id']} - {producto['tipo']} {producto['capacidad']} - Stock: {producto['cantidad']}")
-            print("--------------------------------------")
-    if not hay_stock:
-        print("No hay productos disponibles para vender.")
-        input("Presione ENTER para volver al menú...")
-        clear()
-        return
+    for producto, unidades in disponibles:
+        print(f"ID: {producto.id} - {producto.nombre} {producto.capacidad} - Stock: {unidades}")
+        print("--------------------------------------")
 
-    # --- Solicitar ID del producto ---
-    while True:
-        try:
-            id_producto = int(input("\nIngrese el ID del producto vendido: ").strip())
-            
-            producto_stock = next((p for p in stock if int(p["id"]) == id_producto), None)
-            if producto_stock is None:
-                print("No se encontró un producto con ese ID en el stock.")
-                continue
-            
-            cantidad_disponible = int(producto_stock.get("cantidad", 0))
-            if cantidad_disponible <= 0:
-                print("El producto no tiene stock disponible.")
-                continue
-                
-            break
-        except ValueError:
-            print("Ingrese un número válido para el ID.")
+    # Lineas del ticket y unidades de cada producto que ya estan en el ticket
+    ticket = []
+    en_ticket = {}
 
-    # --- Solicitar cantidad ---
     while True:
-        try:
-            cantidad_disponible = int(producto_stock.get("cantidad", 0))
-            cantidad_vendida = int(input("Ingrese la cantidad vendida: ").strip())
-            
-            if cantidad_vendida <= 0:
-                print("La cantidad debe ser mayor que cero.")
-                continue
-            if cantidad_vendida > cantidad_disponible:
-                print(f"No hay suficiente stock disponible. Stock actual: {cantidad_disponible}")
-                continue
-            break
-        except ValueError:
-            print("Ingrese un número válido para la cantidad.")
 
-    # --- Obtener datos del producto ---
-    tipo_buscar = producto_stock.get("tipo", "Desconocido")
-    capacidad_buscar = producto_stock.get("capacidad", "Sin categoría")
-    
-    # Buscar precio en la lista de productos cargada
-    precio_unitario = 0.0
-    categoria_encontrada = "Sin categoría"
-    nombre_encontrado = tipo_buscar
-    
-    for producto in productos:
-        # En productos.csv es "nombre", en stock es "tipo" - pero son el mismo dato
-        if (producto.get("nombre", "") == tipo_buscar and 
-            producto.get("capacidad", "") == capacidad_buscar):
+        # --- Solicitar ID del producto ---
+        while True:
             try:
-                precio_unitario = float(producto.get("precio", 0))
-                categoria_encontrada = producto.get("categoria", "Sin categoría")
-                nombre_encontrado = producto.get("nombre", tipo_buscar)
+                texto_id = input("\nIngrese el ID del producto vendido (ENTER para terminar el ticket): ").strip()
+
+                if texto_id == "" and ticket:
+                    break
+                
+                id_producto = int(texto_id)
+
+                producto = almacen.producto_por_id(id_producto)
+                if producto is None:
+                    print("No se encontró un producto con ese ID.")
+                    continue
+                
+                cantidad_disponible = almacen.stock_de_producto(producto) - en_ticket.get(id_producto, 0)
+                if cantidad_disponible <= 0:
+                    print("El producto no tiene stock disponible.")
+                    continue
+                    
                 break
             except ValueError:
-                continue
+                print("Ingrese un número válido para el ID.")
+
+        if texto_id == "":
+            break
 
-    # Si no se encontró precio, pedirlo manualmente
-    if precio_unitario == 0:
-        print(f"\nNo se encontró precio automáticamente para: {tipo_buscar} {capacidad_buscar}")
+        # --- Solicitar cantidad ---
         while True:
             try:
-                precio_input = input("Ingrese el precio unitario manualmente: $").strip()
-                precio_unitario = float(precio_input)
-                if precio_unitario <= 0:
-                    print("El precio debe ser mayor que cero.")
+                cantidad_vendida = int(input("Ingrese la cantidad vendida: ").strip())
+                
+                if cantidad_vendida <= 0:
+                    print("La cantidad debe ser mayor que cero.")
+                    continue
+                if cantidad_vendida > cantidad_disponible:
+                    print(f"No hay suficiente stock disponible. Stock actual: {cantidad_disponible}")
                     continue
                 break
             except ValueError:
-                print("Ingrese un precio válido.")
+                print("Ingrese un número válido para la cantidad.")
+
+        # --- Obtener datos del producto ---
+        nombre_encontrado = producto.nombre
+        capacidad_buscar = producto.capacidad
+        categoria_encontrada = producto.categoria
+        precio_unitario = producto.precio
+
+        # Si el producto no tiene precio, pedirlo manualmente
+        if precio_unitario == 0:
+            print(f"\nNo se encontró precio automáticamente para: {nombre_encontrado} {capacidad_buscar}")
+            while True:
+                try:
+                    precio_input = input("Ingrese el precio unitario manualmente: $").strip()
+                    precio_unitario = centavos(precio_input)
+                    if precio_unitario <= 0:
+                        print("El precio debe ser mayor que cero.")
+                        continue
+                    break
+                except ValueError:
+                    print("Ingrese un precio válido.")
 
-    # --- Calcular total ---
-    total_venta = round(precio_unitario * cantidad_vendida, 2)
+        # --- Calcular total de la linea (en centavos, sin redondeos) ---
+        total_venta = precio_unitario * cantidad_vendida
+
+        ticket.append({
+            "id_producto": id_producto,
+            "nombre": nombre_encontrado,
+            "capacidad": capacidad_buscar,
+            "categoria": categoria_encontrada,
+            "cantidad": cantidad_vendida,
+            "precio_unitario": precio_unitario,
+            "total": total_venta
+        })
+        en_ticket[id_producto] = en_ticket.get(id_producto, 0) + cantidad_vendida
+
+        print(f"Agregado: {nombre_encontrado} {capacidad_buscar} x{cantidad_vendida} = ${pesos(total_venta)}")
+        print(f"Total del ticket: ${pesos(sum(linea['total'] for linea in ticket))}")
 
     # --- Solicitar método de pago ---
     while True:
@@ -1681,73 +1604,94 @@ def registrar_venta() -> None:
         if metodo_pago == "":
             metodo_pago = "No especificado"
             break
-        elif metodo_pago in ["Efectivo", "Tarjeta", "Transferencia"]:
+        elif metodo_pago in METODOS_PAGO:
             break
         else:
             print("Método de pago no válido. Use: Efectivo, Tarjeta o Transferencia")
 
-    # --- Actualizar stock ---
-    producto_stock["cantidad"] = cantidad_disponible - cantidad_vendida
+    return ticket, en_ticket, metodo_pago
 
-    try:
-        with open("stock_data.json", "w", encoding="utf-8") as archivo:
-            json.dump(stock_data, archivo, indent=4, ensure_ascii=False)
-    except Exception as e:
-        print(f"Error al actualizar el stock: {e}")
-        return
 
-    # --- Generar ID autoincremental de venta ---
-    id_venta = 1
-    if os.path.exists("ventas.csv"):
+def registrar_venta(almacen: Almacen) -> None:
+    """
+    Registra un ticket con uno o más productos, actualiza el stock y guarda las ventas (sin librería csv).
+    
+    Precondiciones:
+    - Los archivos stock_data.json y productos.csv deben existir
+    - Debe haber al menos un producto del catálogo con unidades en el stock
+    - El ID ingresado es el ID del producto en productos.csv
+    - La cantidad vendida no debe exceder el stock del producto (descontando lo que ya está en el ticket)
+    - El precio debe ser un número positivo (se toma del producto o se ingresa manualmente)
+    
+    Postcondiciones:
+    - Se cargan productos al ticket hasta que se presiona ENTER sin ID
+    - Las unidades vendidas se descuentan de las cargas del producto en orden FIFO
+      (primero la carga más vieja) y cada venta registra de qué cargas salió
+    - Al confirmar, se descuenta el stock de todas las líneas y se guardan todas las ventas
+      en una sola operación: se guarda el ticket completo o nada
+    - Cada línea es una venta en ventas.csv con ID autoincremental; todas comparten el mismo id_ticket
+    - Si otra caja vendió unidades de algún producto mientras tanto, se vuelve a empezar con el stock actual
+    - Si el ticket no se pudo guardar, se informa y se vuelve al menú sin registrar ninguna venta
+    - Se incluye timestamp de la venta, datos del producto, cantidad, precios y método de pago
+    - Se valida el método de pago (Efectivo/Tarjeta/Transferencia), uno para todo el ticket
+    - Si el producto no tiene precio, se solicita ingreso manual
+    - Se muestra confirmación detallada del ticket registrado
+    - El usuario puede registrar múltiples tickets en una misma sesión
+    """
+    while True:
+
+        armado = armar_ticket(almacen)
+
+        if armado is None:
+            return
+
+        ticket, en_ticket, metodo_pago = armado
+
+        # --- Guardar el ticket: descuento del stock y ventas juntos (todo o nada) ---
+        # Se descuenta sobre el stock actual: si otra caja vendio mientras tanto, se vuelve a empezar
         try:
-            with open("ventas.csv", "r", encoding="utf-8") as archivo:
-                lineas = archivo.readlines()
-                if len(lineas) > 1:
-                    for i in range(len(lineas)-1, 0, -1):
-                        if lineas[i].strip():
-                            partes = lineas[i].strip().split(",")
-                            if partes and partes[0].isdigit():
-                                id_venta = int(partes[0]) + 1
-                                break
-        except Exception as e:
-            print(f"Error al leer ventas.csv: {e}")
-
-    # --- Crear registro de venta ---
-    fecha_y_hora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    venta = [
-        str(id_venta),
-        fecha_y_hora,
-        str(id_producto),
-        nombre_encontrado,
-        categoria_encontrada,
-        str(cantidad_vendida),
-        f"{precio_unitario:.2f}",
-        f"{total_venta:.2f}",
-        metodo_pago
-    ]
+            id_ticket = almacen.registrar_ticket(lineas_de_ticket(ticket, metodo_pago))
 
-    # --- Guardar o crear ventas.csv ---
-    try:
-        nuevo = not os.path.exists("ventas.csv")
-        with open("ventas.csv", "a", encoding="utf-8") as archivo:
-            if nuevo:
-                archivo.write("id_venta,fecha_y_hora,id_producto,nombre_producto,categoria,cantidad,precio_unitario,total,metodo_pago\n")
-            archivo.write(",".join(venta) + "\n")
-    except Exception as e:
-        print(f"Error al guardar la venta: {e}")
+        except StockInsuficiente:
+
+            print("\nNo se pudo registrar el ticket, otra caja pudo haber vendido esas unidades.")
+            for id_producto in en_ticket:
+                producto = almacen.producto_por_id(id_producto)
+                print(f"Stock actual de ID {id_producto}: {almacen.stock_de_producto(producto) if producto else 0}")
+            input("ENTER para volver a intentar")
+            clear()
+            continue
+
+        break
+
+    # El stock alcanzaba pero no se pudo guardar: no se registro ninguna venta
+    if id_ticket is None:
+        print("\nEl ticket no pudo ser guardado, no se registró ninguna venta.")
+        input("\nENTER para volver al menú")
+        clear()
         return
 
+    total_ticket = sum(linea["total"] for linea in ticket)
+
     # --- Confirmación ---
     print("\n===== VENTA REGISTRADA CORRECTAMENTE =====")
-    print(f"ID Venta: {id_venta}")
-    print(f"Producto: {nombre_encontrado} {capacidad_buscar}")
-    print(f"Categoría: {categoria_encontrada}")
-    print(f"Cantidad: {cantidad_vendida}")
-    print(f"Precio unitario: ${precio_unitario:.2f}")
-    print(f"Total: ${total_venta:.2f}")
+    print(f"Ticket: {id_ticket}")
+    registrar_accion("registrar_venta", {"ticket": id_ticket, "producto": sorted(en_ticket)},
+                     despues={"unidades": sum(en_ticket.values()), "total": pesos(total_ticket), "metodo_pago": metodo_pago})
+    print(tabla(
+        [[f"{linea['nombre']} {linea['capacidad']}", linea["categoria"], linea["cantidad"],
+          f"${pesos(linea['precio_unitario'])}", f"${pesos(linea['total'])}"] for linea in ticket],
+        headers=["Producto", "Categoría", "Cantidad", "Precio unitario", "Total"], tablefmt="grid"))
+    print(f"Total: ${pesos(total_ticket)}")
     print(f"Método de pago: {metodo_pago}")
     print("===========================================")
+
+    # --- Alertas de stock bajo de los productos vendidos ---
+    for bajo in almacen.stock_bajo():
+        if bajo["id_producto"] in en_ticket:
+            print(f"Atención: stock bajo de {bajo['producto']} {bajo['capacidad']} "
+                  f"({bajo['cantidad']} unidades, umbral {bajo['umbral']})")
     
     while True:
         print("1. Volver al menú principal")
@@ -1760,46 +1704,44 @@ def registrar_venta() -> None:
             return
         elif opcion == "2":
             clear()
-            return registrar_venta()
+            return registrar_venta(almacen)
         else:
             clear()
             print("=========== OPCIÓN INCORRECTA ===========")
 
 
-def mostrar_stock_bajo() -> None:
+def mostrar_stock_bajo(almacen: Almacen) -> None:
     """
     Muestra todos los productos cuyo stock sea menor a un valor mínimo
     Sirve para identificar productos que deben reponerse
 
     Precondiciones:
-    - Deben funcionar las funciones clear(), cargar_productos() y registrar_accion()
-    - El json debe tener una estructura correcta, conteniendo una clave de "stock", que sea una lista de diccionarios
-    donde cada diccionario representa un producto con las claves "tipo" y "cantidad", Y una clave de "umbrales" con un diccionario que relacione
-    cada tipo de pintura con su cantidad minima permitida
+    - Deben funcionar las funciones clear(), almacen.stock_bajo() y registrar_accion()
     - Los valores de "cantidad" y de los umbrales deben ser enteros o convertibles a enteros
-    - Debe importarse la función tabulate de la librería tabulate
+    - Debe importarse la función tabla del módulo tablas
 
     Postcondiciones:
     - Si el stock está vacío, se muestra el mensaje "No hay productos cargados." y la función termina
+    - Se compara con su umbral el total de cada producto sumando todas sus cargas; los productos sin umbral no se muestran
+    - La comparación se hace sobre las columnas de unidades y umbrales que el almacén mantiene con cada cambio
+      (no se recorre el stock)
     - Si existen productos con cantidad menor o igual a su umbral se muestran en formato de tabla en páginas de 5 productos
     - Si ningun producto esta debajo de su umbral, muestra un mensaje informandolo y permite volver al menú
     """
-    # Carga los datos desde el archivo JSON
-    stock_data = cargar_stock()
-
-    # Obtiene la lista de productos y los umbrales de stock mínimo
-    stock = stock_data.get("stock", [])
-    umbrales = stock_data.get("umbrales", {})
-
-
-    if not stock:
+    if not almacen.stock():
         print("No hay productos cargados.")
         input("\nENTER para ir al menú")
         clear()
         return
 
-    # Filtra los productos por su umbral minimo
-    stock_bajo = [p for p in stock if p["cantidad"] <= umbrales[p["tipo"]]]
+    # Productos cuyo total no supera su umbral minimo
+    stock_bajo = almacen.stock_bajo()
+
+    if not stock_bajo:
+        print("No hay productos con stock bajo.")
+        input("\nENTER para ir al menú")
+        clear()
+        return
 
     # Cantidad de resultados que muestra cada página
     mostrar = 5
@@ -1808,7 +1750,7 @@ def mostrar_stock_bajo() -> None:
     for i in range(0, len(stock_bajo), mostrar):
         print("========================= PRODUCTOS CON STOCK BAJO =========================")
         pagina = stock_bajo[i:i + mostrar]
-        print(tabulate(pagina, headers="keys", tablefmt="fancy_grid"))
+        print(tabla(pagina, headers="keys", tablefmt="fancy_grid"))
         print(" " * 20 + f"Mostrando {i + 1}-{i + len(pagina)} de {len(stock_bajo)} Resultados\n")
 
         # Si hay más productos para mostrar
@@ -1828,52 +1770,56 @@ def mostrar_stock_bajo() -> None:
             return
 
 
-def mostrar_ventas() -> None:
+def pedir_fecha(mensaje: str) -> str | None:
     """
-    Muestra las ventas y su fecha de realizacion
+    Pide una fecha AAAA-MM-DD; ENTER la deja sin límite
+
+    Postcondiciones:
+    - Devuelve la fecha ingresada (validada) o None si se dejó vacía
+    """
+
+    while True:
+
+        fecha = input(mensaje).strip()
+
+        if not fecha:
+            return None
+
+        try:
+
+            datetime.strptime(fecha, "%Y-%m-%d")
+
+            return fecha
+
+        except ValueError:
+
+            print("Fecha inválida. Use el formato AAAA-MM-DD.")
+
+
+def mostrar_ventas(almacen: Almacen) -> None:
+    """
+    Muestra las ventas y su fecha de realizacion, de a una página por vez
     
     Precondiciones:
     - El archivo ventas.csv debe existir (opcional)
-    - El módulo tabulate debe estar instalado y disponible
     - Las ventas deben tener la estructura esperada con los campos requeridos
     
     Postcondiciones:
-    - Muestra todas las ventas registradas en formato de tabla ordenada
-    - Los datos incluyen: ID venta, fecha/hora, ID producto, nombre, categoría, cantidad, precios y método de pago
+    - Muestra las ventas en páginas de TAMANO_PAGINA_VENTAS, empezando por las más recientes
+    - Solo se leen del almacenamiento las ventas de la página mostrada
+    - Permite avanzar, retroceder, ir a una página y filtrar por rango de fechas
+    - Los datos incluyen: ID venta, ticket, fecha/hora, ID producto, nombre, categoría, cantidad, precios y método de pago
     - Los precios se muestran formateados con símbolo de dólar
     - Si no hay ventas registradas, se informa y retorna al menú
     - No modifica ningún dato, solo realiza una operación de lectura
     - Proporciona opción para volver al menú principal
     - La tabla utiliza formato grid para mejor visualización
     """
-    print("=========== REPORTES ===========")
-
-    ventas = cargar_ventas()
-
-    if not ventas:
-        print("No hay ventas registradas para mostrar.")
-        input("Presione ENTER para volver al menú...")
-        return
-
-    # Convertir los datos para tabulate
-    tabla_datos = []
-    for venta in ventas:
-        fila = [
-            venta.get('id_venta', ''),
-            venta.get('fecha_y_hora', ''),
-            venta.get('id_producto', ''),
-            venta.get('nombre_producto', ''),
-            venta.get('categoria', ''),
-            venta.get('cantidad', ''),
-            f"${venta.get('precio_unitario', '0')}",
-            f"${venta.get('total', '0')}",
-            venta.get('metodo_pago', '')
-        ]
-        tabla_datos.append(fila)
 
     # Definir encabezados 
     encabezados = [
         'ID Venta',
+        'Ticket',
         'Fecha y Hora', 
         'ID Producto',
         'Nombre Producto',
@@ -1884,22 +1830,115 @@ def mostrar_ventas() -> None:
         'Método Pago'
     ]
 
-    print(tabulate(tabla_datos, headers=encabezados, tablefmt="grid"))
+    numero = 0
+    desde = hasta = None
 
     while True:
-        print("\n1. Volver al menú")
+
+        print("=========== REPORTES ===========")
+
+        ventas, total = almacen.pagina_ventas(numero, TAMANO_PAGINA_VENTAS, desde, hasta)
+
+        if total == 0 and desde is None and hasta is None:
+            print("No hay ventas registradas para mostrar.")
+            input("Presione ENTER para volver al menú...")
+            return
+
+        paginas = max(1, -(-total // TAMANO_PAGINA_VENTAS))
+
+        # Si el total bajo (por ejemplo, al filtrar), se muestra la ultima pagina disponible
+        if numero >= paginas:
+            numero = paginas - 1
+            ventas, total = almacen.pagina_ventas(numero, TAMANO_PAGINA_VENTAS, desde, hasta)
+
+        if desde is not None or hasta is not None:
+            print(f"Filtro: desde {desde or 'el inicio'} hasta {hasta or 'hoy'}")
+
+        if ventas:
+
+            # Convertir los datos para la tabla
+            tabla_datos = []
+            for venta in ventas:
+                fila = [
+                    venta.id_venta,
+                    venta.id_ticket,
+                    venta.fecha_y_hora,
+                    venta.id_producto,
+                    venta.nombre_producto,
+                    venta.categoria,
+                    venta.cantidad,
+                    f"${pesos(venta.precio_unitario)}",
+                    f"${pesos(venta.total)}",
+                    venta.metodo_pago
+                ]
+                tabla_datos.append(fila)
+
+            print(tabla(tabla_datos, headers=encabezados, tablefmt="grid"))
+
+        else:
+            print("No hay ventas en el rango de fechas elegido.")
+
+        print(f"\nPágina {numero + 1} de {paginas} ({total} ventas)")
+        print("ENTER/S. Siguiente   A. Anterior   P. Ir a página   F. Filtrar por fecha")
+        print("1. Volver al menú")
         print("===========================================")
-        opcion = input("Seleccione una opción: ")
+        opcion = input("Seleccione una opción: ").strip().upper()
 
         if opcion == "1":
             clear()
             return
-        else:
-            clear()
-            print("===== OPCIÓN INCORRECTA =====")
+
+        elif opcion in ("", "S"):
+
+            if numero + 1 < paginas:
+                numero += 1
+
+        elif opcion == "A":
+
+            if numero > 0:
+                numero -= 1
+
+        elif opcion == "P":
+
+            destino = input(f"Número de página (1-{paginas}): ").strip()
+
+            if destino.isdigit() and 1 <= int(destino) <= paginas:
+                numero = int(destino) - 1
+
+        elif opcion == "F":
+
+            desde = pedir_fecha("Desde (AAAA-MM-DD, ENTER sin límite): ")
+            hasta = pedir_fecha("Hasta (AAAA-MM-DD, ENTER sin límite): ")
+            numero = 0
+
+        clear()
 
 
-def exportar_stock_csv() -> None:
+def exportar_stock(almacen: Almacen, nombre_archivo: str = ARCHIVO_EXPORTADO) -> int:
+    """
+    Escribe todas las cargas del stock en un CSV (id,tipo,capacidad,cantidad) y retorna cuántas escribió
+
+    Postcondiciones:
+    - Crea o sobrescribe `nombre_archivo` en UTF-8
+    - Los errores de escritura (OSError) se propagan a quien llama
+    """
+
+    stock = almacen.stock()
+
+    # Crea y escribe el csv
+    with open(nombre_archivo, "w", encoding="utf-8") as archivo:
+        # Escribir encabezado
+        archivo.write("id,tipo,capacidad,cantidad\n")
+
+        # Escribe cada producto
+        for carga in stock:
+            linea = f"{carga.id},{carga.tipo},{carga.capacidad},{carga.cantidad}\n"
+            archivo.write(linea)
+
+    return len(stock)
+
+
+def exportar_stock_csv(almacen: Almacen) -> None:
     """
     Exporta todos los datos del stock a un archivo CSV
     
@@ -1923,7 +1962,7 @@ def exportar_stock_csv() -> None:
 
     try:
         # Cargar los datos del stock
-        stock_data = cargar_stock()
+        stock_data = almacen.datos_stock()
         stock = stock_data.get("stock", [])
         
         if not stock:
@@ -1931,20 +1970,12 @@ def exportar_stock_csv() -> None:
 
         
         # Archivo exportado
-        nombre_archivo = "stock_exportado.csv"
-        
-        # Crea y escribe el csv
-        with open(nombre_archivo, "w", encoding="utf-8") as archivo:
-            # Escribir encabezado
-            archivo.write("id,tipo,capacidad,cantidad\n")
-            
-            # Escribe cada producto
-            for producto in stock:
-                linea = f"{producto['id']},{producto['tipo']},{producto['capacidad']},{producto['cantidad']}\n"
-                archivo.write(linea)
-        
+        nombre_archivo = ARCHIVO_EXPORTADO
+
+        exportados = exportar_stock(almacen, nombre_archivo)
+
         print(f"Stock exportado correctamente a: {nombre_archivo}")
-        print(f"Total de productos exportados: {len(stock)}")
+        print(f"Total de productos exportados: {exportados}")
         
     except Exception as e:
 
@@ -1960,4 +1991,261 @@ def exportar_stock_csv() -> None:
             return
         else:
             clear()
-            print("===== OPCIÓN INCORRECTA =====")
\ No newline at end of file
+            print("===== OPCIÓN INCORRECTA =====")
+
+
+def reporte_ventas(almacen: Almacen) -> None:
+    """
+    Muestra ingresos y unidades vendidas agrupados por período, categoría, producto o método de pago
+    
+    Precondiciones:
+    - El archivo ventas.csv debe existir (opcional)
+    
+    Postcondiciones:
+    - Las ventas se recorren una sola vez al entrar; cada agrupación se muestra a partir de ese resumen
+    - En día, semana y mes se muestran los últimos LIMITE_PERIODOS_REPORTE períodos;
+      las demás agrupaciones se ordenan de mayor a menor ingreso
+    - El ranking de productos muestra los TOP_PRODUCTOS_REPORTE con más ingresos
+    - No modifica ningún dato, solo realiza una operación de lectura
+    - Si no hay ventas registradas, se informa y retorna al menú
+    """
+
+    resumen = almacen.resumen_ventas()
+
+    if not resumen["ventas"]:
+        print("=========== REPORTE DE VENTAS ===========")
+        print("No hay ventas registradas para mostrar.")
+        input("Presione ENTER para volver al menú...")
+        clear()
+        return
+
+    opciones = [
+        ("1", "Por día", "dia", "Día"),
+        ("2", "Por semana", "semana", "Semana"),
+        ("3", "Por mes", "mes", "Mes"),
+        ("4", "Por categoría", "categoria", "Categoría"),
+        ("5", "Por producto", "producto", "ID Producto"),
+        ("6", "Por método de pago", "metodo_pago", "Método Pago"),
+        ("7", f"Top {TOP_PRODUCTOS_REPORTE} productos", None, None)
+    ]
+
+    while True:
+
+        print("=========== REPORTE DE VENTAS ===========")
+        print(f"Ventas: {resumen['ventas']} | Unidades: {resumen['unidades']} | Ingresos: ${pesos(resumen['ingresos'])}")
+        print()
+
+        for clave, texto, _, _ in opciones:
+            print(f"{clave}. {texto}")
+
+        print("0. Volver al menú")
+        print("===========================================")
+        opcion = input("Seleccione una opción: ")
+        clear()
+
+        if opcion == "0":
+            return
+
+        for clave, texto, agrupacion, titulo in opciones:
+
+            if opcion != clave:
+                continue
+
+            print(f"=========== VENTAS {texto.upper()} ===========")
+
+            if agrupacion is None:
+
+                encabezados = ["Puesto", "ID Producto", "Nombre", "Ventas", "Unidades", "Ingresos"]
+                tabla_datos = [
+                    [puesto, id_producto, resumen["nombres"][id_producto], ventas, unidades, f"${pesos(ingresos)}"]
+                    for puesto, (id_producto, (ventas, unidades, ingresos))
+                    in enumerate(top_productos(resumen, TOP_PRODUCTOS_REPORTE), start=1)
+                ]
+
+            else:
+
+                # Los periodos se muestran de los mas recientes hacia atras, el resto por ingresos
+                if agrupacion in ("dia", "semana", "mes"):
+                    grupos = sorted(resumen[agrupacion].items(), reverse=True)[:LIMITE_PERIODOS_REPORTE]
+                else:
+                    grupos = sorted(resumen[agrupacion].items(), key=lambda par: par[1][2], reverse=True)
+
+                encabezados = [titulo, "Ventas", "Unidades", "Ingresos"]
+                tabla_datos = [[grupo, ventas, unidades, f"${pesos(ingresos)}"]
+                               for grupo, (ventas, unidades, ingresos) in grupos]
+
+                if agrupacion == "producto":
+                    encabezados.insert(1, "Nombre")
+                    for fila in tabla_datos:
+                        fila.insert(1, resumen["nombres"][fila[0]])
+
+            print(tabla(tabla_datos, headers=encabezados, tablefmt="grid"))
+            input("\nPresione ENTER para volver al reporte...")
+            clear()
+            break
+
+        else:
+            print("===== OPCIÓN INCORRECTA =====")
+
+
+def cierre_del_dia(almacen: Almacen) -> None:
+    """
+    Muestra los totales de ventas de un día por categoría y por método de pago (cierre de caja)
+    
+    Precondiciones:
+    - `almacen` debe ser el Almacen de la sesión
+    - Las fechas ingresadas deben tener el formato AAAA-MM-DD (se validan con pedir_fecha)
+    
+    Postcondiciones:
+    - Los totales se leen de los acumulados del día, que se actualizan con cada venta, sin recorrer ventas.csv
+    - Por defecto muestra el día de hoy; se puede elegir otra fecha
+    - Permite reconstruir los acumulados desde cero recorriendo todas las ventas
+    - No modifica ventas ni stock
+    """
+
+    dia = datetime.now().strftime("%Y-%m-%d")
+
+    while True:
+
+        print(f"=========== CIERRE DEL DÍA {dia} ===========")
+
+        acumulado = almacen.acumulado_del_dia(dia)
+
+        if acumulado is None:
+            print("No hay ventas registradas en el día.")
+        else:
+            ventas, unidades, ingresos = acumulado["total"]
+            print(f"Ventas: {ventas} | Unidades: {unidades} | Ingresos: ${pesos(ingresos)}\n")
+
+            for dimension, titulo in (("metodo_pago", "Método Pago"), ("categoria", "Categoría")):
+                tabla_datos = [[clave, ventas, unidades, f"${pesos(ingresos)}"] for clave, (ventas, unidades, ingresos)
+                               in sorted(acumulado[dimension].items(), key=lambda par: par[1][2], reverse=True)]
+                print(tabla(tabla_datos, headers=[titulo, "Ventas", "Unidades", "Ingresos"], tablefmt="grid"))
+
+        print("\n1. Volver al menú")
+        print("2. Ver otra fecha")
+        print("3. Reconstruir acumulados desde todas las ventas")
+        print("===========================================")
+        opcion = input("Seleccione una opción: ")
+
+        if opcion == "1":
+            clear()
+            return
+        elif opcion == "2":
+            dia = pedir_fecha("Fecha (AAAA-MM-DD, ENTER para hoy): ") or datetime.now().strftime("%Y-%m-%d")
+            clear()
+        elif opcion == "3":
+            almacen.reconstruir_acumulado()
+            clear()
+            print("Acumulados reconstruidos.")
+        else:
+            clear()
+            print("===== OPCIÓN INCORRECTA =====")
+
+
+def texto_cambios(evento: dict) -> str:
+    """
+    Resume los valores de un evento del historial: "campo: antes → después" (o solo uno de los dos)
+    """
+
+    antes = evento.get("antes", {})
+    despues = evento.get("despues", {})
+    partes = []
+
+    for campo in list(antes) + [campo for campo in despues if campo not in antes]:
+        if campo in antes and campo in despues:
+            partes.append(f"{campo}: {antes[campo]} → {despues[campo]}")
+        else:
+            partes.append(f"{campo}: {antes.get(campo, despues.get(campo))}")
+
+    return ", ".join(partes)
+
+
+def mostrar_historial(almacen: Almacen) -> None:
+    """
+    Muestra el historial de acciones filtrado por fechas y, opcionalmente, por un producto, carga o ticket
+
+    Precondiciones:
+    - Las fechas se ingresan como AAAA-MM-DD (ENTER deja el límite abierto)
+
+    Postcondiciones:
+    - Solo se leen los archivos del historial de los días del rango que tienen a esa entidad
+      (ver historial.EscritorHistorial.consultar)
+    - Los eventos se muestran en orden cronológico, en páginas de TAMANO_PAGINA_HISTORIAL
+    - No modifica ningún dato
+    """
+
+    print("=========== HISTORIAL DE ACCIONES ===========")
+
+    desde = pedir_fecha("Desde (AAAA-MM-DD, ENTER sin límite): ")
+    hasta = pedir_fecha("Hasta (AAAA-MM-DD, ENTER sin límite): ")
+
+    tipos = {"1": "producto", "2": "carga", "3": "ticket"}
+    entidad = None
+
+    opcion = input("Filtrar por 1: Producto | 2: Carga | 3: Ticket (ENTER para ver todo): ").strip()
+
+    while opcion in tipos:
+        try:
+            entidad = (tipos[opcion], int(input(f"Ingrese el ID del {tipos[opcion]}: ")))
+            break
+        except ValueError:
+            print("El ID debe ser un número.")
+
+    eventos = historial.escritor.consultar(desde, hasta, entidad)
+
+    clear()
+
+    if not eventos:
+        print("No hay acciones registradas con ese filtro.")
+        input("\nENTER para ir al menú")
+        clear()
+        return
+
+    for i in range(0, len(eventos), TAMANO_PAGINA_HISTORIAL):
+
+        print("=========== HISTORIAL DE ACCIONES ===========")
+        pagina = eventos[i:i + TAMANO_PAGINA_HISTORIAL]
+        print(tabla([[evento["fecha"].replace("T", " "), evento.get("usuario", ""), evento.get("descripcion", evento["accion"]),
+                      ", ".join(f"{tipo} {', '.join(map(str, historial.ids_de(ids)))}"
+                                for tipo, ids in evento.get("entidades", {}).items()),
+                      texto_cambios(evento)] for evento in pagina],
+                    headers=["Fecha", "Usuario", "Acción", "Entidades", "Cambios"], tablefmt="grid"))
+        print(" " * 20 + f"Mostrando {i + 1}-{i + len(pagina)} de {len(eventos)} acciones\n")
+
+        if i + TAMANO_PAGINA_HISTORIAL < len(eventos):
+            seguir = input("Ingrese (1) para volver al menú, ENTER para ver más acciones: ").strip()
+            clear()
+            if seguir == "1":
+                return
+        else:
+            input("ENTER para ir al menú: ")
+            clear()
+
+
+def mostrar_estadisticas(almacen: Almacen) -> None:
+    """
+    Muestra las estadísticas de la instrumentación de la sesión (opción oculta "e" del menú)
+
+    Precondiciones:
+    - La instrumentación se activa con STOCK_METRICAS=1 o "python main.py --metricas" (ver metricas.py)
+
+    Postcondiciones:
+    - Muestra por serie (acciones del menú, entrada/salida de persistencia, backend y pantalla)
+      las llamadas, el tiempo total, promedio, p50, p95 y máximo, y los bytes leídos y escritos
+    - Si la instrumentación está apagada, informa cómo activarla
+    - No modifica ningún dato
+    """
+
+    print("=========== ESTADÍSTICAS ===========")
+
+    if not metricas.activas():
+        print("Las estadísticas están desactivadas (STOCK_METRICAS=1 o python main.py --metricas).")
+    elif not (filas := metricas.estadisticas()):
+        print("Todavía no hay mediciones.")
+    else:
+        print(tabla(filas, headers="keys", tablefmt="grid"))
+        print(f"\nSe guardan al salir en {metricas.ARCHIVO_METRICAS}")
+
+    input("\nENTER para volver al menú")
+    clear()
@@ -0,0 +1,398 @@
+# Historial de acciones: eventos JSONL por dia, escritos en segundo plano y consultables por fecha y entidad
+
+import atexit
+import getpass
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from persistencia import BloqueoArchivo
+
+# En el directorio actual, junto a los demas archivos de datos
+DIRECTORIO_HISTORIAL = "historial"
+
+# Indice de los segmentos, una linea JSON por segmento o por lote escrito:
+# {"segmento": "AAAA-MM-DD.jsonl", "desde", "hasta", "eventos", "entidades": {tipo: [ids]}}
+# Las lineas del mismo segmento se suman al leerlo (ver cargar_indice)
+ARCHIVO_INDICE = "indice.jsonl"
+
+# Indice de versiones anteriores, un solo JSON {segmento: datos}; se pasa a ARCHIVO_INDICE al rotar
+ARCHIVO_INDICE_ANTERIOR = "indice.json"
+ARCHIVO_BLOQUEO_HISTORIAL = "historial.lock"
+
+# Cada cuantos milisegundos se escriben juntas las acciones pendientes (0: cada accion apenas llega)
+INTERVALO_HISTORIAL_MS = int(os.environ.get("HISTORIAL_INTERVALO_MS", "200"))
+
+# Marca para que el hilo termine despues de escribir lo pendiente
+_FIN = object()
+
+
+def usuario_actual() -> str:
+    """
+    Devuelve el usuario del sistema operativo que usa el programa (o "desconocido")
+    """
+
+    try:
+
+        return getpass.getuser()
+
+    except (KeyError, OSError):
+
+        return "desconocido"
+
+
+def ids_de(valor) -> list:
+    """
+    Devuelve los ids de una entidad de un evento, que puede tener un id o una lista
+    """
+
+    if valor is None:
+        return []
+
+    return valor if isinstance(valor, list) else [valor]
+
+
+def sumar_al_indice(indice: dict[str, dict], segmento: str, datos: dict) -> None:
+    """
+    Suma al índice {segmento: datos} el rango de fechas, los eventos y las entidades de `datos`
+
+    Postcondiciones:
+    - Si el segmento no estaba, se agrega; si estaba, se amplía su rango de fechas, se suman
+      los eventos y se agregan las entidades nuevas (sin repetir ids)
+    """
+
+    if segmento not in indice:
+        indice[segmento] = {"desde": datos["desde"], "hasta": datos["hasta"], "eventos": 0, "entidades": {}}
+
+    actual = indice[segmento]
+    actual["desde"] = min(actual["desde"], datos["desde"])
+    actual["hasta"] = max(actual["hasta"], datos["hasta"])
+    actual["eventos"] += datos["eventos"]
+
+    for tipo, nuevos in datos["entidades"].items():
+        ids = actual["entidades"].setdefault(tipo, [])
+        ids.extend(id_nuevo for id_nuevo in dict.fromkeys(nuevos) if id_nuevo not in ids)
+
+
+def segmento_de(fecha: str) -> str:
+    """
+    Devuelve el archivo de segmento de un evento según su fecha ("2025-11-05T16:42:08" -> "2025-11-05.jsonl")
+    """
+
+    return fecha[:10] + ".jsonl"
+
+
+class EscritorHistorial:
+    """
+    Escribe los eventos del historial desde un hilo aparte, uno por línea (JSONL),
+    en un archivo por día (segmento) dentro de `directorio`.
+
+    Precondiciones:
+    - Cada evento es un diccionario con al menos "fecha" (AAAA-MM-DDTHH:MM:SS) y "accion";
+      "entidades" ({tipo: id o lista de ids}) es opcional
+    - `intervalo_ms` es cada cuánto se escriben los eventos acumulados; con 0 cada evento
+      se escribe y se vacía al disco apenas llega (más durable, más escrituras)
+
+    Postcondiciones:
+    - escribir() solo encola el evento: no convierte a JSON, no abre archivos ni espera al disco
+    - El hilo escribe cada lote de una vez en su segmento y agrega al índice de segmentos una línea
+      con el rango de fechas y las entidades del lote; el índice solo se reescribe entero (en un
+      temporal, con una línea por segmento) cuando el lote empieza un segmento nuevo
+    - La escritura de cada lote toma un bloqueo del directorio: varias cajas pueden compartir el historial
+    - Al terminar el programa (atexit) se escribe todo lo pendiente
+    - Los errores al escribir se informan por pantalla pero no interrumpen el programa ni el hilo:
+      se pierde el lote que falló y se siguen escribiendo los siguientes
+    """
+
+    def __init__(self, directorio: str = DIRECTORIO_HISTORIAL, intervalo_ms: int = INTERVALO_HISTORIAL_MS) -> None:
+
+        self.directorio = directorio
+        self.intervalo = intervalo_ms / 1000
+        self._cola = queue.Queue()
+        self._hilo = None
+        self._candado = threading.Lock()
+        self._bloqueo = BloqueoArchivo(os.path.join(directorio, ARCHIVO_BLOQUEO_HISTORIAL))
+
+        atexit.register(self.cerrar)
+
+    def escribir(self, evento: dict) -> None:
+        """
+        Encola un evento para escribirlo en el historial
+        """
+
+        with self._candado:
+
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._trabajar, name="historial", daemon=True)
+                self._hilo.start()
+
+        self._cola.put(evento)
+
+    def _lote(self) -> list:
+        """
+        Espera el primer evento y junta los que lleguen durante el intervalo (o los ya encolados si es 0)
+        """
+
+        lote = [self._cola.get()]
+        limite = time.monotonic() + self.intervalo
+
+        while lote[-1] is not _FIN:
+
+            espera = limite - time.monotonic()
+
+            try:
+                lote.append(self._cola.get(timeout=espera) if espera > 0 else self._cola.get_nowait())
+            except queue.Empty:
+                break
+
+        return lote
+
+    def cargar_indice(self) -> dict[str, dict]:
+        """
+        Lee el índice de segmentos (vacío si todavía no hay historial)
+
+        Postcondiciones:
+        - Retorna {segmento: {"desde", "hasta", "eventos", "entidades"}}, sumando las líneas de cada segmento
+        - Incluye el índice de versiones anteriores (indice.json) si todavía existe
+        - Las líneas incompletas o inválidas se ignoran
+        """
+
+        try:
+
+            with open(os.path.join(self.directorio, ARCHIVO_INDICE_ANTERIOR), "r", encoding="utf-8") as archivo:
+                indice = json.load(archivo)
+
+        except (FileNotFoundError, json.JSONDecodeError):
+
+            indice = {}
+
+        try:
+
+            with open(os.path.join(self.directorio, ARCHIVO_INDICE), "r", encoding="utf-8") as archivo:
+
+                for linea in archivo:
+
+                    try:
+                        datos = json.loads(linea)
+                        sumar_al_indice(indice, datos["segmento"], datos)
+                    except (json.JSONDecodeError, KeyError, TypeError):
+                        continue
+
+        except FileNotFoundError:
+
+            pass
+
+        return indice
+
+    def _guardar_indice(self, indice: dict[str, dict]) -> None:
+        """
+        Reescribe el índice con una línea por segmento y borra el de versiones anteriores
+        """
+
+        ruta = os.path.join(self.directorio, ARCHIVO_INDICE)
+
+        with open(ruta + ".tmp", "w", encoding="utf-8") as archivo:
+            archivo.write("".join(json.dumps({"segmento": segmento, **datos}, ensure_ascii=False) + "\n"
+                                  for segmento, datos in sorted(indice.items())))
+
+        os.replace(ruta + ".tmp", ruta)
+
+        anterior = os.path.join(self.directorio, ARCHIVO_INDICE_ANTERIOR)
+
+        if os.path.exists(anterior):
+            os.remove(anterior)
+
+    def _escribir_lote(self, eventos: list[dict]) -> None:
+        """
+        Agrega los eventos a sus segmentos y suma sus fechas y entidades al índice
+        """
+
+        por_segmento = {}
+
+        for evento in eventos:
+            por_segmento.setdefault(segmento_de(evento["fecha"]), []).append(evento)
+
+        os.makedirs(self.directorio, exist_ok=True)
+
+        with self._bloqueo:
+            self._agregar_segmentos(por_segmento)
+
+    def _agregar_segmentos(self, por_segmento: dict[str, list[dict]]) -> None:
+        """
+        Con el bloqueo tomado, agrega los eventos de cada segmento y sus datos al índice
+
+        Postcondiciones:
+        - Si todos los segmentos ya existían, solo se agrega una línea por segmento al final del índice
+        - Si alguno es nuevo (cambió el día), se relee el índice y se reescribe compactado
+        """
+
+        lineas = {}
+        rota = False
+
+        for segmento, del_segmento in por_segmento.items():
+
+            ruta = os.path.join(self.directorio, segmento)
+            rota = rota or not os.path.exists(ruta)
+
+            with open(ruta, "a", encoding="utf-8") as archivo:
+                archivo.write("".join(json.dumps(evento, ensure_ascii=False) + "\n" for evento in del_segmento))
+
+            fechas = [evento["fecha"] for evento in del_segmento]
+            entidades = {}
+
+            for evento in del_segmento:
+                for tipo, id_entidad in evento.get("entidades", {}).items():
+                    entidades.setdefault(tipo, []).extend(ids_de(id_entidad))
+
+            lineas[segmento] = {"desde": min(fechas), "hasta": max(fechas), "eventos": len(del_segmento),
+                                "entidades": {tipo: list(dict.fromkeys(ids)) for tipo, ids in entidades.items()}}
+
+        if rota:
+
+            indice = self.cargar_indice()
+
+            for segmento, datos in lineas.items():
+                sumar_al_indice(indice, segmento, datos)
+
+            self._guardar_indice(indice)
+
+        else:
+
+            with open(os.path.join(self.directorio, ARCHIVO_INDICE), "a", encoding="utf-8") as archivo:
+                archivo.write("".join(json.dumps({"segmento": segmento, **datos}, ensure_ascii=False) + "\n"
+                                      for segmento, datos in lineas.items()))
+
+    def _trabajar(self) -> None:
+        """
+        Bucle del hilo: escribe cada lote de eventos y actualiza el índice
+        """
+
+        terminar = False
+
+        while not terminar:
+
+            lote = self._lote()
+            terminar = lote[-1] is _FIN
+            eventos = [evento for evento in lote if evento is not _FIN]
+
+            try:
+
+                if eventos:
+                    self._escribir_lote(eventos)
+
+            except OSError as e:
+
+                print(f"Error del sistema al registrar el historial: {e}")
+
+            # Cualquier otro error (un evento que no se puede convertir a JSON, sin fecha, ...) pierde
+            # solo ese lote: el hilo sigue atendiendo la cola, si no vaciar() y consultar() no terminarian
+            except Exception as e:
+
+                print(f"Error al registrar el historial: {e!r}")
+
+            finally:
+
+                for _ in lote:
+                    self._cola.task_done()
+
+    def vaciar(self) -> None:
+        """
+        Espera a que todos los eventos encolados hasta ahora estén escritos
+        """
+
+        if self._hilo is not None:
+            self._cola.join()
+
+    def cerrar(self) -> None:
+        """
+        Escribe lo pendiente y termina el hilo (se llama sola al salir del programa)
+        """
+
+        with self._candado:
+
+            if self._hilo is None:
+                return
+
+            hilo, self._hilo = self._hilo, None
+
+        self._cola.put(_FIN)
+        hilo.join()
+
+    def consultar(self, desde: str | None = None, hasta: str | None = None,
+                  entidad: tuple[str, int] | None = None) -> list[dict]:
+        """
+        Devuelve los eventos entre dos fechas (AAAA-MM-DD, inclusive), opcionalmente de una entidad
+
+        Precondiciones:
+        - `entidad` es (tipo, id), por ejemplo ("producto", 12)
+
+        Postcondiciones:
+        - Primero se escriben los eventos pendientes
+        - Con el índice se eligen los segmentos cuyo rango de fechas se cruza con el pedido y que
+          tienen a la entidad: solo se leen esos archivos
+        - Los eventos se devuelven en orden cronológico; un límite en None no filtra
+        """
+
+        self.vaciar()
+
+        eventos = []
+
+        for segmento, datos in sorted(self.cargar_indice().items()):
+
+            if desde is not None and datos["hasta"][:10] < desde:
+                continue
+
+            if hasta is not None and datos["desde"][:10] > hasta:
+                continue
+
+            if entidad is not None and entidad[1] not in datos["entidades"].get(entidad[0], []):
+                continue
+
+            with open(os.path.join(self.directorio, segmento), "r", encoding="utf-8") as archivo:
+
+                for linea in archivo:
+
+                    try:
+                        evento = json.loads(linea)
+                    except json.JSONDecodeError:
+                        continue
+
+                    fecha = evento.get("fecha", "")[:10]
+
+                    if desde is not None and fecha < desde or hasta is not None and fecha > hasta:
+                        continue
+
+                    if entidad is not None and entidad[1] not in ids_de(evento.get("entidades", {}).get(entidad[0])):
+                        continue
+
+                    eventos.append(evento)
+
+        eventos.sort(key=lambda evento: evento["fecha"])
+
+        return eventos
+
+
+def nuevo_evento(accion: str, descripcion: str, entidades: dict | None = None,
+                 antes: dict | None = None, despues: dict | None = None) -> dict:
+    """
+    Arma un evento del historial con la fecha y hora actual y el usuario del sistema
+
+    Postcondiciones:
+    - Las claves opcionales (entidades, antes, despues) solo se incluyen si se indican
+    """
+
+    evento = {"fecha": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"), "accion": accion,
+              "descripcion": descripcion, "usuario": USUARIO}
+
+    for clave, valor in (("entidades", entidades), ("antes", antes), ("despues", despues)):
+        if valor:
+            evento[clave] = valor
+
+    return evento
+
+
+# Usuario de la sesion y escritor compartido por todo el programa
+USUARIO = usuario_actual()
+escritor = EscritorHistorial()
@@ -0,0 +1,167 @@
+# Lectura por paginas de ventas.csv sin cargar todo el archivo en memoria
+
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator
+from registros import Venta
+
+
+class IndiceVentas:
+    """
+    Índice con la posición (byte) donde empieza cada venta de ventas.csv.
+    Permite leer cualquier página saltando directo a esa posición del archivo.
+
+    Precondiciones:
+    - `ruta` es el archivo de ventas, con encabezado en la primera línea
+    - Las ventas se agregan al final en orden cronológico (como hace registrar_venta),
+      lo que permite buscar un rango de fechas por bisección
+
+    Postcondiciones:
+    - El índice guarda solo un entero por venta; los datos de cada venta se leen del disco
+      únicamente cuando se muestran, y recién ahí se convierten a Venta
+    - Si el archivo creció, solo se indexan las líneas nuevas; si fue reemplazado, se reindexa
+    - Las líneas vacías y la última línea incompleta (sin salto de línea) no se indexan
+    """
+
+    def __init__(self, ruta: str) -> None:
+
+        self.ruta = ruta
+        self._reiniciar(None)
+
+    def _reiniciar(self, inodo: int | None) -> None:
+        """
+        Vacía el índice (archivo nuevo, reemplazado o inexistente)
+        """
+
+        self.encabezado = []
+        self._inicios = array("q")
+        self._escaneado = 0
+        self._inodo = inodo
+
+    def actualizar(self) -> None:
+        """
+        Agrega al índice las ventas escritas desde la última vez (o lo rehace si el archivo cambió)
+        """
+
+        try:
+
+            estado = os.stat(self.ruta)
+
+        except OSError:
+
+            self._reiniciar(None)
+
+            return
+
+        if estado.st_ino != self._inodo or estado.st_size < self._escaneado:
+            self._reiniciar(estado.st_ino)
+
+        if estado.st_size == self._escaneado:
+            return
+
+        with open(self.ruta, "rb") as archivo:
+
+            archivo.seek(self._escaneado)
+            posicion = self._escaneado
+
+            for linea in archivo:
+
+                # Linea que se esta escribiendo: se indexa en la proxima actualizacion
+                if not linea.endswith(b"\n"):
+                    break
+
+                if posicion == 0:
+                    self.encabezado = linea.decode("utf-8").strip().split(",")
+                elif linea.strip():
+                    self._inicios.append(posicion)
+
+                posicion += len(linea)
+
+        self._escaneado = posicion
+
+    def __len__(self) -> int:
+
+        return len(self._inicios)
+
+    def _leer_linea(self, archivo, numero: int) -> list[str]:
+        """
+        Lee los campos de la venta número `numero` (0 = la primera del archivo)
+        """
+
+        archivo.seek(self._inicios[numero])
+
+        return archivo.readline().decode("utf-8").strip().split(",")
+
+    def rango_fechas(self, desde: str | None = None, hasta: str | None = None) -> range:
+        """
+        Devuelve el rango de números de venta con fecha entre `desde` y `hasta` (AAAA-MM-DD, inclusive)
+
+        Postcondiciones:
+        - Cada límite se busca por bisección, leyendo unas pocas líneas del archivo
+        - Un límite en None no filtra
+        """
+
+        self.actualizar()
+
+        inicio, fin = 0, len(self)
+
+        if desde is None and hasta is None:
+            return range(inicio, fin)
+
+        with open(self.ruta, "rb") as archivo:
+
+            def fecha(numero: int) -> str:
+                campos = self._leer_linea(archivo, numero)
+                return campos[1][:10] if len(campos) > 1 else ""
+
+            if desde is not None:
+                inicio = bisect_left(range(fin), desde, key=fecha)
+
+            if hasta is not None:
+                fin = bisect_right(range(fin), hasta, lo=inicio, key=fecha)
+
+        return range(inicio, fin)
+
+    def leer(self, numeros) -> Iterator[Venta]:
+        """
+        Genera las ventas indicadas (números de venta dentro del índice); las líneas con datos inválidos se omiten
+        """
+
+        numeros = list(numeros)
+
+        if not numeros:
+            return
+
+        with open(self.ruta, "rb") as archivo:
+
+            for numero in numeros:
+
+                try:
+                    yield Venta.desde_texto(self._leer_linea(archivo, numero))
+                except ValueError:
+                    continue
+
+    def pagina(self, numero: int, tamano: int, desde: str | None = None, hasta: str | None = None,
+               recientes_primero: bool = True) -> tuple[list[Venta], int]:
+        """
+        Devuelve una página de ventas y la cantidad total de ventas que cumplen el filtro
+
+        Precondiciones:
+        - `numero` es la página empezando en 0 y `tamano` la cantidad de ventas por página
+
+        Postcondiciones:
+        - Con `recientes_primero` la página 0 tiene las últimas ventas registradas
+        - Solo se leen del disco las ventas de esa página
+        """
+
+        rango = self.rango_fechas(desde, hasta)
+        total = len(rango)
+
+        if recientes_primero:
+            fin = total - numero * tamano
+            numeros = reversed(rango[max(0, fin - tamano):max(0, fin)])
+        else:
+            numeros = rango[numero * tamano:(numero + 1) * tamano]
+
+        return list(self.leer(numeros)), total
@@ -1,7 +1,17 @@
+import sys
+import metricas
 from funciones_crud import *
+from pantalla import iniciar
 
 def main():
 
+    # Datos de la sesion: se leen una vez y se comparten entre todas las acciones
+    almacen = Almacen()
+    metricas.instrumentar_backend(almacen.backend)
+
+    # Salida con buffer: cada pantalla se escribe de una vez antes de pedir una opcion
+    iniciar()
+
     while True:
         opciones = [
             ("1", "Agregar stock", agregar_stock),
@@ -16,9 +26,15 @@ def main():
             ("10", "Mostrar ventas", mostrar_ventas),
             ("11", "Exportar stock a csv", exportar_stock_csv),
             ("12", "Modificar Umbrales", modificar_umbrales),
+            ("13", "Reporte de ventas", reporte_ventas),
+            ("14", "Cierre del día", cierre_del_dia),
+            ("15", "Historial de acciones", mostrar_historial),
             ("0", "Salir", None)
         ]
 
+        # Opciones que no se muestran en el menu
+        ocultas = [("e", "Estadísticas", mostrar_estadisticas)]
+
         while True:
             print("===== SISTEMA DE STOCK - CENTRO PINTURERIAS =====")
             for clave, texto, funcion in opciones:
@@ -28,16 +44,26 @@ def main():
             opcion = input("Seleccione una opción: ")
             clear()
 
-            for clave, texto, funcion in opciones:
+            for clave, texto, funcion in opciones + ocultas:
                 if opcion == clave:
                     if clave == "0":
                         print("Saliendo del sistema...")
+                        almacen.cerrar()
                         return
-                    funcion()
+                    metricas.ejecutar_accion(funcion.__name__, funcion, almacen)
                     break
             else:
                 print("Opción inválida.")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+
+    # --metricas y --perfil ACCION activan la instrumentacion (ver metricas.py) en el menu o en la linea de comandos
+    argumentos = metricas.configurar(sys.argv[1:])
+
+    # Con argumentos se usa la linea de comandos (ver cli.py); sin argumentos, el menu
+    if argumentos:
+        from cli import ejecutar
+        sys.exit(ejecutar(argumentos))
+
+    main()
@@ -0,0 +1,326 @@
+# Instrumentacion opcional: tiempos, llamadas y bytes de las acciones del menu y de la entrada/salida
+#
+# Se activa con la variable de entorno STOCK_METRICAS=1 o con "python main.py --metricas";
+# STOCK_PERFIL=accion (o --perfil accion) ademas perfila con cProfile la primera ejecucion de esa accion.
+# Apagada no reemplaza ninguna funcion, asi que no cuesta nada.
+
+import atexit
+import cProfile
+import functools
+import json
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+
+ARCHIVO_METRICAS = os.environ.get("STOCK_METRICAS_ARCHIVO", "metricas.json")
+
+# Limites superiores (en milisegundos) de los intervalos del histograma de latencias;
+# el ultimo intervalo junta todo lo que supera el mayor limite
+LIMITES_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+# Funciones de persistencia que leen o escriben archivos
+PREFIJOS_IO = ("cargar_", "guardar_", "agregar_")
+FUNCIONES_IO = ("agregados_ventas", "agregados_ventas_csv", "reproducir_diario")
+
+# Metodos del backend (archivos o SQLite) que se miden
+PREFIJOS_BACKEND = ("cargar_", "guardar_", "registrar_", "agregados_", "pagina_", "acumulado_", "compactar",
+                    "reconstruir_")
+
+# Funciones de funciones_crud que arman o limpian la pantalla
+FUNCIONES_PANTALLA = ("tabla", "escribir_tabla", "clear")
+
+# Estado de la instrumentacion, se decide una sola vez en configurar()
+_estado = {"activas": False, "perfil": None}
+_series = {}
+_candado = threading.Lock()
+
+
+def contadores_io() -> tuple[int, int] | None:
+    """
+    Devuelve (bytes leídos, bytes escritos) por el proceso hasta ahora, de /proc/self/io (Linux)
+
+    Postcondiciones:
+    - Cuenta lo que pasa por read/write del sistema (rchar, wchar), aunque venga de la caché
+    - Retorna None si el sistema no lo informa
+    """
+
+    try:
+
+        with open("/proc/self/io", "r", encoding="ascii") as archivo:
+
+            valores = dict(linea.split(": ") for linea in archivo.read().splitlines())
+
+    except (OSError, ValueError):
+
+        return None
+
+    return int(valores["rchar"]), int(valores["wchar"])
+
+
+class Serie:
+    """
+    Mediciones acumuladas de una función instrumentada
+
+    Postcondiciones:
+    - Guarda la cantidad de llamadas, el tiempo total y máximo, un histograma de latencias
+      con los intervalos de LIMITES_MS y, si se cuentan, los bytes leídos y escritos
+    """
+
+    __slots__ = ("llamadas", "total", "maximo", "histograma", "leidos", "escritos")
+
+    def __init__(self) -> None:
+
+        self.llamadas = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.histograma = [0] * (len(LIMITES_MS) + 1)
+        self.leidos = 0
+        self.escritos = 0
+
+    def sumar(self, segundos: float, leidos: int = 0, escritos: int = 0) -> None:
+
+        self.llamadas += 1
+        self.total += segundos
+        self.maximo = max(self.maximo, segundos)
+        self.histograma[bisect_left(LIMITES_MS, segundos * 1000)] += 1
+        self.leidos += leidos
+        self.escritos += escritos
+
+    def percentil(self, fraccion: float) -> float:
+        """
+        Estima un percentil de la latencia (en segundos) con el límite superior de su intervalo
+        del histograma; en el último intervalo, sin límite, usa el máximo
+        """
+
+        objetivo = fraccion * self.llamadas
+        acumulado = 0
+
+        for posicion, cantidad in enumerate(self.histograma):
+
+            acumulado += cantidad
+
+            if acumulado >= objetivo and posicion < len(LIMITES_MS):
+                return min(LIMITES_MS[posicion] / 1000, self.maximo)
+
+        return self.maximo
+
+    def como_dict(self) -> dict:
+
+        return {"llamadas": self.llamadas, "total_s": round(self.total, 6), "maximo_s": round(self.maximo, 6),
+                "histograma_ms": dict(zip([f"<={limite}" for limite in LIMITES_MS] + [f">{LIMITES_MS[-1]}"],
+                                          self.histograma)),
+                "bytes_leidos": self.leidos, "bytes_escritos": self.escritos}
+
+
+def activas() -> bool:
+    """
+    Indica si la instrumentación está activada
+    """
+
+    return _estado["activas"]
+
+
+def registrar(nombre: str, segundos: float, antes: tuple | None = None, despues: tuple | None = None) -> None:
+    """
+    Suma una llamada de `segundos` a la serie `nombre` (la crea si no existe), con los bytes
+    entre los contadores de entrada/salida `antes` y `despues` si se indican
+    """
+
+    leidos = escritos = 0
+
+    if antes is not None and despues is not None:
+        leidos, escritos = despues[0] - antes[0], despues[1] - antes[1]
+
+    with _candado:
+        _series.setdefault(nombre, Serie()).sumar(segundos, leidos, escritos)
+
+
+def medida(nombre: str, funcion, contar_io: bool = False):
+    """
+    Devuelve `funcion` envuelta para que cada llamada se sume a la serie `nombre`
+
+    Postcondiciones:
+    - Con `contar_io` también se suman los bytes leídos y escritos por el proceso durante la llamada
+    - Las excepciones se propagan igual (la llamada se mide de todos modos)
+    """
+
+    @functools.wraps(funcion)
+    def envuelta(*args, **kwargs):
+
+        antes = contadores_io() if contar_io else None
+        inicio = time.perf_counter()
+
+        try:
+
+            return funcion(*args, **kwargs)
+
+        finally:
+
+            registrar(nombre, time.perf_counter() - inicio, antes, contadores_io() if contar_io else None)
+
+    return envuelta
+
+
+def instrumentar(objeto, nombres, prefijo: str, contar_io: bool = False) -> None:
+    """
+    Reemplaza en `objeto` (un módulo o una instancia) cada función de `nombres` por su versión medida,
+    en la serie "prefijo.nombre"
+
+    Postcondiciones:
+    - Solo cambia los nombres que existen; las referencias tomadas antes (from x import y) no cambian
+    """
+
+    for nombre in nombres:
+
+        funcion = getattr(objeto, nombre, None)
+
+        if callable(funcion):
+            setattr(objeto, nombre, medida(f"{prefijo}.{nombre}", funcion, contar_io))
+
+
+def instrumentar_backend(backend) -> None:
+    """
+    Mide los métodos de lectura y escritura del backend de la sesión (archivos o SQLite), con sus bytes
+
+    Postcondiciones:
+    - Si la instrumentación está apagada no hace nada
+    """
+
+    if activas():
+        instrumentar(backend, [nombre for nombre in dir(type(backend)) if nombre.startswith(PREFIJOS_BACKEND)],
+                     "backend", contar_io=True)
+
+
+def configurar(argv: list[str]) -> list[str]:
+    """
+    Activa la instrumentación si se pidió por variable de entorno o por argumento
+
+    Precondiciones:
+    - `argv` son los argumentos del programa sin su nombre
+
+    Postcondiciones:
+    - Retorna `argv` sin --metricas ni --perfil ACCION, para el menú o la línea de comandos
+    - Si está activada, mide las funciones de entrada/salida de persistencia y las de pantalla
+      de funciones_crud, y guarda las estadísticas en ARCHIVO_METRICAS al salir del programa
+    """
+
+    perfil = os.environ.get("STOCK_PERFIL") or None
+    activar = os.environ.get("STOCK_METRICAS", "") not in ("", "0") or perfil is not None
+    restantes = []
+    argumentos = iter(argv)
+
+    for argumento in argumentos:
+
+        if argumento == "--metricas":
+            activar = True
+        elif argumento == "--perfil":
+            perfil = next(argumentos, None)
+            activar = True
+        else:
+            restantes.append(argumento)
+
+    if activar and not _estado["activas"]:
+
+        import persistencia
+        import funciones_crud
+
+        _estado["activas"] = True
+        _estado["perfil"] = perfil
+
+        instrumentar(persistencia, [nombre for nombre in dir(persistencia) if nombre.startswith(PREFIJOS_IO)]
+                     + list(FUNCIONES_IO), "io", contar_io=True)
+        instrumentar(funciones_crud, FUNCIONES_PANTALLA, "pantalla")
+
+        atexit.register(guardar)
+
+    return restantes
+
+
+def _perfilar(nombre: str, funcion, *args):
+    """
+    Ejecuta una acción con cProfile y guarda el perfil en perfil_<accion>.prof (para pstats o snakeviz)
+    y un resumen de las 30 funciones con más tiempo acumulado en perfil_<accion>.txt
+    """
+
+    perfil = cProfile.Profile()
+
+    try:
+
+        return perfil.runcall(funcion, *args)
+
+    finally:
+
+        perfil.dump_stats(f"perfil_{nombre}.prof")
+
+        with open(f"perfil_{nombre}.txt", "w", encoding="utf-8") as archivo:
+            pstats.Stats(perfil, stream=archivo).sort_stats("cumulative").print_stats(30)
+
+
+def ejecutar_accion(nombre: str, funcion, *args):
+    """
+    Ejecuta una acción del menú o de la línea de comandos, midiéndola si la instrumentación está activada
+
+    Postcondiciones:
+    - Apagada, solo llama a funcion(*args)
+    - Activada, suma la llamada a la serie "accion.nombre"; si `nombre` es la acción a perfilar,
+      la primera vez se ejecuta con cProfile (ver _perfilar)
+    - Retorna lo que retorna la acción
+    """
+
+    if not _estado["activas"]:
+        return funcion(*args)
+
+    inicio = time.perf_counter()
+
+    try:
+
+        if _estado["perfil"] == nombre:
+            _estado["perfil"] = None
+            return _perfilar(nombre, funcion, *args)
+
+        return funcion(*args)
+
+    finally:
+
+        registrar(f"accion.{nombre}", time.perf_counter() - inicio)
+
+
+def estadisticas() -> list[dict]:
+    """
+    Devuelve una fila por serie medida, de la de más tiempo total a la de menos
+
+    Postcondiciones:
+    - Cada fila tiene nombre, llamadas, total, promedio, p50, p95 y máximo (en milisegundos)
+      y los bytes leídos y escritos
+    """
+
+    with _candado:
+        series = sorted(_series.items(), key=lambda par: par[1].total, reverse=True)
+
+    return [{"serie": nombre, "llamadas": serie.llamadas, "total_ms": round(serie.total * 1000, 1),
+             "promedio_ms": round(serie.total * 1000 / serie.llamadas, 2),
+             "p50_ms": round(serie.percentil(0.5) * 1000, 2), "p95_ms": round(serie.percentil(0.95) * 1000, 2),
+             "max_ms": round(serie.maximo * 1000, 2), "leidos": serie.leidos, "escritos": serie.escritos}
+            for nombre, serie in series]
+
+
+def guardar() -> None:
+    """
+    Escribe las estadísticas de la sesión en ARCHIVO_METRICAS (se llama sola al salir del programa)
+    """
+
+    with _candado:
+        series = {nombre: serie.como_dict() for nombre, serie in sorted(_series.items())}
+
+    try:
+
+        with open(ARCHIVO_METRICAS, "w", encoding="utf-8") as archivo:
+            json.dump({"fecha": datetime.now().isoformat(timespec="seconds"), "series": series},
+                      archivo, ensure_ascii=False, indent=4)
+
+    except OSError as e:
+
+        print(f"No se pudieron guardar las métricas: {e}")
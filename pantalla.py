@@ -0,0 +1,79 @@
+# Manejo de la pantalla de la terminal sin ejecutar comandos externos
+
+import io
+import os
+import sys
+
+# Cursor arriba a la izquierda, borrar la pantalla y el historial de desplazamiento
+LIMPIAR = "\x1b[H\x1b[2J\x1b[3J"
+
+# Tamano del buffer de la salida: alcanza para una pantalla completa del menu
+TAMANO_BUFFER = 1 << 16
+
+# Estado de la terminal, se decide una sola vez en iniciar()
+_estado = {"iniciada": False, "ansi": False}
+
+
+def _activar_ansi_windows() -> bool:
+    """
+    Activa las secuencias ANSI en la consola de Windows; retorna False si no se pudo
+    """
+
+    try:
+
+        import ctypes
+
+        kernel32 = ctypes.windll.kernel32
+        consola = kernel32.GetStdHandle(-11)
+        modo = ctypes.c_uint32()
+
+        if not kernel32.GetConsoleMode(consola, ctypes.byref(modo)):
+            return False
+
+        # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+        return bool(kernel32.SetConsoleMode(consola, modo.value | 0x0004))
+
+    except (ImportError, AttributeError, OSError):
+
+        return False
+
+
+def iniciar() -> None:
+    """
+    Prepara la salida para el menú interactivo
+
+    Postcondiciones:
+    - Si la salida es una terminal, se reemplaza sys.stdout por una con buffer grande y sin vaciado
+      por línea: cada pantalla se escribe de una vez cuando input() vacía la salida antes de leer
+    - Si la salida no es una terminal (archivo, tubería), no se cambia nada y limpiar() no escribe
+    - Llamarla más de una vez no tiene efecto
+    """
+
+    if _estado["iniciada"]:
+        return
+
+    _estado["iniciada"] = True
+
+    if not sys.stdout.isatty():
+        return
+
+    _estado["ansi"] = os.name != "nt" or _activar_ansi_windows()
+
+    sys.stdout.flush()
+    sys.stdout = io.TextIOWrapper(open(sys.stdout.fileno(), "wb", buffering=TAMANO_BUFFER, closefd=False),
+                                  encoding=sys.stdout.encoding, errors=sys.stdout.errors, line_buffering=False)
+
+
+def limpiar() -> None:
+    """
+    Limpia la pantalla escribiendo la secuencia ANSI en el buffer de la salida (sin vaciarlo)
+
+    Postcondiciones:
+    - Si la salida no es una terminal o la consola no admite ANSI, no hace nada
+      (la pantalla siguiente se escribe a continuación)
+    """
+
+    iniciar()
+
+    if _estado["ansi"]:
+        sys.stdout.write(LIMPIAR)
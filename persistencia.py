@@ -0,0 +1,1000 @@
+# Funciones de persistencia: lectura y escritura de los archivos de datos del sistema
+
+import json
+import os
+from collections.abc import Iterator
+from operator import itemgetter
+from lector_ventas import IndiceVentas
+import reportes
+from registros import Carga, Producto, Venta, serializable
+from reportes import CAMPOS_REPORTE, acumulado_desde_agregados, agregados_ventas, agregados_ventas_csv, sumar_al_acumulado
+
+try:
+    import fcntl
+except ImportError:  # Windows no tiene fcntl
+    fcntl = None
+    import msvcrt
+
+ARCHIVO_PRODUCTOS = "productos.csv"
+ARCHIVO_STOCK = "stock_data.json"
+ARCHIVO_DIARIO = "stock_diario.jsonl"
+ARCHIVO_VENTAS = "ventas.csv"
+ARCHIVO_BLOQUEO = "stock.lock"
+ARCHIVO_SECUENCIAS = "secuencias.json"
+
+# Acumulados de ventas: un archivo por dia (AAAA-MM-DD.json) y el estado con la ultima venta sumada
+DIRECTORIO_ACUMULADO = "ventas_acumulado"
+ARCHIVO_ESTADO_ACUMULADO = "estado.json"
+
+# Acumulados de versiones anteriores, todos los dias en un solo archivo; se borra al reconstruir
+ARCHIVO_ACUMULADO_ANTERIOR = "ventas_acumulado.json"
+
+# Tamaño del diario de stock a partir del cual se compacta en stock_data.json
+LIMITE_DIARIO = 256 * 1024
+
+ENCABEZADO_VENTAS = ("id_venta,fecha_y_hora,id_producto,nombre_producto,categoria,cantidad,"
+                     "precio_unitario,total,metodo_pago,id_ticket,cargas")
+
+# Columnas agregadas a ventas.csv despues de la primera version y su valor para las ventas viejas
+# (id_ticket: cada venta vieja es su propio ticket; cargas: no se registraron)
+COLUMNAS_NUEVAS_VENTAS = {"id_ticket": lambda valores: valores[0], "cargas": lambda valores: ""}
+
+def firma_archivo(ruta: str) -> tuple[int, int] | None:
+    """
+    Devuelve la firma (fecha de modificación, tamaño) de un archivo.
+
+    Precondiciones:
+    - `ruta` debe ser un string con la ruta del archivo
+
+    Postcondiciones:
+    - Retorna una tupla (mtime en nanosegundos, tamaño en bytes)
+    - Si el archivo no existe, retorna None
+    """
+
+    try:
+
+        estado = os.stat(ruta)
+
+    except OSError:
+
+        return None
+
+    return estado.st_mtime_ns, estado.st_size
+
+def cargar_ventas() -> list[Venta]:
+    """
+    Lee ventas.csv y devuelve una lista de ventas (registros Venta)
+    
+    Precondiciones:
+    - El archivo ventas.csv debe existir en el directorio actual (opcional)
+    - El archivo debe tener encoding UTF-8
+    - La primera línea debe contener los encabezados separados por comas
+    - Cada línea subsiguiente debe representar una venta con los mismos campos que el encabezado
+    
+    Postcondiciones:
+    - Retorna una lista de Venta, con los ids y cantidades como enteros y los precios en centavos
+    - Las ventas de versiones anteriores (sin id_ticket o sin cargas) se completan (ver Venta)
+    - Si el archivo no existe, retorna una lista vacía
+    - Si ocurre un error durante la lectura, se muestra un mensaje y retorna lista vacía
+    - Las líneas mal formateadas, con valores numéricos inválidos o vacías son omitidas
+    """
+    
+    ventas = []
+    
+    try:
+        with open(ARCHIVO_VENTAS, "r", encoding="utf-8") as archivo:
+            lineas = archivo.readlines()
+            
+            if lineas:
+                columnas = len(lineas[0].strip().split(","))
+                
+                for linea in lineas[1:]:
+
+                    if linea.strip():
+
+                        valores = linea.strip().split(",")
+
+                        if len(valores) == columnas:
+
+                            try:
+                                ventas.append(Venta.desde_texto(valores))
+                            except ValueError:
+                                continue
+    
+    except FileNotFoundError:
+
+        print("Archivo no encontrado.")
+
+        return ventas
+
+    except Exception as e:
+
+        print(f"Error al cargar ventas.csv: {e}")
+    
+    return ventas
+
+
+def recorrer_ventas() -> Iterator[tuple[str, ...]]:
+    """
+    Recorre ventas.csv línea por línea sin cargarlo en memoria
+
+    Postcondiciones:
+    - Genera una tupla por venta con los campos de CAMPOS_REPORTE, en ese orden y como texto
+    - Las líneas vacías, incompletas o mal formateadas se omiten
+    - Si el archivo no existe no genera nada
+    """
+
+    try:
+
+        with open(ARCHIVO_VENTAS, "r", encoding="utf-8") as archivo:
+
+            encabezado = archivo.readline().strip().split(",")
+
+            if not set(CAMPOS_REPORTE) <= set(encabezado):
+                return
+
+            campos = len(encabezado)
+            elegir = itemgetter(*(encabezado.index(campo) for campo in CAMPOS_REPORTE))
+
+            for linea in archivo:
+
+                valores = linea.rstrip("\n").split(",")
+
+                if len(valores) == campos:
+                    yield elegir(valores)
+
+    except FileNotFoundError:
+
+        return
+   
+
+class BloqueoArchivo:
+    """
+    Bloqueo exclusivo entre procesos sobre un archivo (fcntl.flock, o msvcrt en Windows).
+    Se usa con `with`; es reentrante dentro del mismo proceso.
+
+    Precondiciones:
+    - Todos los procesos que comparten los datos deben usar el mismo archivo de bloqueo
+
+    Postcondiciones:
+    - Mientras el bloque `with` está activo ningún otro proceso puede tomar el bloqueo
+    - El bloqueo es consultivo (advisory): no impide que otros programas escriban los archivos
+    """
+
+    def __init__(self, ruta: str) -> None:
+
+        self.ruta = ruta
+        self._archivo = None
+        self._nivel = 0
+
+    def __enter__(self):
+
+        if self._nivel == 0:
+
+            self._archivo = open(self.ruta, "a+")
+
+            if fcntl is not None:
+                fcntl.flock(self._archivo.fileno(), fcntl.LOCK_EX)
+            else:
+                self._archivo.seek(0)
+                msvcrt.locking(self._archivo.fileno(), msvcrt.LK_LOCK, 1)
+
+        self._nivel += 1
+
+        return self
+
+    def __exit__(self, *error) -> None:
+
+        self._nivel -= 1
+
+        if self._nivel == 0:
+
+            if fcntl is not None:
+                fcntl.flock(self._archivo.fileno(), fcntl.LOCK_UN)
+            else:
+                self._archivo.seek(0)
+                msvcrt.locking(self._archivo.fileno(), msvcrt.LK_UNLCK, 1)
+
+            self._archivo.close()
+            self._archivo = None
+
+def ultimo_id_venta() -> int:
+    """
+    Devuelve el id_venta de la última venta de ventas.csv leyendo el archivo desde el final
+    
+    Postcondiciones:
+    - Se leen bloques de 4 KB desde el final hasta encontrar una línea que empiece con un número,
+      sin importar cuántas ventas tenga el archivo
+    - Si el archivo no existe o no tiene ventas, retorna 0
+    - En caso de error de lectura, se muestra un mensaje y retorna 0
+    """
+
+    try:
+
+        with open(ARCHIVO_VENTAS, "rb") as archivo:
+
+            posicion = archivo.seek(0, os.SEEK_END)
+            resto = b""
+
+            while posicion > 0:
+
+                leer = min(4096, posicion)
+                posicion -= leer
+                archivo.seek(posicion)
+                lineas = (archivo.read(leer) + resto).split(b"\n")
+
+                # Si no se llego al principio, la primera linea puede estar cortada
+                resto = lineas.pop(0) if posicion > 0 else b""
+
+                for linea in reversed(lineas):
+                    partes = linea.strip().split(b",")
+                    if partes[0].isdigit():
+                        return int(partes[0])
+
+    except FileNotFoundError:
+
+        return 0
+
+    except OSError as e:
+
+        print(f"Error al leer ventas.csv: {e}")
+
+    return 0
+
+def siguiente_id(secuencia: str, maximo_actual, cantidad: int = 1) -> int:
+    """
+    Devuelve el próximo ID de una secuencia ("venta", "ticket", "carga" o "producto") guardada en secuencias.json
+    
+    Precondiciones:
+    - Debe llamarse con el bloqueo de los archivos tomado
+    - `maximo_actual` debe ser una función sin parámetros que devuelva el mayor ID existente;
+      solo se usa la primera vez, cuando la secuencia todavía no está en el archivo
+    
+    Postcondiciones:
+    - Se reservan `cantidad` IDs seguidos y se reescribe secuencias.json una sola vez
+      (archivo temporal + reemplazo), así obtener IDs nuevos no depende de la cantidad de registros
+    - Retorna el primero de los IDs reservados
+    - Si el archivo no se puede escribir se muestra un mensaje (el ID igual se retorna)
+    """
+
+    try:
+
+        with open(ARCHIVO_SECUENCIAS, "r", encoding="utf-8") as archivo:
+
+            secuencias = json.load(archivo)
+
+    except (FileNotFoundError, json.JSONDecodeError):
+
+        secuencias = {}
+
+    if secuencia not in secuencias:
+        secuencias[secuencia] = maximo_actual()
+
+    primero = secuencias[secuencia] + 1
+    secuencias[secuencia] += cantidad
+
+    temporal = ARCHIVO_SECUENCIAS + ".tmp"
+
+    try:
+
+        with open(temporal, "w", encoding="utf-8") as archivo:
+
+            json.dump(secuencias, archivo, indent=4)
+
+        os.replace(temporal, ARCHIVO_SECUENCIAS)
+
+    except OSError:
+
+        print("No se pudo guardar secuencias.json.")
+
+    return primero
+
+def actualizar_encabezado_ventas() -> None:
+    """
+    Agrega a un ventas.csv de una versión anterior las columnas de COLUMNAS_NUEVAS_VENTAS que le faltan
+
+    Postcondiciones:
+    - Cada venta vieja recibe el valor por defecto de cada columna nueva
+    - El archivo se reescribe en un temporal y luego lo reemplaza; si ya está al día no se toca
+    """
+
+    with open(ARCHIVO_VENTAS, "r", encoding="utf-8") as archivo:
+
+        encabezado = archivo.readline().strip()
+
+        if not encabezado or encabezado == ENCABEZADO_VENTAS:
+            return
+
+        columnas = len(encabezado.split(","))
+        faltantes = [COLUMNAS_NUEVAS_VENTAS[columna] for columna in ENCABEZADO_VENTAS.split(",")[columnas:]]
+        temporal = ARCHIVO_VENTAS + ".tmp"
+
+        with open(temporal, "w", encoding="utf-8") as nuevo:
+
+            nuevo.write(ENCABEZADO_VENTAS + "\n")
+
+            for linea in archivo:
+
+                valores = linea.rstrip("\n").split(",")
+
+                if len(valores) == columnas:
+                    nuevo.write(",".join(valores + [valor(valores) for valor in faltantes]) + "\n")
+
+    os.replace(temporal, ARCHIVO_VENTAS)
+
+def agregar_ventas(ventas: list[Venta]) -> bool:
+    """
+    Agrega ventas al final de ventas.csv con una sola escritura
+    
+    Precondiciones:
+    - Cada venta debe tener todos sus campos, incluidos id_venta e id_ticket
+    
+    Postcondiciones:
+    - Si el archivo no existe, se crea con el encabezado; si es anterior a los tickets, se actualiza
+    - Se agrega una línea por venta con los valores separados por comas
+    - Si la escritura falla, el archivo vuelve a su tamaño anterior: se guardan todas las ventas o ninguna
+    - Retorna True si se guardó y False en caso de error (se muestra un mensaje)
+    """
+
+    tamano = None
+
+    try:
+
+        if os.path.exists(ARCHIVO_VENTAS):
+            actualizar_encabezado_ventas()
+            tamano = os.path.getsize(ARCHIVO_VENTAS)
+
+        with open(ARCHIVO_VENTAS, "a", encoding="utf-8") as archivo:
+            if tamano is None:
+                archivo.write(ENCABEZADO_VENTAS + "\n")
+            archivo.write("".join(venta.a_csv() + "\n" for venta in ventas))
+
+    except Exception as e:
+
+        print(f"Error al guardar la venta: {e}")
+
+        if tamano is not None:
+            deshacer_escritura(ARCHIVO_VENTAS, tamano)
+
+        return False
+
+    return True
+
+def deshacer_escritura(ruta: str, tamano: int) -> None:
+    """
+    Corta un archivo al tamaño que tenía antes de agregarle líneas (ventas.csv o el diario)
+    """
+
+    try:
+
+        os.truncate(ruta, tamano)
+
+    except OSError as e:
+
+        print(f"No se pudo deshacer la escritura en {ruta}: {e}")
+
+def _guardar_json(ruta: str, datos) -> None:
+    """
+    Escribe `datos` como JSON en un archivo temporal y lo reemplaza, así nunca queda a medias
+    (OSError si no se pudo)
+    """
+
+    temporal = ruta + ".tmp"
+
+    with open(temporal, "w", encoding="utf-8") as archivo:
+        json.dump(datos, archivo, ensure_ascii=False)
+
+    os.replace(temporal, ruta)
+
+
+def cargar_estado_acumulado() -> dict | None:
+    """
+    Lee el estado de los acumulados de ventas (ventas_acumulado/estado.json)
+
+    Postcondiciones:
+    - Retorna {"ultimo_id": ID de la última venta sumada, "centavos": True}
+    - Retorna None si el archivo no existe o está dañado, o si solo hay acumulados de una
+      versión anterior (un solo archivo, ingresos en pesos): hay que reconstruirlos
+    """
+
+    try:
+
+        with open(os.path.join(DIRECTORIO_ACUMULADO, ARCHIVO_ESTADO_ACUMULADO), "r", encoding="utf-8") as archivo:
+
+            estado = json.load(archivo)
+
+    except (FileNotFoundError, json.JSONDecodeError):
+
+        return None
+
+    return estado if estado.get("centavos") and "ultimo_id" in estado else None
+
+
+def cargar_acumulado_dia(dia: str) -> dict | None:
+    """
+    Lee los acumulados de ventas de un día (ver reportes.sumar_al_acumulado), o None si no hay
+    """
+
+    try:
+
+        with open(os.path.join(DIRECTORIO_ACUMULADO, dia + ".json"), "r", encoding="utf-8") as archivo:
+
+            return json.load(archivo)
+
+    except (FileNotFoundError, json.JSONDecodeError):
+
+        return None
+
+
+def guardar_acumulados(dias: dict[str, dict], ultimo_id: int) -> bool:
+    """
+    Guarda los acumulados de los días indicados, cada uno en su archivo, y después el estado
+
+    Postcondiciones:
+    - Solo se reescriben los archivos de los días de `dias`; los demás no se tocan
+    - El estado se escribe al final: si se corta antes, la próxima venta no coincide
+      con el estado y los acumulados se reconstruyen
+    - Retorna True si se guardó y False en caso de error (se muestra un mensaje)
+    """
+
+    try:
+
+        os.makedirs(DIRECTORIO_ACUMULADO, exist_ok=True)
+
+        for dia, acumulado in dias.items():
+            _guardar_json(os.path.join(DIRECTORIO_ACUMULADO, dia + ".json"), acumulado)
+
+        _guardar_json(os.path.join(DIRECTORIO_ACUMULADO, ARCHIVO_ESTADO_ACUMULADO),
+                      {"ultimo_id": ultimo_id, "centavos": True})
+
+    except OSError as e:
+
+        print(f"Error al guardar los acumulados de ventas: {e}")
+
+        return False
+
+    return True
+
+
+def borrar_acumulados_sobrantes(dias: dict[str, dict]) -> None:
+    """
+    Borra los archivos de días que no están en `dias` (ventas borradas) y el archivo de versiones anteriores
+    """
+
+    try:
+
+        sobrantes = [nombre for nombre in os.listdir(DIRECTORIO_ACUMULADO)
+                     if nombre.endswith(".json") and nombre != ARCHIVO_ESTADO_ACUMULADO and nombre[:-5] not in dias]
+
+        for nombre in sobrantes:
+            os.remove(os.path.join(DIRECTORIO_ACUMULADO, nombre))
+
+        if os.path.exists(ARCHIVO_ACUMULADO_ANTERIOR):
+            os.remove(ARCHIVO_ACUMULADO_ANTERIOR)
+
+    except OSError as e:
+
+        print(f"No se pudieron borrar acumulados de ventas viejos: {e}")
+
+
+def cargar_productos() -> list[Producto]:
+
+    """
+    Lee productos.csv y devuelve una lista de productos (registros Producto)
+    
+    Precondiciones:
+    - El archivo productos.csv debe existir en el directorio actual (opcional)
+    - El archivo debe tener encoding UTF-8
+    - La primera línea debe contener los encabezados separados por comas
+    - Cada línea subsiguiente debe representar un producto con los mismos campos que el encabezado
+    
+    Postcondiciones:
+    - Retorna una lista de Producto, con el id como entero y el precio en centavos
+    - Las columnas se ubican por el encabezado, así el orden en el archivo no importa
+    - Si el archivo no existe, muestra un mensaje y retorna una lista vacía
+    - Si el archivo existe pero está vacío, retorna una lista vacía
+    - Las filas incompletas o con id o precio no numérico se omiten y se informa cuántas fueron
+    """
+
+    productos = []
+
+    try:
+
+        with open(ARCHIVO_PRODUCTOS, "r", encoding="utf-8") as archivo:
+
+            lineas = archivo.readlines()
+
+            if not lineas:
+                return productos
+
+            encabezado = lineas[0].strip().split(",")
+            elegir = itemgetter(*(encabezado.index(campo) for campo in Producto.CAMPOS))
+            invalidas = 0
+
+            for linea in lineas[1:]:
+
+                if not linea.strip():
+                    continue
+
+                try:
+                    productos.append(Producto.desde_texto(elegir(linea.strip().split(","))))
+                except (IndexError, ValueError):
+                    invalidas += 1
+
+            if invalidas:
+                print(f"Se omitieron {invalidas} productos con datos inválidos en productos.csv.")
+
+    except FileNotFoundError:
+
+        print("Archivo csv no encontrado. Se creara al guardar.")
+
+    except ValueError:
+
+        print("El encabezado de productos.csv no tiene las columnas " + ",".join(Producto.CAMPOS))
+
+    return productos
+
+def guardar_productos(productos: list[Producto]) -> bool:
+    """
+    Escribe la lista de productos en productos.csv
+    
+    Precondiciones:
+    - `productos` debe ser una lista de Producto
+    
+    Postcondiciones:
+    - Se crea o sobrescribe el archivo productos.csv en el directorio actual
+    - La primera línea del archivo contiene los encabezados (Producto.CAMPOS), aunque no haya productos
+    - Cada línea subsiguiente representa un producto con sus valores separados por comas
+    - El encoding del archivo es UTF-8
+    - Se escribe un archivo temporal y se reemplaza, así otra caja que lo lee nunca lo ve a medias
+    - Retorna True si se guardó y False en caso de error (se muestra un mensaje)
+    """
+
+    temporal = ARCHIVO_PRODUCTOS + ".tmp"
+
+    try:
+
+        with open(temporal, "w", encoding="utf-8") as archivo:
+
+            archivo.write(",".join(Producto.CAMPOS) + "\n")
+            archivo.write("".join(producto.a_csv() + "\n" for producto in productos))
+
+        os.replace(temporal, ARCHIVO_PRODUCTOS)
+
+    except OSError as e:
+
+        print(f"Los productos no pudieron ser guardados: {e}")
+
+        return False
+
+    return True
+
+
+def cargar_stock() -> dict[str]:
+    """
+    Carga los datos del stock: la última foto guardada en stock_data.json
+    más los cambios registrados después en el diario (stock_diario.jsonl).
+    
+    Precondiciones:
+    - El archivo stock_data.json debe existir en el directorio actual (opcional)
+    - El archivo debe tener formato JSON válido
+    - El archivo debe tener encoding UTF-8
+    - La estructura esperada es un diccionario con claves "stock" y "umbrales"
+    - El diario stock_diario.jsonl es opcional
+    
+    Postcondiciones:
+    - Si el archivo existe y es válido, retorna el diccionario completo del JSON
+      con cada carga convertida a Carga (las cargas con datos inválidos se omiten)
+    - Los umbrales quedan como {id de producto: valor} (ver umbrales_validos)
+    - Si el archivo no existe o tiene formato inválido, parte de una estructura por defecto
+    - La estructura por defecto contiene: {"stock": [], "umbrales": {}}
+    - Se aplican en orden los registros del diario con versión mayor a la de la foto
+    - La clave "version" queda con la versión del último cambio aplicado
+    - En caso de error, se muestra un mensaje informativo
+    """
+
+    try:
+
+        with open(ARCHIVO_STOCK, "r", encoding="utf-8") as stockdata_json:
+
+            datos = json.load(stockdata_json)
+
+    except (FileNotFoundError, json.JSONDecodeError):
+
+        print("Archivo no encontrado")
+
+        datos = {
+        "stock": [],
+        "umbrales": {}
+    }
+
+    datos.setdefault("stock", [])
+    datos.setdefault("umbrales", {})
+    datos.setdefault("version", 0)
+    datos["stock"] = cargas_validas(datos["stock"])
+    datos["umbrales"] = umbrales_validos(datos["umbrales"])
+
+    reproducir_diario(datos)
+
+    return datos
+
+def cargas_validas(cargas: list[dict]) -> list[Carga]:
+    """
+    Convierte las cargas leídas del JSON a Carga, omitiendo (con un aviso) las que tienen datos inválidos
+    """
+
+    validas = []
+
+    for carga in cargas:
+
+        try:
+            validas.append(Carga.desde_dict(carga))
+        except ValueError:
+            print(f"Se omitió una carga con datos inválidos: {carga}")
+
+    return validas
+
+def umbrales_validos(umbrales: dict) -> dict:
+    """
+    Convierte las claves de los umbrales leídos del JSON (texto) a ids de producto
+
+    Postcondiciones:
+    - Las claves numéricas pasan a int y los valores inválidos se omiten con un aviso
+    - Las claves que son nombres (umbrales por tipo de versiones anteriores) se conservan tal cual,
+      para que el almacén los pase a cada producto (ver Almacen._migrar_umbrales)
+    """
+
+    validos = {}
+
+    for clave, valor in umbrales.items():
+
+        if not clave.isdigit():
+            validos[clave] = valor
+            continue
+
+        try:
+            validos[int(clave)] = int(valor)
+        except (TypeError, ValueError):
+            print(f"Se omitió un umbral con datos inválidos: {clave}: {valor}")
+
+    return validos
+
+def clave_umbral(registro: dict) -> int | str:
+    """
+    Devuelve el producto de un registro de umbral, o el tipo si es un registro de una versión anterior
+    """
+
+    return registro["id_producto"] if "id_producto" in registro else registro["tipo"]
+
+def reproducir_diario(datos: dict[str]) -> None:
+    """
+    Aplica sobre `datos` los registros del diario que todavía no están en la foto.
+    
+    Precondiciones:
+    - `datos` debe tener las claves "stock", "umbrales" y "version"
+    
+    Postcondiciones:
+    - Se aplican los registros con versión mayor a datos["version"], en el orden del archivo
+    - Los registros ya incluidos en la foto (por una compactación interrumpida) se ignoran
+    - Una última línea incompleta (escritura cortada) se ignora
+    - Si el diario no existe, `datos` no se modifica
+    """
+
+    cargas = {carga["id"]: carga for carga in datos["stock"]}
+
+    try:
+
+        with open(ARCHIVO_DIARIO, "r", encoding="utf-8") as diario:
+
+            for linea in diario:
+
+                try:
+
+                    registro = json.loads(linea)
+
+                except json.JSONDecodeError:
+
+                    break
+
+                if registro.get("version", 0) > datos["version"]:
+                    aplicar_registro(datos, registro, cargas)
+
+    except FileNotFoundError:
+
+        return
+
+def aplicar_registro(datos: dict[str], registro: dict, cargas: dict[int, Carga]) -> None:
+    """
+    Aplica un cambio del diario sobre los datos del stock en memoria.
+    
+    Precondiciones:
+    - `registro` debe tener las claves "op" y "version"
+    - `cargas` debe ser un diccionario id -> carga con las mismas cargas que datos["stock"]
+    
+    Postcondiciones:
+    - "agregar_carga": agrega registro["carga"] al stock (si viene del diario, se convierte a Carga)
+    - "modificar_carga": actualiza la carga registro["id"] con los valores de registro["campos"]
+    - "eliminar_carga": quita la carga registro["id"] del stock
+    - "fijar_umbral": guarda registro["valor"] como umbral de registro["id_producto"]
+    - "eliminar_umbral": quita el umbral de registro["id_producto"]
+    - Los registros de umbral de versiones anteriores usan registro["tipo"] (ver clave_umbral)
+    - "varios": aplica en orden los cambios de registro["registros"] (todos juntos, como un solo cambio)
+    - `cargas` se mantiene sincronizado y datos["version"] pasa a ser la del registro
+    """
+
+    match registro["op"]:
+
+        case "agregar_carga":
+
+            carga = registro["carga"]
+            if not isinstance(carga, Carga):
+                carga = Carga.desde_dict(carga)
+            datos["stock"].append(carga)
+            cargas[carga["id"]] = carga
+
+        case "modificar_carga":
+
+            carga = cargas.get(registro["id"])
+            if carga is not None:
+                carga.update(registro["campos"])
+
+        case "eliminar_carga":
+
+            carga = cargas.pop(registro["id"], None)
+            if carga is not None:
+                datos["stock"].remove(carga)
+
+        case "fijar_umbral":
+
+            datos["umbrales"][clave_umbral(registro)] = registro["valor"]
+
+        case "eliminar_umbral":
+
+            datos["umbrales"].pop(clave_umbral(registro), None)
+
+        case "varios":
+
+            for cambio in registro["registros"]:
+                aplicar_registro(datos, {**cambio, "version": registro["version"]}, cargas)
+
+    datos["version"] = registro["version"]
+
+def agregar_al_diario(registro: dict) -> bool:
+    """
+    Agrega un cambio del stock al final del diario (stock_diario.jsonl).
+    
+    Precondiciones:
+    - `registro` debe ser un diccionario serializable a JSON
+    
+    Postcondiciones:
+    - Se agrega una línea JSON al final del diario, sin reescribir el resto
+    - Retorna True si se guardó y False en caso de error
+    """
+
+    try:
+
+        with open(ARCHIVO_DIARIO, "a", encoding="utf-8") as diario:
+
+            diario.write(json.dumps(registro, ensure_ascii=False, default=serializable) + "\n")
+
+    except OSError:
+
+        print("El cambio de stock no pudo ser guardado.")
+
+        return False
+
+    return True
+
+def guardar_stock(datos: dict[str]) -> bool:
+    """
+    Guarda la foto completa del stock en stock_data.json y vacía el diario (compactación).
+    
+    Precondiciones:
+    - `datos` debe ser un diccionario serializable a JSON
+    - La estructura esperada es un diccionario con claves "stock", "umbrales" y "version"
+    - Debe tener permisos de escritura en el directorio actual
+    
+    Postcondiciones:
+    - Se crea o sobrescribe el archivo stock_data.json en el directorio actual
+    - El archivo se escribe primero en un temporal y luego lo reemplaza, así nunca queda a medias
+    - El diario queda vacío; si se corta antes de vaciarlo, la versión guardada evita aplicar dos veces
+    - El archivo se guarda con encoding UTF-8
+    - Se preservan caracteres especiales y tildes (ensure_ascii=False)
+    - El formato incluye indentación de 4 espacios para mejor legibilidad
+    - En caso de error de escritura, se muestra un mensaje informativo
+    - Retorna True si el archivo se guardó y False en caso de error
+    """
+
+    temporal = ARCHIVO_STOCK + ".tmp"
+
+    try: 
+
+        with open(temporal, "w", encoding="utf-8") as f:
+
+            json.dump(datos, f, ensure_ascii=False, indent=4, default=serializable)
+            # ensure_ascii=False: Permite el uso de tildes
+            # indent=4: Agrega sangrias
+            # default: las cargas (Carga) se guardan como diccionarios
+
+        os.replace(temporal, ARCHIVO_STOCK)
+
+        # Los cambios del diario ya estan en la foto
+        if os.path.exists(ARCHIVO_DIARIO):
+            open(ARCHIVO_DIARIO, "w", encoding="utf-8").close()
+    
+    except OSError:
+
+        print("El archivo no pudo ser guardado.")
+
+        return False
+
+    return True
+
+
+class BackendArchivos:
+    """
+    Almacenamiento en archivos planos: productos.csv, stock_data.json con su diario y ventas.csv.
+    Es el almacenamiento por defecto. BackendSQLite (persistencia_sqlite.py) tiene los mismos métodos.
+    `bloqueo` serializa las escrituras de varias cajas que comparten el mismo directorio.
+    """
+
+    def __init__(self) -> None:
+
+        self.bloqueo = BloqueoArchivo(ARCHIVO_BLOQUEO)
+        self._indice_ventas = IndiceVentas(ARCHIVO_VENTAS)
+
+    def firma(self, datos: str) -> tuple | None:
+        """
+        Devuelve un valor que cambia cuando los datos ("productos" o "stock") cambian en disco
+        """
+
+        if datos == "productos":
+            return firma_archivo(ARCHIVO_PRODUCTOS)
+
+        return firma_archivo(ARCHIVO_STOCK), firma_archivo(ARCHIVO_DIARIO)
+
+    def cargar_productos(self) -> list[Producto]:
+        return cargar_productos()
+
+    def guardar_productos(self, productos: list[Producto], cambiados: list[Producto], eliminados: list[int]) -> bool:
+        """
+        Reescribe productos.csv completo (un CSV no permite modificar filas sueltas).
+        Retorna True si se guardó.
+        """
+
+        return guardar_productos(productos)
+
+    def cargar_stock(self) -> dict[str]:
+        return cargar_stock()
+
+    def registrar_cambio(self, registro: dict) -> bool:
+        return agregar_al_diario(registro)
+
+    def necesita_compactar(self) -> bool:
+        """
+        Indica si el diario del stock superó LIMITE_DIARIO
+        """
+
+        firma = firma_archivo(ARCHIVO_DIARIO)
+
+        return firma is not None and firma[1] > LIMITE_DIARIO
+
+    def compactar(self, datos: dict[str]) -> bool:
+        return guardar_stock(datos)
+
+    def cargar_ventas(self) -> list[Venta]:
+        return cargar_ventas()
+
+    def agregados_ventas(self) -> dict[str, dict]:
+        """
+        Suma las ventas de ventas.csv para los reportes (con NumPy si está instalado)
+        """
+
+        if reportes.np is not None:
+            return agregados_ventas_csv(ARCHIVO_VENTAS)
+
+        return agregados_ventas(recorrer_ventas())
+
+    def pagina_ventas(self, numero: int, tamano: int, desde: str | None = None,
+                      hasta: str | None = None) -> tuple[list[Venta], int]:
+        """
+        Devuelve una página de ventas (las más recientes primero) y el total que cumple el filtro de fechas
+        """
+
+        return self._indice_ventas.pagina(numero, tamano, desde, hasta)
+
+    def ultimo_id_venta(self) -> int:
+        return ultimo_id_venta()
+
+    def siguiente_id(self, secuencia: str, maximo_actual, cantidad: int = 1) -> int:
+        return siguiente_id(secuencia, maximo_actual, cantidad)
+
+    def registrar_ticket(self, registro: dict, ventas: list[Venta]) -> bool:
+        """
+        Guarda un ticket: el cambio del stock en el diario y todas sus ventas en ventas.csv
+
+        Postcondiciones:
+        - Cada archivo se escribe una sola vez; si las ventas no se pueden guardar, el diario
+          vuelve a su tamaño anterior (no se descuenta stock de un ticket sin ventas)
+        - Las ventas se suman a los acumulados del día
+        - Retorna True si se guardó todo y False si no se guardó nada
+        """
+
+        firma = firma_archivo(ARCHIVO_DIARIO)
+
+        if not agregar_al_diario(registro):
+            return False
+
+        if not agregar_ventas(ventas):
+            deshacer_escritura(ARCHIVO_DIARIO, firma[1] if firma else 0)
+            return False
+
+        self._sumar_al_acumulado(ventas)
+
+        return True
+
+    def _sumar_al_acumulado(self, ventas: list[Venta]) -> None:
+        """
+        Suma ventas recién agregadas a los acumulados de su día
+
+        Postcondiciones:
+        - Solo se leen y reescriben los archivos de los días de esas ventas (el del día actual)
+        - Si el estado no tiene la venta anterior (archivo nuevo, borrado o un corte
+          entre las dos escrituras) se reconstruyen desde ventas.csv
+        """
+
+        estado = cargar_estado_acumulado()
+
+        if estado is None or estado["ultimo_id"] != ventas[0].id_venta - 1:
+            self.reconstruir_acumulado()
+            return
+
+        dias = {}
+
+        for venta in ventas:
+
+            dia = venta.fecha_y_hora[:10]
+
+            if dia not in dias:
+
+                anterior = cargar_acumulado_dia(dia)
+
+                if anterior is not None:
+                    dias[dia] = anterior
+
+            sumar_al_acumulado(dias, dia, venta.categoria, venta.metodo_pago, 1, venta.cantidad, venta.total)
+
+        guardar_acumulados(dias, ventas[-1].id_venta)
+
+    def acumulado_del_dia(self, dia: str) -> dict | None:
+        """
+        Devuelve los acumulados de ventas del día (ver reportes.sumar_al_acumulado), o None si no hubo ventas
+        """
+
+        if cargar_estado_acumulado() is None:
+            return self.reconstruir_acumulado().get(dia)
+
+        return cargar_acumulado_dia(dia)
+
+    def reconstruir_acumulado(self) -> dict[str, dict]:
+        """
+        Vuelve a calcular los acumulados por día recorriendo todo ventas.csv y los guarda,
+        un archivo por día. Retorna los acumulados de todos los días.
+        """
+
+        dias = acumulado_desde_agregados(self.agregados_ventas())
+
+        if guardar_acumulados(dias, ultimo_id_venta()):
+            borrar_acumulados_sobrantes(dias)
+
+        return dias
+
+    def cerrar(self, datos: dict[str]) -> None:
+        """
+        Compacta el diario del stock si tiene cambios pendientes
+        """
+
+        firma = firma_archivo(ARCHIVO_DIARIO)
+
+        if firma and firma[1] > 0:
+            guardar_stock(datos)
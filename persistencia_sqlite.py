@@ -0,0 +1,594 @@
+# Almacenamiento opcional en SQLite (modulo sqlite3 de la biblioteca estandar)
+# Se activa con la variable de entorno STOCK_BACKEND=sqlite
+# Migracion inicial desde los archivos: python persistencia_sqlite.py [stock.db]
+
+import sqlite3
+import sys
+from persistencia import BloqueoArchivo, cargar_productos, cargar_stock, cargar_ventas
+from registros import Carga, Producto, Venta
+
+# Los importes (precio, precio_unitario, total, ingresos) son enteros de centavos
+TABLA_VENTAS = """
+CREATE TABLE IF NOT EXISTS ventas (
+    id_venta INTEGER PRIMARY KEY,
+    fecha_y_hora TEXT NOT NULL,
+    id_producto INTEGER NOT NULL,
+    nombre_producto TEXT NOT NULL,
+    categoria TEXT NOT NULL,
+    cantidad INTEGER NOT NULL,
+    precio_unitario INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    metodo_pago TEXT NOT NULL,
+    id_ticket INTEGER NOT NULL,
+    cargas TEXT NOT NULL
+)"""
+
+ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS productos (
+    id INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    capacidad TEXT NOT NULL,
+    categoria TEXT NOT NULL,
+    precio INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_productos_nombre_capacidad ON productos (nombre, capacidad);
+CREATE INDEX IF NOT EXISTS idx_productos_categoria ON productos (categoria);
+
+CREATE TABLE IF NOT EXISTS cargas (
+    id INTEGER PRIMARY KEY,
+    id_producto INTEGER NOT NULL DEFAULT 0,
+    tipo TEXT NOT NULL,
+    capacidad TEXT NOT NULL,
+    cantidad INTEGER NOT NULL,
+    categoria TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cargas_tipo_capacidad ON cargas (tipo, capacidad);
+
+-- Umbrales por tipo de versiones anteriores: el almacen los pasa a umbrales_producto y los borra
+CREATE TABLE IF NOT EXISTS umbrales (
+    tipo TEXT PRIMARY KEY,
+    valor INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS umbrales_producto (
+    id_producto INTEGER PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+
+{TABLA_VENTAS};
+CREATE INDEX IF NOT EXISTS idx_ventas_fecha ON ventas (fecha_y_hora);
+CREATE INDEX IF NOT EXISTS idx_ventas_producto ON ventas (id_producto);
+CREATE INDEX IF NOT EXISTS idx_ventas_categoria ON ventas (categoria);
+CREATE INDEX IF NOT EXISTS idx_ventas_metodo_pago ON ventas (metodo_pago);
+
+-- Acumulados por dia: dimension "total" (clave vacia), "categoria" o "metodo_pago"
+CREATE TABLE IF NOT EXISTS acumulado_ventas (
+    dia TEXT NOT NULL,
+    dimension TEXT NOT NULL,
+    clave TEXT NOT NULL,
+    ventas INTEGER NOT NULL,
+    unidades INTEGER NOT NULL,
+    ingresos INTEGER NOT NULL,
+    PRIMARY KEY (dia, dimension, clave)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+"""
+
+# Suma una venta a un acumulado del dia (lo crea si no existe)
+SUMAR_ACUMULADO = """
+INSERT INTO acumulado_ventas VALUES (?, ?, ?, 1, ?, ?)
+ON CONFLICT (dia, dimension, clave) DO UPDATE SET
+    ventas = ventas + 1, unidades = unidades + excluded.unidades, ingresos = ingresos + excluded.ingresos
+"""
+
+# Rearma los acumulados desde la tabla ventas
+RECONSTRUIR_ACUMULADO = """
+DELETE FROM acumulado_ventas;
+INSERT INTO acumulado_ventas
+    SELECT substr(fecha_y_hora, 1, 10), 'total', '', COUNT(*), SUM(cantidad), SUM(total) FROM ventas GROUP BY 1;
+INSERT INTO acumulado_ventas
+    SELECT substr(fecha_y_hora, 1, 10), 'categoria', categoria, COUNT(*), SUM(cantidad), SUM(total) FROM ventas GROUP BY 1, 3;
+INSERT INTO acumulado_ventas
+    SELECT substr(fecha_y_hora, 1, 10), 'metodo_pago', metodo_pago, COUNT(*), SUM(cantidad), SUM(total) FROM ventas GROUP BY 1, 3;
+"""
+
+# Columnas agregadas a ventas despues de la primera version: (columna, definicion, valor para las ventas viejas)
+COLUMNAS_NUEVAS_VENTAS = (
+    ("id_ticket", "INTEGER NOT NULL DEFAULT 0", "id_venta"),
+    ("cargas", "TEXT NOT NULL DEFAULT ''", None),
+)
+
+# Columnas agregadas a cargas despues de la primera version (las cargas viejas quedan sin producto,
+# id_producto 0, hasta que el almacen las asocia por nombre y capacidad)
+COLUMNAS_NUEVAS_CARGAS = (
+    ("id_producto", "INTEGER NOT NULL DEFAULT 0", None),
+)
+
+# Columnas de una carga que se pueden modificar con "modificar_carga"
+COLUMNAS_CARGA = ("id_producto", "tipo", "capacidad", "cantidad", "categoria")
+
+# Columnas de cada tabla en el orden de los campos de su registro (las filas se leen con Registro(*fila))
+COLUMNAS_PRODUCTOS = ", ".join(Producto.CAMPOS)
+COLUMNAS_CARGAS = ", ".join(Carga.CAMPOS)
+INSERTAR_CARGA = f"INSERT INTO cargas ({COLUMNAS_CARGAS}) VALUES ({', '.join('?' * len(Carga.CAMPOS))})"
+COLUMNAS_VENTAS = ", ".join(Venta.CAMPOS)
+# Contador de cambios de cada dato en la tabla meta: se incrementa en la misma transaccion que
+# cada escritura y es la firma que compara el almacen (el del stock es su version)
+CONTADORES = {"productos": "cambios_productos", "stock": "version"}
+
+INCREMENTAR_PRODUCTOS = ("INSERT INTO meta (clave, valor) VALUES ('cambios_productos', 1) "
+                         "ON CONFLICT (clave) DO UPDATE SET valor = valor + 1")
+
+INSERTAR_VENTA = f"INSERT INTO ventas ({COLUMNAS_VENTAS}) VALUES ({', '.join('?' * len(Venta.CAMPOS))})"
+
+# Columnas de ventas de una base anterior a los centavos, con los importes (REAL, en pesos) ya convertidos
+VENTAS_EN_CENTAVOS = ", ".join(f"CAST(ROUND({campo} * 100) AS INTEGER)" if campo in Venta.IMPORTES else campo
+                               for campo in Venta.CAMPOS)
+
+
+class BackendSQLite:
+    """
+    Almacenamiento en una base SQLite con tablas indexadas para productos, cargas, umbrales y ventas.
+    Tiene los mismos métodos que BackendArchivos y cada operación se ejecuta en una transacción.
+
+    Precondiciones:
+    - `ruta` es el archivo de la base; si no existe se crea con las tablas vacías
+
+    Postcondiciones:
+    - La conexión queda abierta durante toda la sesión y se cierra con cerrar()
+    - `bloqueo` (archivo <ruta>.lock) hace atómico el "leer, validar y escribir" de cada caja
+    """
+
+    def __init__(self, ruta: str = "stock.db") -> None:
+
+        self.ruta = ruta
+        self.bloqueo = BloqueoArchivo(ruta + ".lock")
+        self._conexion = sqlite3.connect(ruta)
+
+        # Dos cajas que abren a la vez una base anterior no deben migrarla las dos
+        with self.bloqueo:
+            self._migrar_esquema()
+
+    def _migrar_esquema(self) -> None:
+        """
+        Crea las tablas que falten y actualiza una base de una versión anterior
+
+        Precondiciones:
+        - Debe llamarse con el bloqueo tomado, así cada migración se hace una sola vez
+
+        Postcondiciones:
+        - Se agregan las columnas nuevas, se pasan los importes a centavos y se arman
+          los acumulados, solo si la base todavía no los tiene
+        """
+
+        self._conexion.executescript(ESQUEMA)
+
+        # Base de una version anterior: se agregan las columnas nuevas de ventas y cargas
+        with self._conexion:
+            for tabla, nuevas in (("ventas", COLUMNAS_NUEVAS_VENTAS), ("cargas", COLUMNAS_NUEVAS_CARGAS)):
+
+                columnas = {fila[1] for fila in self._conexion.execute(f"PRAGMA table_info({tabla})")}
+
+                for columna, definicion, actualizacion in nuevas:
+                    if columna not in columnas:
+                        self._conexion.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna} {definicion}")
+                        if actualizacion:
+                            self._conexion.execute(f"UPDATE {tabla} SET {columna} = {actualizacion}")
+
+        # Base anterior a los importes en centavos: se convierten una sola vez
+        if self._conexion.execute("SELECT 1 FROM meta WHERE clave = 'centavos'").fetchone() is None:
+            self._convertir_a_centavos()
+
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_ventas_ticket ON ventas (id_ticket)")
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_cargas_producto ON cargas (id_producto)")
+
+        # Base anterior a los acumulados: se arman una vez desde las ventas
+        if (self._conexion.execute("SELECT 1 FROM ventas LIMIT 1").fetchone()
+                and not self._conexion.execute("SELECT 1 FROM acumulado_ventas LIMIT 1").fetchone()):
+            self.reconstruir_acumulado()
+
+    def _convertir_a_centavos(self) -> None:
+        """
+        Pasa a centavos los importes de una base de una versión anterior (en pesos), en una transacción
+
+        Postcondiciones:
+        - Los precios de los productos se multiplican por 100
+        - La tabla ventas se vuelve a crear con los importes INTEGER (en una columna REAL SQLite
+          guardaría los centavos como float) y los acumulados se borran para rearmarlos desde las ventas
+        - La base queda marcada en la tabla meta ("centavos"); una base sin datos solo se marca
+        """
+
+        con_datos = any(self._conexion.execute(f"SELECT 1 FROM {tabla} LIMIT 1").fetchone()
+                        for tabla in ("productos", "ventas"))
+
+        with self._conexion:
+
+            if con_datos:
+
+                self._conexion.execute("UPDATE productos SET precio = precio * 100")
+                self._conexion.execute("ALTER TABLE ventas RENAME TO ventas_pesos")
+                self._conexion.execute(TABLA_VENTAS)
+                self._conexion.execute(f"INSERT INTO ventas ({COLUMNAS_VENTAS}) "
+                                       f"SELECT {VENTAS_EN_CENTAVOS} FROM ventas_pesos")
+                self._conexion.execute("DROP TABLE ventas_pesos")
+                self._conexion.execute("DROP TABLE acumulado_ventas")
+
+            self._conexion.execute("INSERT INTO meta (clave, valor) VALUES ('centavos', 1)")
+            self._conexion.execute(INCREMENTAR_PRODUCTOS)
+
+        # Indices de ventas y tabla de acumulados (se fueron con las tablas borradas)
+        self._conexion.executescript(ESQUEMA)
+
+    def firma(self, datos: str) -> int:
+        """
+        Devuelve el contador de cambios de los datos pedidos ("productos" o "stock", ver CONTADORES).
+        Cambia con cada escritura de esa tabla, de cualquier sesión, y no con las de la otra.
+        """
+
+        return self._valor_meta(CONTADORES[datos])
+
+    def cargar_productos(self) -> list[Producto]:
+        """
+        Devuelve los productos ordenados por id (las columnas ya tienen el tipo de cada campo)
+        """
+
+        return [Producto(*fila) for fila in self._conexion.execute(
+            f"SELECT {COLUMNAS_PRODUCTOS} FROM productos ORDER BY id")]
+
+    def guardar_productos(self, productos: list[Producto], cambiados: list[Producto], eliminados: list[int]) -> bool:
+        """
+        Escribe solo los productos agregados o modificados y borra los eliminados, en una transacción.
+        Retorna True si se guardó y False en caso de error (se muestra un mensaje).
+        """
+
+        try:
+
+            with self._conexion:
+
+                self._conexion.executemany(
+                    "INSERT OR REPLACE INTO productos (id, nombre, capacidad, categoria, precio) "
+                    "VALUES (?, ?, ?, ?, ?)", [producto.fila() for producto in cambiados])
+                self._conexion.executemany(
+                    "DELETE FROM productos WHERE id = ?", [(id_producto,) for id_producto in eliminados])
+                self._conexion.execute(INCREMENTAR_PRODUCTOS)
+
+        except sqlite3.Error as e:
+
+            print(f"Los productos no pudieron ser guardados: {e}")
+
+            return False
+
+        return True
+
+    def _valor_meta(self, clave: str) -> int:
+        """
+        Devuelve un valor guardado en la tabla meta (0 si no hay)
+        """
+
+        fila = self._conexion.execute("SELECT valor FROM meta WHERE clave = ?", (clave,)).fetchone()
+
+        return fila[0] if fila else 0
+
+    def _version(self) -> int:
+        """
+        Devuelve la versión del stock guardada en la tabla meta (0 si no hay)
+        """
+
+        return self._valor_meta("version")
+
+    def cargar_stock(self) -> dict[str]:
+        """
+        Devuelve el stock con la misma estructura que stock_data.json:
+        {"stock": [...], "umbrales": {...}, "version": n}
+        (los umbrales por tipo que queden de una versión anterior se devuelven con el nombre como clave)
+        """
+
+        stock = [Carga(*fila) for fila in self._conexion.execute(
+            f"SELECT {COLUMNAS_CARGAS} FROM cargas ORDER BY id")]
+        umbrales = dict(self._conexion.execute("SELECT tipo, valor FROM umbrales ORDER BY rowid"))
+        umbrales.update(self._conexion.execute("SELECT id_producto, valor FROM umbrales_producto ORDER BY id_producto"))
+
+        return {"stock": stock, "umbrales": umbrales, "version": self._version()}
+
+    def _aplicar_cambio(self, registro: dict) -> None:
+        """
+        Ejecuta un cambio del stock (mismos registros que el diario) dentro de la transacción en curso
+        """
+
+        match registro["op"]:
+
+            case "agregar_carga":
+
+                self._conexion.execute(INSERTAR_CARGA, registro["carga"].fila())
+
+            case "modificar_carga":
+
+                campos = {c: v for c, v in registro["campos"].items() if c in COLUMNAS_CARGA}
+                asignaciones = ", ".join(f"{columna} = ?" for columna in campos)
+                self._conexion.execute(f"UPDATE cargas SET {asignaciones} WHERE id = ?",
+                                       (*campos.values(), registro["id"]))
+
+            case "eliminar_carga":
+
+                self._conexion.execute("DELETE FROM cargas WHERE id = ?", (registro["id"],))
+
+            case "fijar_umbral" if "id_producto" in registro:
+
+                self._conexion.execute(
+                    "INSERT INTO umbrales_producto (id_producto, valor) VALUES (?, ?) "
+                    "ON CONFLICT (id_producto) DO UPDATE SET valor = excluded.valor",
+                    (registro["id_producto"], registro["valor"]))
+
+            case "eliminar_umbral" if "id_producto" in registro:
+
+                self._conexion.execute("DELETE FROM umbrales_producto WHERE id_producto = ?",
+                                       (registro["id_producto"],))
+
+            # Umbral por tipo de una version anterior (la migracion los borra con este registro)
+            case "eliminar_umbral":
+
+                self._conexion.execute("DELETE FROM umbrales WHERE tipo = ?", (registro["tipo"],))
+
+            case "varios":
+
+                for cambio in registro["registros"]:
+                    self._aplicar_cambio(cambio)
+
+    def registrar_cambio(self, registro: dict) -> bool:
+        """
+        Aplica un cambio del stock (mismos registros que el diario) en una transacción
+
+        Postcondiciones:
+        - Se actualiza la tabla correspondiente y la versión en la tabla meta
+        - Retorna True si se guardó y False en caso de error (se muestra un mensaje)
+        """
+
+        try:
+
+            with self._conexion:
+
+                self._aplicar_cambio(registro)
+                self._conexion.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('version', ?)",
+                                       (registro["version"],))
+
+        except sqlite3.Error as e:
+
+            print(f"El cambio de stock no pudo ser guardado: {e}")
+
+            return False
+
+        return True
+
+    def necesita_compactar(self) -> bool:
+        return False
+
+    def compactar(self, datos: dict[str]) -> bool:
+        return True
+
+    def cargar_ventas(self) -> list[Venta]:
+        """
+        Devuelve todas las ventas ordenadas por id
+        """
+
+        return [Venta(*fila) for fila in self._conexion.execute(
+            f"SELECT {COLUMNAS_VENTAS} FROM ventas ORDER BY id_venta")]
+
+    def agregados_ventas(self) -> dict[str, dict]:
+        """
+        Suma las ventas para los reportes (como reportes.agregados_ventas) con GROUP BY dentro de la base,
+        una consulta por dimensión
+        """
+
+        agregados = {}
+
+        for dimension, columnas in (("dia_categoria", "substr(fecha_y_hora, 1, 10), categoria"),
+                                    ("dia_metodo_pago", "substr(fecha_y_hora, 1, 10), metodo_pago"),
+                                    ("producto", "CAST(id_producto AS TEXT)")):
+
+            agregados[dimension] = {}
+            filas = self._conexion.execute(
+                f"SELECT {columnas}, COUNT(*), SUM(cantidad), SUM(total) FROM ventas GROUP BY {columnas}")
+
+            for *clave, ventas, unidades, ingresos in filas:
+                agregados[dimension][tuple(clave) if len(clave) > 1 else clave[0]] = [ventas, unidades, ingresos]
+
+        # El nombre del ultimo dia de cada producto: el mayor "dia<US>nombre" (char(31) ordena antes que el texto)
+        filas = self._conexion.execute(
+            "SELECT CAST(id_producto AS TEXT), MAX(substr(fecha_y_hora, 1, 10) || char(31) || nombre_producto) "
+            "FROM ventas GROUP BY 1")
+
+        agregados["nombres"] = {id_producto: tuple(reciente.split("\x1f", 1)) for id_producto, reciente in filas}
+
+        return agregados
+
+    def pagina_ventas(self, numero: int, tamano: int, desde: str | None = None,
+                      hasta: str | None = None) -> tuple[list[Venta], int]:
+        """
+        Devuelve una página de ventas (las más recientes primero) y el total que cumple el filtro de fechas.
+        Usa el índice sobre fecha_y_hora y la clave primaria, sin leer las demás ventas.
+        """
+
+        condiciones, parametros = [], []
+
+        if desde is not None:
+            condiciones.append("fecha_y_hora >= ?")
+            parametros.append(desde)
+
+        if hasta is not None:
+            condiciones.append("fecha_y_hora < ?")
+            parametros.append(hasta + "~")  # "~" es mayor que cualquier hora del dia
+
+        donde = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+        total = self._conexion.execute(f"SELECT COUNT(*) FROM ventas {donde}", parametros).fetchone()[0]
+        filas = self._conexion.execute(
+            f"SELECT {COLUMNAS_VENTAS} FROM ventas {donde} ORDER BY id_venta DESC LIMIT ? OFFSET ?",
+            (*parametros, tamano, numero * tamano))
+
+        return [Venta(*fila) for fila in filas], total
+
+    def ultimo_id_venta(self) -> int:
+        """
+        Devuelve el mayor id_venta (consulta sobre la clave primaria)
+        """
+
+        return self._conexion.execute("SELECT COALESCE(MAX(id_venta), 0) FROM ventas").fetchone()[0]
+
+    def siguiente_id(self, secuencia: str, maximo_actual, cantidad: int = 1) -> int:
+        """
+        Reserva `cantidad` IDs seguidos de una secuencia guardada en la tabla meta ("seq_<secuencia>")
+        y devuelve el primero. `maximo_actual` solo se usa la primera vez, si la secuencia no existe todavía.
+        """
+
+        clave = f"seq_{secuencia}"
+
+        with self._conexion:
+
+            fila = self._conexion.execute("SELECT valor FROM meta WHERE clave = ?", (clave,)).fetchone()
+            primero = (fila[0] if fila else maximo_actual()) + 1
+            self._conexion.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES (?, ?)",
+                                   (clave, primero + cantidad - 1))
+
+        return primero
+
+    def registrar_ticket(self, registro: dict, ventas: list[Venta]) -> bool:
+        """
+        Guarda un ticket en una única transacción: el cambio del stock, todas sus ventas
+        y los acumulados del día. Se guarda todo o nada; retorna False si no se pudo guardar.
+        """
+
+        try:
+
+            with self._conexion:
+
+                self._aplicar_cambio(registro)
+                self._conexion.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('version', ?)",
+                                       (registro["version"],))
+
+                self._conexion.executemany(INSERTAR_VENTA, [venta.fila() for venta in ventas])
+
+                # Los acumulados del dia se actualizan en la misma transaccion que las ventas
+                for venta in ventas:
+                    dia = venta.fecha_y_hora[:10]
+                    self._conexion.executemany(SUMAR_ACUMULADO, [
+                        (dia, "total", "", venta.cantidad, venta.total),
+                        (dia, "categoria", venta.categoria, venta.cantidad, venta.total),
+                        (dia, "metodo_pago", venta.metodo_pago, venta.cantidad, venta.total)])
+
+        except sqlite3.Error as e:
+
+            print(f"Error al guardar la venta: {e}")
+
+            return False
+
+        return True
+
+    def acumulado_del_dia(self, dia: str) -> dict | None:
+        """
+        Devuelve los acumulados de ventas del día (ver reportes.sumar_al_acumulado), o None si no hubo ventas
+        """
+
+        filas = self._conexion.execute(
+            "SELECT dimension, clave, ventas, unidades, ingresos FROM acumulado_ventas WHERE dia = ?", (dia,))
+
+        acumulado = {"categoria": {}, "metodo_pago": {}}
+
+        for dimension, clave, ventas, unidades, ingresos in filas:
+            if dimension == "total":
+                acumulado["total"] = [ventas, unidades, ingresos]
+            else:
+                acumulado[dimension][clave] = [ventas, unidades, ingresos]
+
+        return acumulado if "total" in acumulado else None
+
+    def reconstruir_acumulado(self) -> None:
+        """
+        Vuelve a calcular los acumulados por día desde la tabla ventas, en una transacción
+        """
+
+        with self._conexion:
+            for sentencia in RECONSTRUIR_ACUMULADO.split(";"):
+                if sentencia.strip():
+                    self._conexion.execute(sentencia)
+
+    def cerrar(self, datos: dict[str]) -> None:
+        """
+        Cierra la conexión con la base
+        """
+
+        self._conexion.close()
+
+
+def migrar_desde_archivos(ruta: str = "stock.db") -> bool:
+    """
+    Copia productos.csv, stock_data.json (con su diario) y ventas.csv a una base SQLite.
+
+    Precondiciones:
+    - La base no debe tener datos (la migración se hace una sola vez)
+
+    Postcondiciones:
+    - Se insertan todos los datos en una única transacción: o se migra todo o nada
+    - Las filas de ventas con valores numéricos inválidos se omiten
+    - Se muestra un resumen con la cantidad de registros migrados
+    - Retorna True si se migró y False si la base ya tenía datos o hubo un error
+    """
+
+    backend = BackendSQLite(ruta)
+    conexion = backend._conexion
+
+    for tabla in ("productos", "cargas", "umbrales", "umbrales_producto", "ventas"):
+
+        if conexion.execute(f"SELECT 1 FROM {tabla} LIMIT 1").fetchone():
+
+            print(f"La base {ruta} ya tiene datos, no se migra.")
+            conexion.close()
+
+            return False
+
+    productos = cargar_productos()
+    stock_data = cargar_stock()
+
+    # cargar_ventas ya omite las ventas con valores numericos invalidos
+    ventas = [venta.fila() for venta in cargar_ventas()]
+
+    try:
+
+        with conexion:
+
+            conexion.executemany(f"INSERT INTO productos ({COLUMNAS_PRODUCTOS}) VALUES (?, ?, ?, ?, ?)",
+                                 [producto.fila() for producto in productos])
+            conexion.executemany(INSERTAR_CARGA, [carga.fila() for carga in stock_data["stock"]])
+            conexion.executemany("INSERT INTO umbrales_producto VALUES (?, ?)",
+                                 [(clave, valor) for clave, valor in stock_data["umbrales"].items()
+                                  if isinstance(clave, int)])
+            conexion.executemany("INSERT INTO umbrales VALUES (?, ?)",
+                                 [(clave, valor) for clave, valor in stock_data["umbrales"].items()
+                                  if isinstance(clave, str)])
+            conexion.executemany(INSERTAR_VENTA, ventas)
+            conexion.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES ('version', ?)",
+                             (stock_data["version"],))
+            conexion.execute(INCREMENTAR_PRODUCTOS)
+
+    except (sqlite3.Error, ValueError, KeyError) as e:
+
+        print(f"Error al migrar a {ruta}: {e}")
+        conexion.close()
+
+        return False
+
+    backend.reconstruir_acumulado()
+
+    print(f"Migración a {ruta} completa:")
+    print(f"Productos: {len(productos)} | Cargas: {len(stock_data['stock'])} | "
+          f"Umbrales: {len(stock_data['umbrales'])} | Ventas: {len(ventas)}")
+    conexion.close()
+
+    return True
+
+
+if __name__ == "__main__":
+    migrar_desde_archivos(sys.argv[1] if len(sys.argv) > 1 else "stock.db")
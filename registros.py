@@ -0,0 +1,257 @@
+# Registros tipados del sistema: productos, cargas de stock y ventas
+# Cada campo se convierte y valida una sola vez al leer el archivo o la base
+
+from collections.abc import Iterator, KeysView
+from dinero import centavos, pesos
+
+
+class Registro:
+    """
+    Base de los registros con __slots__: cada campo es un atributo con su tipo (ids y cantidades
+    como enteros, importes como enteros de centavos), sin un diccionario por fila.
+
+    Precondiciones:
+    - Cada subclase define CAMPOS (el orden de las columnas en el archivo y en la base)
+      y TIPOS (la conversión de cada campo desde texto, en el mismo orden)
+
+    Postcondiciones:
+    - El constructor recibe los valores ya convertidos; desde_texto() y desde_dict() convierten
+      y lanzan ValueError si algún campo no es válido
+    - Los campos también se leen como en un diccionario (registro["campo"], get, keys, items),
+      así las tablas, el historial y las acciones del menú los usan igual que antes
+    - Asignar con registro["campo"] = valor convierte el valor al tipo del campo
+    - Los campos de IMPORTES se convierten desde pesos (texto o número) a centavos (ver dinero.centavos)
+      y para_mostrar() los devuelve otra vez en pesos
+    """
+
+    __slots__ = ()
+
+    CAMPOS: tuple[str, ...] = ()
+    TIPOS: tuple = ()
+
+    # Valores de los campos que pueden faltar en los datos de versiones anteriores
+    DEFECTOS: dict = {}
+
+    # Campos que son importes de dinero (en centavos)
+    IMPORTES: tuple[str, ...] = ()
+
+    # Los campos como vista de claves de diccionario (admite operaciones de conjuntos, como dict.keys())
+    _CLAVES: KeysView = {}.keys()
+
+    def __init_subclass__(cls, **kwargs) -> None:
+
+        super().__init_subclass__(**kwargs)
+        cls._CLAVES = dict.fromkeys(cls.CAMPOS).keys()
+
+    def __init__(self, *valores) -> None:
+
+        for campo, valor in zip(self.CAMPOS, valores):
+            setattr(self, campo, valor)
+
+    @classmethod
+    def desde_texto(cls, valores: list[str]):
+        """
+        Crea un registro desde los valores de una línea de texto, en el orden de CAMPOS
+        """
+
+        return cls(*(tipo(valor) for tipo, valor in zip(cls.TIPOS, valores)))
+
+    @classmethod
+    def desde_dict(cls, datos: dict):
+        """
+        Crea un registro desde un diccionario (JSON o una fila de la base), convirtiendo cada campo
+        """
+
+        try:
+
+            return cls(*(tipo(datos[campo] if campo in datos else cls.DEFECTOS[campo])
+                         for campo, tipo in zip(cls.CAMPOS, cls.TIPOS)))
+
+        except (KeyError, TypeError) as e:
+
+            raise ValueError(f"{cls.__name__} inválido: {e}") from None
+
+    def fila(self) -> tuple:
+        """
+        Devuelve los valores en el orden de CAMPOS (una fila de la tabla en SQLite)
+        """
+
+        return tuple(getattr(self, campo) for campo in self.CAMPOS)
+
+    def como_dict(self) -> dict:
+
+        return {campo: getattr(self, campo) for campo in self.CAMPOS}
+
+    def para_mostrar(self) -> dict:
+        """
+        Devuelve el registro como diccionario con los importes en pesos ("4000.00"), para tablas,
+        el historial y la salida de la línea de comandos
+        """
+
+        return {campo: pesos(valor) if campo in self.IMPORTES else valor for campo, valor in self.items()}
+
+    def a_csv(self) -> str:
+        """
+        Devuelve el registro como una línea de CSV (sin el salto de línea)
+        """
+
+        return ",".join(map(str, self.fila()))
+
+    def __getitem__(self, campo: str):
+
+        if campo not in self.CAMPOS:
+            raise KeyError(campo)
+
+        return getattr(self, campo)
+
+    @classmethod
+    def convertir(cls, campo: str, valor):
+        """
+        Devuelve `valor` convertido al tipo de `campo` (KeyError si no es un campo, ValueError si no es válido)
+        """
+
+        if campo not in cls.CAMPOS:
+            raise KeyError(campo)
+
+        return cls.TIPOS[cls.CAMPOS.index(campo)](valor)
+
+    def __setitem__(self, campo: str, valor) -> None:
+
+        setattr(self, campo, self.convertir(campo, valor))
+
+    def get(self, campo: str, defecto=None):
+
+        return getattr(self, campo) if campo in self.CAMPOS else defecto
+
+    def update(self, campos: dict) -> None:
+
+        for campo, valor in campos.items():
+            self[campo] = valor
+
+    def keys(self) -> KeysView:
+
+        return self._CLAVES
+
+    def values(self) -> tuple:
+
+        return self.fila()
+
+    def items(self) -> Iterator[tuple[str, object]]:
+
+        return zip(self.CAMPOS, self.fila())
+
+    def __iter__(self) -> Iterator[str]:
+
+        return iter(self.CAMPOS)
+
+    def __contains__(self, campo: str) -> bool:
+
+        return campo in self.CAMPOS
+
+    def __len__(self) -> int:
+
+        return len(self.CAMPOS)
+
+    def __eq__(self, otro) -> bool:
+
+        return type(otro) is type(self) and otro.fila() == self.fila()
+
+    # Igual que un diccionario: se compara por valor pero no sirve como clave
+    __hash__ = None
+
+    def __repr__(self) -> str:
+
+        return f"{type(self).__name__}({', '.join(f'{campo}={valor!r}' for campo, valor in self.items())})"
+
+
+class Producto(Registro):
+    """
+    Producto del catálogo (una fila de productos.csv); el precio se guarda en centavos
+
+    Postcondiciones:
+    - En productos.csv el precio está en pesos: sin decimales si es exacto, como siempre
+    """
+
+    __slots__ = ("id", "nombre", "capacidad", "categoria", "precio")
+
+    CAMPOS = __slots__
+    TIPOS = (int, str, str, str, centavos)
+    IMPORTES = ("precio",)
+
+    def a_csv(self) -> str:
+
+        return f"{self.id},{self.nombre},{self.capacidad},{self.categoria},{pesos(self.precio).removesuffix('.00')}"
+
+
+class Carga(Registro):
+    """
+    Carga de stock: unidades de un producto que entraron juntas
+
+    Postcondiciones:
+    - id_producto es el producto del catálogo; tipo, capacidad y categoría son copias de sus datos
+      para mostrar la carga (se actualizan si el producto cambia)
+    - Las cargas de versiones anteriores no tienen id_producto: quedan en 0 hasta que el almacén
+      las asocia a su producto (ver Almacen._migrar_cargas)
+    """
+
+    __slots__ = ("id", "id_producto", "tipo", "capacidad", "cantidad", "categoria")
+
+    CAMPOS = __slots__
+    TIPOS = (int, int, str, str, int, str)
+    DEFECTOS = {"id_producto": 0, "categoria": ""}
+
+
+class Venta(Registro):
+    """
+    Venta de un producto dentro de un ticket (una fila de ventas.csv)
+
+    Postcondiciones:
+    - El precio unitario y el total están en centavos; en el CSV se guardan en pesos con dos decimales,
+      que se leen sin pasar por float (el texto representa exactamente los centavos)
+    - Una venta de una versión anterior (sin id_ticket o sin cargas) es su propio ticket
+      y no tiene cargas registradas
+    """
+
+    __slots__ = ("id_venta", "fecha_y_hora", "id_producto", "nombre_producto", "categoria", "cantidad",
+                 "precio_unitario", "total", "metodo_pago", "id_ticket", "cargas")
+
+    CAMPOS = __slots__
+    TIPOS = (int, str, int, str, str, int, centavos, centavos, str, int, str)
+    DEFECTOS = {"cargas": ""}
+    IMPORTES = ("precio_unitario", "total")
+
+    @classmethod
+    def desde_texto(cls, valores: list[str]):
+
+        if not len(cls.CAMPOS) - 2 <= len(valores) <= len(cls.CAMPOS):
+            raise ValueError(f"venta con {len(valores)} campos: {','.join(valores)}")
+
+        # id_ticket y cargas de las ventas viejas
+        valores = list(valores) + [valores[0], ""][len(valores) - len(cls.CAMPOS) + 2:]
+
+        return super().desde_texto(valores)
+
+    @classmethod
+    def desde_dict(cls, datos: dict):
+
+        if "id_ticket" not in datos and "id_venta" in datos:
+            datos = {**datos, "id_ticket": datos["id_venta"]}
+
+        return super().desde_dict(datos)
+
+    def a_csv(self) -> str:
+
+        return (f"{self.id_venta},{self.fecha_y_hora},{self.id_producto},{self.nombre_producto},{self.categoria},"
+                f"{self.cantidad},{pesos(self.precio_unitario)},{pesos(self.total)},{self.metodo_pago},"
+                f"{self.id_ticket},{self.cargas}")
+
+
+def serializable(objeto) -> dict:
+    """
+    Convierte un registro a diccionario para json.dump (parámetro default)
+    """
+
+    if isinstance(objeto, Registro):
+        return objeto.como_dict()
+
+    raise TypeError(f"{type(objeto).__name__} no se puede guardar en JSON")
@@ -0,0 +1,548 @@
+# Reportes de ventas: ingresos y unidades agrupados por período, categoría, producto y método de pago
+
+import heapq
+from collections.abc import Iterable
+from datetime import date
+from dinero import centavos
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él se usa el cálculo en Python puro
+    np = None
+
+# Agrupaciones disponibles en el resumen, en el orden en que se ofrecen en el menú
+AGRUPACIONES = ("dia", "semana", "mes", "categoria", "producto", "metodo_pago")
+
+# Bytes de ventas.csv que se procesan por vez en el cálculo con NumPy
+TAMANO_BLOQUE = 32 * 1024 * 1024
+
+# Campos (y su orden) de las ventas que recibe agregados_ventas
+CAMPOS_REPORTE = ("fecha_y_hora", "id_producto", "nombre_producto", "categoria", "cantidad", "total", "metodo_pago")
+
+# Campos de texto de ventas.csv que se numeran en el cálculo con NumPy (la fecha se recorta al día)
+CAMPOS_TEXTO = ("fecha_y_hora", "id_producto", "nombre_producto", "categoria", "metodo_pago")
+
+# Sumas de los agregados y los campos de ventas.csv por los que agrupa cada una
+DIMENSIONES = {"dia_categoria": ("fecha_y_hora", "categoria"),
+               "dia_metodo_pago": ("fecha_y_hora", "metodo_pago"),
+               "producto": ("id_producto",)}
+
+# Constantes del hash FNV-1a de 64 bits
+_FNV_BASE = 0xCBF29CE484222325
+_FNV_PRIMO = 0x100000001B3
+
+
+def agregados_ventas(filas: Iterable[tuple]) -> dict[str, dict]:
+    """
+    Suma las ventas por (día, categoría), por (día, método de pago) y por producto en una sola pasada
+
+    Precondiciones:
+    - `filas` genera tuplas con los campos de CAMPOS_REPORTE, en ese orden
+
+    Postcondiciones:
+    - Devuelve {"dia_categoria": {(dia, categoria): [ventas, unidades, ingresos]},
+      "dia_metodo_pago": {(dia, metodo): [...]}, "producto": {id_producto: [...]},
+      "nombres": {id_producto: (dia, nombre)}}; es la base de resumir_ventas y de acumulado_desde_agregados
+    - El nombre de cada producto es el de su último día de ventas (el mayor si ese día tuvo varios)
+    - Los ingresos son enteros de centavos: el total de cada venta (texto en pesos) se convierte
+      sin pasar por float y las sumas son exactas
+    - Las ventas con cantidad o total inválidos se omiten
+    """
+
+    por_categoria, por_metodo, por_producto, nombres = {}, {}, {}, {}
+
+    for fecha, id_producto, nombre, categoria, cantidad, total, metodo in filas:
+
+        try:
+            cantidad = int(cantidad)
+            total = centavos(total)
+        except ValueError:
+            continue
+
+        dia = fecha[:10]
+
+        _acumular(por_categoria, (dia, categoria), 1, cantidad, total)
+        _acumular(por_metodo, (dia, metodo), 1, cantidad, total)
+        _acumular(por_producto, id_producto, 1, cantidad, total)
+
+        anterior = nombres.get(id_producto)
+
+        if anterior is None or (dia, nombre) > anterior:
+            nombres[id_producto] = (dia, nombre)
+
+    return {"dia_categoria": por_categoria, "dia_metodo_pago": por_metodo, "producto": por_producto,
+            "nombres": nombres}
+
+
+def _acumular(grupos: dict, clave, ventas: int, unidades: int, ingresos: int) -> None:
+    """
+    Suma ventas, unidades e ingresos al grupo `clave` (lo crea si no existe)
+    """
+
+    acumulado = grupos.get(clave)
+
+    if acumulado is None:
+        grupos[clave] = [ventas, unidades, ingresos]
+    else:
+        acumulado[0] += ventas
+        acumulado[1] += unidades
+        acumulado[2] += ingresos
+
+
+def _numeros(datos, inicios, fines, decimales: bool):
+    """
+    Convierte los campos datos[inicio:fin] (dígitos, y un punto si `decimales`) a enteros
+
+    Postcondiciones:
+    - Devuelve (valores, validos); los campos vacíos o con otros caracteres quedan como no válidos
+    - Con `decimales` los valores son importes en centavos, calculados con enteros como dinero.centavos
+      (redondeo al centavo con las mitades hacia arriba); los campos demasiado largos para
+      calcularlos sin desbordar quedan como no válidos y se interpretan en Python
+    """
+
+    largos = fines - inicios
+    valores = np.zeros(len(inicios), dtype=np.int64)
+    escalas = np.ones(len(inicios), dtype=np.int64)
+    con_punto = np.zeros(len(inicios), dtype=bool)
+    validos = (largos > 0) & (largos <= (15 if decimales else 18))
+
+    for posicion in range(int(largos.max(initial=0))):
+
+        activos = posicion < largos
+        caracteres = datos[np.where(activos, inicios + posicion, 0)].astype(np.int64)
+        digitos = activos & (caracteres >= 48) & (caracteres <= 57)
+        puntos = activos & (caracteres == 46) & ~con_punto if decimales else False
+
+        validos &= ~activos | digitos | puntos
+        valores = np.where(digitos, valores * 10 + caracteres - 48, valores)
+
+        if decimales:
+            escalas = np.where(digitos & con_punto, escalas * 10, escalas)
+            con_punto |= puntos
+
+    if decimales:
+        # valores / escalas en centavos, redondeado: (valores * 100 / escalas + 1/2) con enteros
+        valores = (valores * 200 + escalas) // (2 * escalas)
+
+    return valores, validos
+
+
+def _sumar_grupos(grupos, valores: list, cantidad: int) -> list:
+    """
+    Suma cada arreglo de `valores` (enteros) por grupo con aritmética entera (np.bincount con pesos suma en float64)
+
+    Precondiciones:
+    - Cada grupo entre 0 y cantidad - 1 tiene al menos una fila (como los de _agrupar_codigos)
+
+    Postcondiciones:
+    - Devuelve una suma por grupo de cada arreglo; las filas se ordenan por grupo una sola vez
+    """
+
+    if not cantidad:
+        return [np.zeros(0, dtype=np.int64) for _ in valores]
+
+    orden = np.argsort(grupos, kind="stable")
+    inicios = np.searchsorted(grupos[orden], np.arange(cantidad))
+
+    return [np.add.reduceat(arreglo[orden], inicios) for arreglo in valores]
+
+
+def _palabras_campo(palabras, inicios, largos):
+    """
+    Recorre un campo de texto de a 8 bytes en todas las filas a la vez
+
+    Postcondiciones:
+    - Genera (activos, palabra) por cada desplazamiento: las filas cuyo campo llega hasta ahí
+      y sus 8 bytes siguientes, con ceros en los bytes que quedan fuera del campo
+    """
+
+    for desplazamiento in range(0, int(largos.max(initial=0)), 8):
+
+        resto = np.clip(largos - desplazamiento, 0, 8).astype(np.uint64)
+        activos = resto > 0
+        palabra = palabras[np.where(activos, inicios + desplazamiento, 0)]
+
+        # Se descartan los bytes que quedan fuera del campo (little endian: los mas altos)
+        mascara = np.where(resto == 8, np.uint64(0xFFFFFFFFFFFFFFFF),
+                           (np.uint64(1) << (resto * np.uint64(8))) - np.uint64(1))
+
+        yield activos, palabra & mascara
+
+
+def _codificar_campo(bloque: bytes, palabras, inicios, fines) -> tuple[list[str], object]:
+    """
+    Numera los distintos valores de un campo de texto sin decodificar cada fila
+
+    Precondiciones:
+    - `palabras[i]` son los 8 bytes de `bloque` que empiezan en la posición i
+    - `inicios` y `fines` son los límites del campo en cada fila
+
+    Postcondiciones:
+    - Devuelve (textos, codigos): codigos[fila] es la posición del valor de esa fila en `textos`
+    - Los valores se agrupan por un hash FNV-1a de 64 bits calculado de a 8 bytes;
+      solo se decodifica una fila por valor distinto
+    - Después se comparan los bytes de cada fila con los de la primera fila de su grupo:
+      si dos valores distintos tienen el mismo hash, el campo se numera por los bytes de cada fila
+    """
+
+    primo = np.uint64(_FNV_PRIMO)
+    largos = fines - inicios
+    hashes = np.full(len(inicios), _FNV_BASE, dtype=np.uint64) ^ largos.astype(np.uint64)
+
+    for activos, palabra in _palabras_campo(palabras, inicios, largos):
+        hashes = np.where(activos, (hashes ^ palabra) * primo, hashes)
+
+    _, primeras, codigos = np.unique(hashes, return_index=True, return_inverse=True)
+
+    # Cada fila contra la primera de su grupo: mismo largo y mismos bytes
+    representantes = inicios[primeras][codigos]
+    iguales = largos == largos[primeras][codigos]
+
+    for (activos, palabra), (_, representante) in zip(_palabras_campo(palabras, inicios, largos),
+                                                      _palabras_campo(palabras, representantes, largos)):
+        iguales &= ~activos | (palabra == representante)
+
+    # Dos valores distintos con el mismo hash: se numeran por sus bytes, fila por fila
+    if not iguales.all():
+
+        valores = {}
+        codigos = np.array([valores.setdefault(bloque[inicio:fin], len(valores))
+                            for inicio, fin in zip(inicios.tolist(), fines.tolist())], dtype=np.int64)
+
+        return [valor.decode("utf-8", "replace") for valor in valores], codigos
+
+    textos = [bloque[inicio:fin].decode("utf-8", "replace")
+              for inicio, fin in zip(inicios[primeras].tolist(), fines[primeras].tolist())]
+
+    return textos, codigos
+
+
+def _agrupar_codigos(codigos_campos: list, cardinalidades: list[int]):
+    """
+    Agrupa las filas con la misma combinación de códigos de campo
+
+    Precondiciones:
+    - codigos_campos[i][fila] está entre 0 y cardinalidades[i] - 1
+
+    Postcondiciones:
+    - Devuelve (primeras, grupos): la primera fila de cada grupo y el grupo de cada fila
+    """
+
+    grupos = np.zeros(len(codigos_campos[0]), dtype=np.int64)
+
+    for codigos, cardinalidad in zip(codigos_campos, cardinalidades):
+
+        # Se renumeran las combinaciones si el codigo combinado pudiera desbordarse
+        if (int(grupos.max(initial=0)) + 1) * cardinalidad >= 2 ** 62:
+            _, grupos = np.unique(grupos, return_inverse=True)
+
+        grupos = grupos * cardinalidad + codigos
+
+    _, primeras, grupos = np.unique(grupos, return_index=True, return_inverse=True)
+
+    return primeras, grupos
+
+
+def _rangos(textos: list[str]):
+    """
+    Devuelve rangos[codigo]: la posición de textos[codigo] en orden alfabético
+    """
+
+    rangos = np.empty(len(textos), dtype=np.int64)
+    rangos[sorted(range(len(textos)), key=textos.__getitem__)] = np.arange(len(textos))
+
+    return rangos
+
+
+def _ultimos_por_producto(productos, dias, nombres, diccionarios: dict[str, dict]):
+    """
+    Elige, entre filas con códigos de producto, día y nombre, la del último día de cada producto
+
+    Precondiciones:
+    - Los códigos son posiciones en diccionarios["id_producto"], ["fecha_y_hora"] y ["nombre_producto"]
+
+    Postcondiciones:
+    - Devuelve la posición de una fila por producto: la de mayor (día, nombre), como agregados_ventas
+    """
+
+    textos_nombres = list(diccionarios["nombre_producto"])
+    claves = _rangos(list(diccionarios["fecha_y_hora"]))[dias] * len(textos_nombres) + _rangos(textos_nombres)[nombres]
+
+    # Ordenadas por producto y clave, la ultima fila de cada producto es la buscada
+    orden = np.lexsort((claves, productos))
+
+    return orden[np.flatnonzero(np.diff(productos[orden], append=-1))]
+
+
+def _agrupar_bloque(bloque: bytes, posiciones: dict[str, int], columnas: int,
+                    diccionarios: dict[str, dict], partes: dict[str, list], filas_sueltas: list) -> None:
+    """
+    Suma con operaciones vectorizadas las líneas completas de `bloque` en cada una de las DIMENSIONES
+
+    Postcondiciones:
+    - Agrega a partes[dimension] los códigos (según `diccionarios`) y las sumas de cada grupo del bloque,
+      y a partes["nombres"] los códigos de la última venta de cada producto del bloque
+    - Solo se agrupan los códigos de cada dimensión: el trabajo fuera de NumPy depende
+      de la cantidad de valores distintos de cada campo, no de sus combinaciones
+    - Las ventas con números que no son simples dígitos se agregan a `filas_sueltas` para
+      interpretarlas como en Python puro
+    """
+
+    if not bloque:
+        return
+
+    datos = np.frombuffer(bloque + bytes(8), dtype=np.uint8)
+    palabras = np.ndarray((len(bloque) + 1,), dtype="<u8", buffer=datos, strides=(1,))
+
+    fines_linea = np.flatnonzero(datos[:len(bloque)] == 10)
+    inicios_linea = np.concatenate(([0], fines_linea[:-1] + 1))
+
+    # Solo las lineas con la cantidad justa de comas tienen la forma de una venta
+    comas = np.flatnonzero(datos[:len(bloque)] == 44)
+    comas_hasta = np.searchsorted(comas, fines_linea)
+    completas = np.diff(comas_hasta, prepend=0) == columnas - 1
+
+    # Las comas de cada linea completa son las columnas - 1 anteriores a su salto de linea
+    comas = comas[comas_hasta[completas][:, None] - np.arange(columnas - 1, 0, -1)]
+    inicios_linea = inicios_linea[completas]
+    fines_linea = fines_linea[completas]
+
+    if not len(fines_linea):
+        return
+
+    # Fin del ultimo campo: antes del salto de linea (y del \r si el archivo es de Windows)
+    fin_ultimo = fines_linea - (datos[np.maximum(fines_linea - 1, 0)] == 13)
+
+    def limites(campo: str) -> tuple:
+        indice = posiciones[campo]
+        inicios = inicios_linea if indice == 0 else comas[:, indice - 1] + 1
+        fines = fin_ultimo if indice == columnas - 1 else comas[:, indice]
+        return inicios, fines
+
+    cantidades, cantidades_validas = _numeros(datos, *limites("cantidad"), decimales=False)
+    totales, totales_validos = _numeros(datos, *limites("total"), decimales=True)
+    validas = cantidades_validas & totales_validos
+
+    for linea in np.flatnonzero(~validas).tolist():
+        valores = bloque[inicios_linea[linea]:fin_ultimo[linea]].decode("utf-8", "replace").split(",")
+        filas_sueltas.append(tuple(valores[posiciones[campo]] for campo in CAMPOS_REPORTE))
+
+    if not validas.any():
+        return
+
+    # Cada campo se numera con un codigo comun a todos los bloques
+    codigos_campos = {}
+
+    for campo in CAMPOS_TEXTO:
+
+        inicios, fines = limites(campo)
+
+        if campo == "fecha_y_hora":
+            fines = np.minimum(fines, inicios + 10)
+
+        textos, codigos = _codificar_campo(bloque, palabras, inicios[validas], fines[validas])
+        traduccion = np.array([diccionarios[campo].setdefault(texto, len(diccionarios[campo])) for texto in textos],
+                              dtype=np.int64)
+        codigos_campos[campo] = traduccion[codigos]
+
+    valores = [np.ones(int(validas.sum()), dtype=np.int64), cantidades[validas], totales[validas]]
+
+    for dimension, campos in DIMENSIONES.items():
+
+        codigos = [codigos_campos[campo] for campo in campos]
+        primeras, grupos = _agrupar_codigos(codigos, [len(diccionarios[campo]) for campo in campos])
+        partes[dimension].append(([codigo[primeras] for codigo in codigos],
+                                  _sumar_grupos(grupos, valores, len(primeras))))
+
+    codigos = [codigos_campos[campo] for campo in ("id_producto", "fecha_y_hora", "nombre_producto")]
+    ultimos = _ultimos_por_producto(*codigos, diccionarios)
+    partes["nombres"].append([codigo[ultimos] for codigo in codigos])
+
+
+def agregados_ventas_csv(ruta: str) -> dict[str, dict]:
+    """
+    Igual que agregados_ventas, pero lee ventas.csv por bloques de bytes y los procesa con NumPy
+
+    Precondiciones:
+    - NumPy debe estar instalado
+    - `ruta` es un CSV con encabezado que incluye los campos de CAMPOS_TEXTO, "cantidad" y "total"
+
+    Postcondiciones:
+    - Devuelve lo mismo que agregados_ventas para las mismas ventas
+    - Cada bloque se separa en campos y se suma sin recorrer las ventas una por una en Python;
+      solo se decodifica el texto de cada valor distinto de cada campo
+    - Si el archivo no existe devuelve agregados vacíos
+    """
+
+    diccionarios = {campo: {} for campo in CAMPOS_TEXTO}
+    partes = {dimension: [] for dimension in (*DIMENSIONES, "nombres")}
+    filas_sueltas = []
+
+    try:
+
+        with open(ruta, "rb") as archivo:
+
+            encabezado = archivo.readline().decode("utf-8").strip().split(",")
+            posiciones = {campo: indice for indice, campo in enumerate(encabezado)}
+            pendiente = b""
+
+            while bloque := archivo.read(TAMANO_BLOQUE):
+
+                bloque = pendiente + bloque
+                corte = bloque.rfind(b"\n") + 1
+                pendiente = bloque[corte:]
+
+                _agrupar_bloque(bloque[:corte], posiciones, len(encabezado), diccionarios, partes, filas_sueltas)
+
+            # Ultima linea sin salto de linea
+            if pendiente.strip():
+                _agrupar_bloque(pendiente + b"\n", posiciones, len(encabezado), diccionarios, partes, filas_sueltas)
+
+    except FileNotFoundError:
+
+        pass
+
+    agregados = agregados_ventas(filas_sueltas)
+
+    if not partes["nombres"]:
+        return agregados
+
+    textos = {campo: list(diccionario) for campo, diccionario in diccionarios.items()}
+
+    # Se juntan los grupos de todos los bloques y se vuelven a sumar de una vez, dimension por dimension
+    for dimension, campos in DIMENSIONES.items():
+
+        codigos = [np.concatenate(codigos) for codigos in zip(*(parte[0] for parte in partes[dimension]))]
+        primeras, grupos = _agrupar_codigos(codigos, [len(diccionarios[campo]) for campo in campos])
+        sumas = _sumar_grupos(grupos, [np.concatenate(sumas) for sumas in zip(*(parte[1] for parte in partes[dimension]))],
+                              len(primeras))
+
+        claves = zip(*([textos[campo][codigo] for codigo in codigo_campo[primeras].tolist()]
+                       for campo, codigo_campo in zip(campos, codigos)))
+
+        for clave, ventas, unidades, ingresos in zip(claves, *(suma.tolist() for suma in sumas)):
+            _acumular(agregados[dimension], clave if len(clave) > 1 else clave[0], ventas, unidades, ingresos)
+
+    productos, dias, nombres = (np.concatenate(codigos) for codigos in zip(*partes["nombres"]))
+
+    for fila in _ultimos_por_producto(productos, dias, nombres, diccionarios).tolist():
+
+        id_producto = textos["id_producto"][productos[fila]]
+        reciente = (textos["fecha_y_hora"][dias[fila]], textos["nombre_producto"][nombres[fila]])
+        anterior = agregados["nombres"].get(id_producto)
+
+        if anterior is None or reciente > anterior:
+            agregados["nombres"][id_producto] = reciente
+
+    return agregados
+
+
+def resumir_ventas(agregados: dict[str, dict]) -> dict:
+    """
+    Suma los agregados de ventas en cada una de las agrupaciones de AGRUPACIONES
+
+    Precondiciones:
+    - `agregados` es el resultado de agregados_ventas, agregados_ventas_csv o equivalente del almacenamiento
+
+    Postcondiciones:
+    - Devuelve un diccionario con "ventas", "unidades" e "ingresos" (en centavos) totales, "nombres"
+      (id -> nombre del producto) y una entrada por agrupación con {clave: [ventas, unidades, ingresos]}
+    - Las semanas se identifican como AAAA-Snn (semana ISO) y los meses como AAAA-MM
+    - El trabajo depende de la cantidad de días, categorías, métodos de pago y productos, no de la de ventas
+    """
+
+    resumen = {agrupacion: {} for agrupacion in AGRUPACIONES}
+    semanas = {}
+    ventas_totales = unidades_totales = ingresos_totales = 0
+
+    for (dia, categoria), (ventas, unidades, ingresos) in sorted(agregados["dia_categoria"].items()):
+
+        if dia not in semanas:
+            try:
+                anio, semana, _ = date.fromisoformat(dia).isocalendar()
+                semanas[dia] = f"{anio}-S{semana:02d}"
+            except ValueError:
+                semanas[dia] = dia
+
+        for agrupacion, valor in (("dia", dia), ("semana", semanas[dia]), ("mes", dia[:7]),
+                                  ("categoria", categoria)):
+            _acumular(resumen[agrupacion], valor, ventas, unidades, ingresos)
+
+        ventas_totales += ventas
+        unidades_totales += unidades
+        ingresos_totales += ingresos
+
+    for (_, metodo), valores in sorted(agregados["dia_metodo_pago"].items()):
+        _acumular(resumen["metodo_pago"], metodo, *valores)
+
+    for id_producto, valores in agregados["producto"].items():
+        _acumular(resumen["producto"], id_producto, *valores)
+
+    resumen["nombres"] = {id_producto: nombre for id_producto, (_, nombre) in agregados["nombres"].items()}
+    resumen["ventas"] = ventas_totales
+    resumen["unidades"] = unidades_totales
+    resumen["ingresos"] = ingresos_totales
+
+    return resumen
+
+
+def _acumulado_dia(dias: dict[str, dict], dia: str) -> dict:
+    """
+    Devuelve el acumulado de `dia` (ver sumar_al_acumulado), creándolo vacío si no existe
+    """
+
+    acumulado = dias.get(dia)
+
+    if acumulado is None:
+        acumulado = dias[dia] = {"total": [0, 0, 0], "categoria": {}, "metodo_pago": {}}
+
+    return acumulado
+
+
+def sumar_al_acumulado(dias: dict[str, dict], dia: str, categoria: str, metodo: str,
+                       ventas: int, unidades: int, ingresos: int) -> None:
+    """
+    Suma ventas al acumulado de `dia`: total del día, por categoría y por método de pago
+
+    Postcondiciones:
+    - dias[dia] queda con {"total": [ventas, unidades, ingresos], "categoria": {...}, "metodo_pago": {...}},
+      con los ingresos en centavos
+    """
+
+    acumulado = _acumulado_dia(dias, dia)
+
+    _acumular(acumulado, "total", ventas, unidades, ingresos)
+    _acumular(acumulado["categoria"], categoria, ventas, unidades, ingresos)
+    _acumular(acumulado["metodo_pago"], metodo, ventas, unidades, ingresos)
+
+
+def acumulado_desde_agregados(agregados: dict[str, dict]) -> dict[str, dict]:
+    """
+    Arma desde cero los acumulados por día (ver sumar_al_acumulado) a partir de los agregados de ventas
+    """
+
+    dias = {}
+
+    for (dia, categoria), valores in agregados["dia_categoria"].items():
+        acumulado = _acumulado_dia(dias, dia)
+        _acumular(acumulado, "total", *valores)
+        _acumular(acumulado["categoria"], categoria, *valores)
+
+    for (dia, metodo), valores in agregados["dia_metodo_pago"].items():
+        _acumular(_acumulado_dia(dias, dia)["metodo_pago"], metodo, *valores)
+
+    return dias
+
+
+def top_productos(resumen: dict, cantidad: int = 10, por: str = "ingresos") -> list[tuple[str, list]]:
+    """
+    Devuelve los `cantidad` productos con más ingresos (o unidades, con por="unidades")
+
+    Postcondiciones:
+    - Usa un heap acotado a `cantidad` elementos, sin ordenar todos los productos
+    - Devuelve pares (id_producto, [ventas, unidades, ingresos]) de mayor a menor
+    """
+
+    posicion = 1 if por == "unidades" else 2
+
+    return heapq.nlargest(cantidad, resumen["producto"].items(), key=lambda par: par[1][posicion])
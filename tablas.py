@@ -0,0 +1,153 @@
+# Tablas de texto para los listados, sin cargar tabulate salvo para formatos que no se soportan aca
+
+import sys
+from collections.abc import Iterable, Iterator
+from itertools import chain, islice
+
+# Cantidad de filas que se miran para calcular los anchos cuando la tabla se escribe de a una fila
+MUESTRA_ANCHOS = 200
+
+# Bordes de cada formato: (izquierda, relleno, cruce, derecha) para cada tipo de linea
+FORMATOS = {
+    "grid": {
+        "arriba": ("+", "-", "+", "+"),
+        "encabezado": ("+", "=", "+", "+"),
+        "entre_filas": ("+", "-", "+", "+"),
+        "abajo": ("+", "-", "+", "+"),
+        "fila": ("|", "|", "|"),
+    },
+    "fancy_grid": {
+        "arriba": ("╒", "═", "╤", "╕"),
+        "encabezado": ("╞", "═", "╪", "╡"),
+        "entre_filas": ("├", "─", "┼", "┤"),
+        "abajo": ("╘", "═", "╧", "╛"),
+        "fila": ("│", "│", "│"),
+    },
+}
+
+
+def _texto(valor) -> str:
+    """
+    Convierte el valor de una celda en texto (None queda vacío y los float enteros sin decimales)
+    """
+
+    if valor is None:
+        return ""
+
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+
+    return str(valor)
+
+
+def _es_numero(texto: str) -> bool:
+
+    try:
+
+        float(texto)
+
+    except ValueError:
+
+        return False
+
+    return True
+
+
+def _lineas(filas: Iterable, encabezados, formato: str, muestra: int | None) -> Iterator[str]:
+    """
+    Genera las líneas de la tabla de a una
+
+    Postcondiciones:
+    - Los anchos y la alineación (números a la derecha, texto a la izquierda) se calculan con las
+      primeras `muestra` filas (todas si es None); una fila posterior más ancha no se recorta
+    - Solo se guardan en memoria las filas de la muestra
+    """
+
+    filas = iter(filas)
+    primeras = list(islice(filas, muestra)) if muestra is not None else list(filas)
+
+    if encabezados == "keys":
+
+        if not primeras:
+            return
+
+        encabezados = list(primeras[0])
+        celdas = lambda fila: [_texto(fila.get(clave)) for clave in encabezados]
+
+    else:
+
+        # Las filas mas cortas que los encabezados se completan con celdas vacias
+        encabezados = list(encabezados)
+        celdas = lambda fila: ([_texto(valor) for valor in fila] + [""] * len(encabezados))[:len(encabezados)]
+
+    muestra_celdas = [celdas(fila) for fila in primeras]
+    columnas = range(len(encabezados))
+
+    # Igual que tabulate, los encabezados llevan dos espacios de margen
+    anchos = [max([len(str(encabezados[i])) + 2] + [len(fila[i]) for fila in muestra_celdas]) for i in columnas]
+    numericas = [bool(muestra_celdas) and all(_es_numero(fila[i]) for fila in muestra_celdas if fila[i])
+                 for i in columnas]
+
+    bordes = FORMATOS[formato]
+
+    def separador(tipo: str) -> str:
+        izquierda, relleno, cruce, derecha = bordes[tipo]
+        return izquierda + cruce.join(relleno * (ancho + 2) for ancho in anchos) + derecha
+
+    def fila_texto(valores: list[str]) -> str:
+        izquierda, medio, derecha = bordes["fila"]
+        partes = [valor.rjust(anchos[i]) if numericas[i] else valor.ljust(anchos[i]) for i, valor in enumerate(valores)]
+        return f"{izquierda} " + f" {medio} ".join(partes) + f" {derecha}"
+
+    yield separador("arriba")
+    yield fila_texto([str(encabezado) for encabezado in encabezados])
+    yield separador("encabezado")
+
+    for numero, valores in enumerate(chain(muestra_celdas, map(celdas, filas))):
+
+        if numero:
+            yield separador("entre_filas")
+
+        yield fila_texto(valores)
+
+    yield separador("abajo")
+
+
+def tabla(filas: Iterable, headers="keys", tablefmt: str = "grid") -> str:
+    """
+    Arma una tabla de texto como tabulate(filas, headers=..., tablefmt=...)
+
+    Precondiciones:
+    - `filas` son diccionarios (con headers="keys") o listas de valores (con una lista de encabezados)
+
+    Postcondiciones:
+    - "grid" y "fancy_grid" se arman acá, con los anchos de las filas recibidas (la página visible)
+    - Cualquier otro formato se delega en tabulate, que recién se importa en ese momento
+    """
+
+    if tablefmt not in FORMATOS:
+
+        from tabulate import tabulate
+
+        return tabulate(filas, headers=headers, tablefmt=tablefmt)
+
+    return "\n".join(_lineas(filas, headers, tablefmt, None))
+
+
+def escribir_tabla(filas: Iterable, headers="keys", tablefmt: str = "grid", salida=None) -> None:
+    """
+    Escribe una tabla fila por fila, sin armarla entera en memoria
+
+    Postcondiciones:
+    - Los anchos salen de las primeras MUESTRA_ANCHOS filas (ver _lineas)
+    - Se escribe en `salida` (por defecto sys.stdout)
+    """
+
+    salida = sys.stdout if salida is None else salida
+
+    if tablefmt not in FORMATOS:
+        print(tabla(list(filas), headers, tablefmt), file=salida)
+        return
+
+    for linea in _lineas(filas, headers, tablefmt, MUESTRA_ANCHOS):
+        salida.write(linea + "\n")